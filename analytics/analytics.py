@@ -0,0 +1,204 @@
+import argparse
+import logging
+import os
+import threading
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from chatbot.config import ChatConfig
+from utils import serialization
+
+logger = logging.getLogger(__name__)
+
+TRIAGE_LEVELS = ("emergency", "consultation_24", "consultation", "self_care", "unknown")
+
+
+class AnalyticsEngine:
+    """Columnar aggregates over interviews, updated incrementally, plus heart-rate trends from the Fitbit history store."""
+
+    def __init__(self, symptom_map=None, log_file=ChatConfig.ANALYTICS_FILE, history_store=None):
+        self.log_file = log_file
+        self.history_store = history_store
+        self.symptom_names = self._symptom_names(symptom_map)
+        self._lock = threading.Lock()
+
+        # Symptom IDs are interned to integer codes so counts live in one int64 array
+        self._symptom_codes = {}
+        self._symptom_ids = []
+        self._symptom_counts = np.zeros(64, dtype=np.int64)
+        self._triage_counts = np.zeros(len(TRIAGE_LEVELS), dtype=np.int64)
+        self.interview_count = 0
+
+        self._load_interview_log()
+
+    @staticmethod
+    def _symptom_names(symptom_map):
+        """Builds an id -> name lookup from the cached symptom list or dict."""
+        if not symptom_map:
+            return {}
+        pairs = symptom_map.items() if isinstance(symptom_map, dict) else symptom_map
+        return {symptom_id: name for name, symptom_id in pairs}
+
+    def _load_interview_log(self):
+        """Replays completed interviews from the append-only log."""
+        if not os.path.exists(self.log_file):
+            return
+        skipped = 0
+        try:
+            with open(self.log_file, 'r') as f:
+                for number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    # A corrupt or truncated line (e.g. from a crash mid-append) loses only that interview
+                    try:
+                        record = serialization.loads(line)
+                        self._ingest(record.get("evidence", []), record.get("triage_level", "unknown"))
+                    except (ValueError, AttributeError, KeyError, TypeError) as e:
+                        skipped += 1
+                        logger.warning("Skipping unreadable line %s of %s: %s", number, self.log_file, e)
+            logger.debug("Loaded %s interviews from %s (%s lines skipped)", self.interview_count, self.log_file, skipped)
+        except Exception as e:
+            logger.error("Error loading interview log from %s: %s", self.log_file, e)
+
+    def _encode(self, symptom_ids):
+        """Maps symptom IDs to integer codes, growing the counts array as new IDs appear."""
+        codes = np.empty(len(symptom_ids), dtype=np.int64)
+        for i, symptom_id in enumerate(symptom_ids):
+            code = self._symptom_codes.get(symptom_id)
+            if code is None:
+                code = len(self._symptom_ids)
+                self._symptom_codes[symptom_id] = code
+                self._symptom_ids.append(symptom_id)
+            codes[i] = code
+        if len(self._symptom_ids) > len(self._symptom_counts):
+            grown = np.zeros(max(len(self._symptom_ids), 2 * len(self._symptom_counts)), dtype=np.int64)
+            grown[:len(self._symptom_counts)] = self._symptom_counts
+            self._symptom_counts = grown
+        return codes
+
+    def _add_symptoms(self, evidence):
+        present = [e["id"] for e in evidence if e.get("choice_id") == "present"]
+        if present:
+            codes = self._encode(present)
+            np.add.at(self._symptom_counts, codes, 1)
+
+    def _ingest(self, evidence, triage_level):
+        self._add_symptoms(evidence)
+        level = triage_level if triage_level in TRIAGE_LEVELS else "unknown"
+        self._triage_counts[TRIAGE_LEVELS.index(level)] += 1
+        self.interview_count += 1
+
+    def record_interview(self, interview_id, evidence, triage_level):
+        """Folds a completed interview into the aggregates and appends it to the log."""
+        record = {"interview_id": interview_id, "evidence": evidence, "triage_level": triage_level}
+        with self._lock:
+            self._ingest(evidence, triage_level)
+            try:
+                with open(self.log_file, 'a') as f:
+                    f.write(serialization.dumps(record) + "\n")
+            except Exception as e:
+                logger.error("Error appending interview to %s: %s", self.log_file, e)
+
+    def symptom_frequency(self, top_n=10):
+        """Returns the most frequently reported symptoms as a name -> count Series."""
+        with self._lock:
+            n = len(self._symptom_ids)
+            counts = self._symptom_counts[:n].copy()
+            ids = list(self._symptom_ids)
+        if not n:
+            return pd.Series(dtype="int64")
+        top = np.argsort(counts)[::-1][:top_n]
+        top = top[counts[top] > 0]
+        names = [self.symptom_names.get(ids[i], ids[i]) for i in top]
+        return pd.Series(counts[top], index=names)
+
+    def triage_distribution(self):
+        """Returns the count of completed interviews per triage level."""
+        with self._lock:
+            return pd.Series(self._triage_counts.copy(), index=list(TRIAGE_LEVELS))
+
+    def heart_rate_trend(self, window=7, days=ChatConfig.CHART_HEART_RATE_DAYS, user_id=None):
+        """Returns daily resting heart rate alongside its rolling mean.
+
+        Reads the synced Fitbit history: one user's series, or the daily mean across users.
+        """
+        points = []
+        if self.history_store is not None:
+            start = (date.today() - timedelta(days=days)).isoformat()
+            if user_id:
+                points = self.history_store.series(user_id, "resting_heart_rate", start=start)
+            else:
+                points = self.history_store.daily_mean("resting_heart_rate", start=start)
+        series = pd.Series([value for _, value in points], index=pd.to_datetime([day for day, _ in points]), dtype="float64")
+        return pd.DataFrame({
+            "resting_heart_rate": series,
+            "rolling_mean": series.rolling(window, min_periods=1).mean()
+        })
+
+    def render_charts(self, output_dir=ChatConfig.CHART_DIR, user_id=None):
+        """Renders the report charts to PNG files without a display.
+
+        A chart with no data is skipped and reported as None instead of being written out blank.
+        """
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        def draw_symptoms(frequency):
+            fig, ax = plt.subplots(figsize=(8, 6))
+            ax.barh(frequency.index[::-1], frequency.values[::-1], color="#4a90e2")
+            ax.set_title("Symptom Distribution")
+            ax.set_xlabel("Reports")
+            return fig
+
+        def draw_triage(triage):
+            fig, ax = plt.subplots(figsize=(8, 6))
+            ax.bar(triage.index, triage.values, color=["#d9534f", "#f0ad4e", "#f7c873", "#5cb85c", "#999999"])
+            ax.set_title("Triage Outcomes")
+            ax.set_ylabel("Interviews")
+            return fig
+
+        def draw_trend(trend):
+            fig, ax = plt.subplots(figsize=(8, 6))
+            ax.plot(trend.index, trend["resting_heart_rate"], marker="o", label="Resting heart rate")
+            ax.plot(trend.index, trend["rolling_mean"], label="7-day average")
+            ax.set_title("Heart Rate Trend")
+            ax.set_ylabel("bpm")
+            ax.legend()
+            fig.autofmt_xdate()
+            return fig
+
+        frequency, triage, trend = self.symptom_frequency(), self.triage_distribution(), self.heart_rate_trend(user_id=user_id)
+        charts = (
+            ("symptom_distribution", frequency, not frequency.empty, draw_symptoms),
+            ("triage_outcomes", triage, bool(triage.any()), draw_triage),
+            ("heart_rate_trend", trend, not trend.empty, draw_trend),
+        )
+        os.makedirs(output_dir, exist_ok=True)
+        paths = {}
+        for name, data, has_data, render in charts:
+            if not has_data:
+                logger.info("No data for %s; chart skipped", name)
+                paths[name] = None
+                continue
+            fig = render(data)
+            fig.tight_layout()
+            paths[name] = os.path.join(output_dir, f"{name}.png")
+            fig.savefig(paths[name])
+            plt.close(fig)
+
+        logger.debug("Rendered analytics charts: %s", paths)
+        return paths
+
+
+if __name__ == '__main__':
+    from fitbit.store import FitbitHistoryStore
+    from utils.helpers import load_cached_symptoms
+    parser = argparse.ArgumentParser(description="Renders the report charts")
+    parser.add_argument("--output-dir", default=ChatConfig.CHART_DIR)
+    parser.add_argument("--user", help="plot this user's resting heart rate instead of the daily mean across users")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    engine = AnalyticsEngine(load_cached_symptoms(expiry=float("inf")), history_store=FitbitHistoryStore())
+    for name, path in engine.render_charts(args.output_dir, user_id=args.user).items():
+        print(f"{name}: {path or 'skipped, no data'}")
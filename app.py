@@ -1,182 +1,253 @@
 import logging
-from flask import Flask, render_template, session, redirect, url_for, request, jsonify, make_response
+from flask import Flask, render_template, session, redirect, url_for, request, jsonify
 from decouple import config
 from dotenv import load_dotenv
 from chatbot.routes import ChatRoutes
-from fitbit.fitbit import FitbitClient
-from chatbot.session_manager import SessionManager
-from chatbot.infermedica import InfermedicaClient
-from chatbot.nlp import NLPProcessor
-from utils.helpers import load_cached_symptoms
 from auth.auth import AuthManager
-from openai import OpenAI
-import httpx
+from chatbot.llm_scheduler import INSIGHT, get_llm_scheduler
+from chatbot.upstream import chat_completion
+from utils.assets import init_assets
+from utils.circuit_breaker import breaker_metrics
+from utils.compression import init_compression
+from utils.components import Components
+from utils.identity import forbidden, signed_in_user_id
+from utils.single_flight import single_flight_metrics
+from utils.logging_setup import setup_logging
+from utils.ops_access import ops_only
+from utils.profiling import init_profiling
+from utils.serialization import init_json
+from utils.session_store import init_session_store
+from utils.warmup import Warmup
 
 # Load environment-specific .env file
 load_dotenv()  # Load .env file
 
-app = Flask(__name__)
-app.secret_key = config("FLASK_SECRET_KEY")
-app.config['SESSION_TYPE'] = 'filesystem'
-
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging from LOG_LEVEL / LOG_PAYLOAD_SAMPLE_RATE
+setup_logging()
 logger = logging.getLogger(__name__)
 
-# Log the environment for debugging
-logger.debug(f"Environment: {config('ENVIRONMENT', default='development')}")
-
-# Load cached symptoms
-symptom_map = load_cached_symptoms()
-
-# Initialize components
-session_manager = SessionManager()
-infermedica_client = InfermedicaClient()
-nlp_processor = NLPProcessor()
-nlp_processor.load_symptom_map(symptom_map)
-fitbit_client = FitbitClient()
-
-# Initialize OpenAI client
-http_client = httpx.Client()
-openai_client = OpenAI(api_key=config("OPENAI_API_KEY"), http_client=http_client)
-
-# Setup authentication routes using AuthManager
-auth_manager = AuthManager(app)
-
-# Setup chat routes
-chat_routes = ChatRoutes(app, session_manager, infermedica_client, nlp_processor, fitbit_client, symptom_map)
-
-@app.route('/')
-def index():
-    return render_template('index.html')
-
-@app.route('/health_data', methods=['GET'])
-def health_data_get():
-    if 'auth0_user' not in session and 'fitbit_user' not in session:
-        return redirect(url_for('index'))
-    return render_template('health_data.html', user_id=session.get('user_id', 'default'))
-
-@app.route('/health_data', methods=['POST'])
-def health_data_post():
-    data = request.get_json()
-    user_id = data.get('user_id', 'default')
-    temperature = data.get('temperature')
-    blood_pressure_systolic = data.get('blood_pressure_systolic')
-    blood_pressure_diastolic = data.get('blood_pressure_diastolic')
-
-    # Store health data in session for use in diagnosis
-    user_session = session_manager.get_session(user_id)
-    if temperature:
-        user_session['manual_health_data'] = user_session.get('manual_health_data', {})
-        user_session['manual_health_data']['temperature'] = float(temperature)
-    if blood_pressure_systolic and blood_pressure_diastolic:
-        user_session['manual_health_data'] = user_session.get('manual_health_data', {})
-        user_session['manual_health_data']['blood_pressure'] = {
-            'systolic': int(blood_pressure_systolic),
-            'diastolic': int(blood_pressure_diastolic)
-        }
-
-    return jsonify({"message": "Health data submitted successfully."})
-
-@app.route('/edit_profile', methods=['GET'])
-def edit_profile_get():
-    if 'auth0_user' not in session and 'fitbit_user' not in session:
-        return redirect(url_for('index'))
-
-    user_id = session.get('user_id', 'default')
-    user_session = session_manager.get_session(user_id)
-    return render_template('edit_profile.html', user_id=user_id, age=user_session.get('age'), sex=user_session.get('sex'))
-
-@app.route('/edit_profile', methods=['POST'])
-def edit_profile_post():
-    data = request.get_json()
-    user_id = data.get('user_id', 'default')
-    age = int(data.get('age', 30))
-    sex = data.get('sex', 'male')
-
-    # Update session with new age and sex
-    user_session = session_manager.get_session(user_id)
-    user_session['age'] = age
-    user_session['sex'] = sex
-
-    return jsonify({"message": "Profile updated successfully."})
-
-@app.route('/fitbit_info')
-def fitbit_info():
-    if 'auth0_user' not in session and 'fitbit_user' not in session:
-        return redirect(url_for('index'))
-
-    smartwatch_data = None
-    insights = None
-    if 'fitbit_user' in session:
-        fitbit_client.set_access_token(session.get('access_token'))
-        fitbit_client.set_refresh_token(session.get('refresh_token'))
-        smartwatch_data = fitbit_client.get_basic_fitbit_data()  # Use basic data for fitbit_info page
-        if smartwatch_data and (smartwatch_data['sp02'] != 'N/A' or smartwatch_data['heart_rate'] != 'N/A'):
-            prompt = f"Analyze the following Fitbit data and provide health insights and improvement tips: SpO2: {smartwatch_data['sp02']}%, Heart Rate: {smartwatch_data['heart_rate']} bpm."
-            response = openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a health assistant providing insights based on Fitbit data."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=200
-            )
-            insights = response.choices[0].message.content.strip()
-
-    return render_template('fitbit_info.html', smartwatch_data=smartwatch_data, insights=insights)
-
-@app.route('/profile')
-def profile():
-    if 'auth0_user' not in session and 'fitbit_user' not in session:
-        return redirect(url_for('index'))
-
-    user_info = session.get('auth0_user', session.get('fitbit_user', {}))
-    return render_template('profile.html', user_info=user_info)
-
-@app.route('/health_dashboard')
-def health_dashboard():
-    if 'auth0_user' not in session and 'fitbit_user' not in session:
-        return redirect(url_for('index'))
-
-    user_id = session.get('user_id', 'default')
-    user_session = session_manager.get_session(user_id)
-    manual_health_data = user_session.get('manual_health_data', {})
-
-    smartwatch_data = None
-    steps_progress = 0
-    if 'fitbit_user' in session:
-        fitbit_client.set_access_token(session.get('access_token'))
-        fitbit_client.set_refresh_token(session.get('refresh_token'))
-        smartwatch_data = fitbit_client.get_all_fitbit_data()  # Use all data for health dashboard
-        # Calculate steps progress as a percentage of 10,000 steps
-        if smartwatch_data['steps'] != 'N/A':
-            steps_progress = round((int(smartwatch_data['steps']) / 10000 * 100), 2)
+
+def create_app(components=None):
+    """Builds the Flask app. Components are constructed lazily on the first request that needs them."""
+    app = Flask(__name__)
+    app.secret_key = config("FLASK_SECRET_KEY")
+
+    # Server-side sessions: the cookie carries only a signed session ID
+    init_session_store(app)
+
+    # orjson-backed jsonify, and gzip/brotli for large responses
+    init_json(app)
+    init_compression(app)
+
+    # Fingerprinted, precompressed assets built by `python -m utils.assets`
+    if config("SERVE_BUILT_ASSETS", default=False, cast=bool):
+        init_assets(app)
+
+    # Flamegraphs for sampled or X-Profile-signed requests; no hooks unless configured
+    init_profiling(app)
+
+    # Log the environment for debugging
+    logger.debug("Environment: %s", config('ENVIRONMENT', default='development'))
+
+    components = components or Components()
+    app.extensions['components'] = components
+
+    # Setup authentication routes using AuthManager
+    AuthManager(app)
+
+    # Setup chat routes
+    ChatRoutes(app, components)
+
+    register_routes(app, components)
+
+    # /readyz stays 503 until templates, components and upstream connections are warm
+    warmup = Warmup(app, components)
+    app.extensions['warmup'] = warmup
+    if config("WARMUP", default=True, cast=bool):
+        warmup.start()
     else:
-        smartwatch_data = {
-            "sp02": "N/A",
-            "heart_rate": "N/A",
-            "heart_rate_zones": {
-                "out_of_range": {"caloriesOut": "N/A", "minutes": "N/A"},
-                "fat_burn": {"caloriesOut": "N/A", "minutes": "N/A"},
-                "cardio": {"caloriesOut": "N/A", "minutes": "N/A"},
-                "peak": {"caloriesOut": "N/A", "minutes": "N/A"}
-            },
-            "steps": "N/A",
-            "distance": "N/A",
-            "calories": "N/A",
-            "active_minutes": "N/A",
-            "floors": "N/A",
-            "sleep_duration": "N/A",
-            "sleep_stages": {"light": "N/A", "deep": "N/A", "rem": "N/A", "wake": "N/A"},
-            "weight": "N/A",
-            "bmi": "N/A",
-            "body_fat": "N/A",
-            "water": "N/A",
-            "calories_in": "N/A"
-        }
-
-    return render_template('health_dashboard.html', smartwatch_data=smartwatch_data, manual_health_data=manual_health_data, steps_progress=steps_progress)
+        warmup.skip()
+    return app
+
+
+def register_routes(app, components):
+    @app.route('/')
+    def index():
+        return render_template('index.html')
+
+    @app.route('/health_data', methods=['GET'])
+    def health_data_get():
+        if 'auth0_user' not in session and 'fitbit_user' not in session:
+            return redirect(url_for('index'))
+        return render_template('health_data.html', user_id=session.get('user_id', 'default'))
+
+    @app.route('/health_data', methods=['POST'])
+    def health_data_post():
+        data = request.get_json(silent=True) or {}
+        # Vitals feed this user's diagnosis evidence, so only the signed-in user may add them
+        user_id = signed_in_user_id(data)
+        if user_id is None:
+            return forbidden()
+        temperature = data.get('temperature')
+        blood_pressure_systolic = data.get('blood_pressure_systolic')
+        blood_pressure_diastolic = data.get('blood_pressure_diastolic')
+
+        # Append to the persistent vitals log; diagnosis and the dashboard read its rollups
+        readings = {}
+        try:
+            if temperature:
+                readings['temperature'] = float(temperature)
+            if blood_pressure_systolic and blood_pressure_diastolic:
+                readings['systolic'] = int(blood_pressure_systolic)
+                readings['diastolic'] = int(blood_pressure_diastolic)
+            components.vitals_log.record(user_id, readings)
+        except (TypeError, ValueError) as e:
+            return jsonify({"message": f"Invalid health data: {e}"}), 400
+
+        return jsonify({"message": "Health data submitted successfully."})
+
+    @app.route('/edit_profile', methods=['GET'])
+    def edit_profile_get():
+        if 'auth0_user' not in session and 'fitbit_user' not in session:
+            return redirect(url_for('index'))
+
+        user_id = session.get('user_id', 'default')
+        user_session = components.session_manager.get_session(user_id)
+        return render_template('edit_profile.html', user_id=user_id, age=user_session.age, sex=user_session.sex)
+
+    @app.route('/edit_profile', methods=['POST'])
+    def edit_profile_post():
+        data = request.get_json(silent=True) or {}
+        user_id = signed_in_user_id(data)
+        if user_id is None:
+            return forbidden()
+        age = int(data.get('age', 30))
+        sex = data.get('sex', 'male')
+
+        # Update session with new age and sex
+        with components.session_manager.lock(user_id):
+            user_session = components.session_manager.get_session(user_id)
+            user_session.set_profile(age, sex)
+
+        return jsonify({"message": "Profile updated successfully."})
+
+    @app.route('/fitbit_info')
+    def fitbit_info():
+        if 'auth0_user' not in session and 'fitbit_user' not in session:
+            return redirect(url_for('index'))
+
+        smartwatch_data = None
+        insights = None
+        if 'fitbit_user' in session:
+            smartwatch_data = components.fitbit_client.get_basic_fitbit_data(components.fitbit_client.credentials_for(session))  # Use basic data for fitbit_info page
+            if smartwatch_data and (smartwatch_data['sp02'] != 'N/A' or smartwatch_data['heart_rate'] != 'N/A'):
+                prompt = f"Analyze the following Fitbit data and provide health insights and improvement tips: SpO2: {smartwatch_data['sp02']}%, Heart Rate: {smartwatch_data['heart_rate']} bpm."
+                try:
+                    response = chat_completion(
+                        components.openai_client,
+                        priority=INSIGHT,
+                        model="gpt-3.5-turbo",
+                        messages=[
+                            {"role": "system", "content": "You are a health assistant providing insights based on Fitbit data."},
+                            {"role": "user", "content": prompt}
+                        ],
+                        max_tokens=200
+                    )
+                    insights = response.choices[0].message.content.strip()
+                except Exception as e:
+                    logger.error("Fitbit insights unavailable: %s", e)
+
+        return render_template('fitbit_info.html', smartwatch_data=smartwatch_data, insights=insights)
+
+    @app.route('/fitbit/history/<metric>')
+    def fitbit_history(metric):
+        if 'fitbit_user' not in session:
+            return jsonify({"error": "Fitbit login required"}), 401
+
+        # Served from the local history store; no Fitbit API calls
+        history = components.fitbit_client.get_history(session.get('user_id', 'default'), metric, days=request.args.get('days', 30, type=int))
+        return jsonify({"metric": metric, "history": history, "latest": history[-1] if history else None})
+
+    @app.route('/fitbit/sync_stats')
+    def fitbit_sync_stats():
+        if 'fitbit_user' not in session:
+            return jsonify({"error": "Fitbit login required"}), 401
+        return jsonify(components.fitbit_client.get_sync_stats(session.get('user_id', 'default')))
+
+    @app.route('/healthz')
+    def healthz():
+        # Liveness only: the process is up and serving
+        return jsonify({"status": "ok"})
+
+    @app.route('/readyz')
+    def readyz():
+        warmup = app.extensions['warmup']
+        if not warmup.ready:
+            response = jsonify(warmup.snapshot())
+            response.headers['Retry-After'] = '1'
+            return response, 503
+        return jsonify(warmup.snapshot())
+
+    @app.route('/metrics')
+    @ops_only
+    def metrics():
+        # Per-process: each worker reports its own breakers
+        return jsonify({"circuit_breakers": breaker_metrics(), "single_flight": single_flight_metrics(),
+                        "llm_scheduler": get_llm_scheduler().snapshot(),
+                        "speculation": components.speculator.snapshot() if components.speculator else None,
+                        "feedback": components.feedback_pipeline.snapshot()})
+
+    @app.route('/profile')
+    def profile():
+        if 'auth0_user' not in session and 'fitbit_user' not in session:
+            return redirect(url_for('index'))
+
+        user_info = session.get('auth0_user', session.get('fitbit_user', {}))
+        return render_template('profile.html', user_info=user_info)
+
+    @app.route('/health_dashboard')
+    def health_dashboard():
+        if 'auth0_user' not in session and 'fitbit_user' not in session:
+            return redirect(url_for('index'))
+
+        user_id = session.get('user_id', 'default')
+        vitals = components.vitals_log.summary(user_id)
+
+        smartwatch_data = None
+        steps_progress = 0
+        if 'fitbit_user' in session:
+            smartwatch_data = components.fitbit_client.get_all_fitbit_data(components.fitbit_client.credentials_for(session))  # Use all data for health dashboard
+            # Calculate steps progress as a percentage of 10,000 steps
+            if smartwatch_data['steps'] != 'N/A':
+                steps_progress = round((int(smartwatch_data['steps']) / 10000 * 100), 2)
+        else:
+            smartwatch_data = {
+                "sp02": "N/A",
+                "heart_rate": "N/A",
+                "heart_rate_zones": {
+                    "out_of_range": {"caloriesOut": "N/A", "minutes": "N/A"},
+                    "fat_burn": {"caloriesOut": "N/A", "minutes": "N/A"},
+                    "cardio": {"caloriesOut": "N/A", "minutes": "N/A"},
+                    "peak": {"caloriesOut": "N/A", "minutes": "N/A"}
+                },
+                "steps": "N/A",
+                "distance": "N/A",
+                "calories": "N/A",
+                "active_minutes": "N/A",
+                "floors": "N/A",
+                "sleep_duration": "N/A",
+                "sleep_stages": {"light": "N/A", "deep": "N/A", "rem": "N/A", "wake": "N/A"},
+                "weight": "N/A",
+                "bmi": "N/A",
+                "body_fat": "N/A",
+                "water": "N/A",
+                "calories_in": "N/A"
+            }
+
+        return render_template('health_dashboard.html', smartwatch_data=smartwatch_data, vitals=vitals, steps_progress=steps_progress)
+
+
+app = create_app()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000, debug=True)
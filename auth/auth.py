@@ -1,7 +1,6 @@
 import os
 import logging
 from flask import session, redirect, url_for, request, jsonify
-from auth0.authentication import GetToken, Social
 import requests
 import secrets
 import hashlib
@@ -21,10 +20,12 @@ class AuthManager:
         self.fitbit_auth_url = "https://www.fitbit.com/oauth2/authorize"
         self.fitbit_token_url = "https://api.fitbit.com/oauth2/token"
         self.fitbit_api_url = "https://api.fitbit.com/1/user/-/"
+        self.jwks_cache_ttl = config("AUTH0_JWKS_CACHE_TTL", default=3600, cast=int)
+        self._identity_verifier = None
 
         # Determine the environment
         self.environment = config("ENVIRONMENT", default="development")
-        logger.debug(f"AuthManager Environment: {self.environment}")
+        logger.debug("AuthManager Environment: %s", self.environment)
 
         # Load redirect URLs from .env
         self.auth0_callback_url = config("AUTH0_CALLBACK_URL", default="http://127.0.0.1:5000/auth0/callback")
@@ -35,8 +36,8 @@ class AuthManager:
             self.auth0_callback_url = "https://healthsync-ai-chatbot.onrender.com/auth0/callback"
             self.fitbit_redirect_uri = "https://healthsync-ai-chatbot.onrender.com/callback"
 
-        logger.debug(f"Selected Auth0 Callback URL: {self.auth0_callback_url}")
-        logger.debug(f"Selected Fitbit Redirect URI: {self.fitbit_redirect_uri}")
+        logger.debug("Selected Auth0 Callback URL: %s", self.auth0_callback_url)
+        logger.debug("Selected Fitbit Redirect URI: %s", self.fitbit_redirect_uri)
 
         self.app.route('/auth0/login')(self.auth0_login)
         self.app.route('/auth0/callback')(self.auth0_callback)
@@ -53,6 +54,13 @@ class AuthManager:
         state = secrets.token_urlsafe(16)
         return code_verifier, code_challenge, state
 
+    def identity_verifier(self):
+        # Deferred like GetToken: PyJWT/cryptography are only needed once someone logs in with Auth0
+        if self._identity_verifier is None:
+            from auth.identity import IdentityVerifier
+            self._identity_verifier = IdentityVerifier(self.auth0_domain, self.auth0_client_id, jwks_ttl=self.jwks_cache_ttl)
+        return self._identity_verifier
+
     def auth0_login(self):
         return redirect(
             f"https://{self.auth0_domain}/authorize?response_type=code&client_id={self.auth0_client_id}&redirect_uri={self.auth0_callback_url}&scope=openid%20profile%20email"
@@ -63,14 +71,26 @@ class AuthManager:
         if not code:
             return jsonify({"error": "Authorization code not found"}), 400
 
+        from auth0.authentication import GetToken  # Deferred: only the Auth0 login callback needs it
+
         token_client = GetToken(self.auth0_domain, self.auth0_client_id, client_secret=self.auth0_client_secret)
         token_response = token_client.authorization_code(code, redirect_uri=self.auth0_callback_url)
 
-        session['auth0_user'] = token_response['id_token']
+        import jwt
+        verifier = self.identity_verifier()
+        try:
+            claims = verifier.verify(token_response['id_token'])
+        except jwt.PyJWTError as e:
+            logger.error("Auth0 ID token verification failed: %s", e)
+            return jsonify({"error": "Invalid ID token"}), 401
+
+        # Keep the verified profile, not the raw token; `sub` is the stable per-user ID
+        profile = verifier.profile(claims)
+        session['auth0_user'] = profile
         session['access_token'] = token_response['access_token']
-        session['user_id'] = token_response.get('sub', 'default')  # Store user_id for session management
+        session['user_id'] = profile['user_id']  # Store user_id for session management
         session.modified = True
-        logger.debug(f"Auth0 Session: {dict(session)}")
+        logger.debug("Auth0 login for user_id: %s", profile['user_id'])
         return redirect(url_for('chat_get'))
 
     def auth0_logout(self):
@@ -79,7 +99,7 @@ class AuthManager:
         # Redirect to Auth0 logout endpoint with federated parameter to clear SSO session
         return_to = url_for('index', _external=True)
         logout_url = f"https://{self.auth0_domain}/v2/logout?client_id={self.auth0_client_id}&returnTo={return_to}&federated"
-        logger.debug(f"Auth0 Logout URL: {logout_url}")
+        logger.debug("Auth0 Logout URL: %s", logout_url)
         return redirect(logout_url)
 
     def fitbit_login(self):
@@ -98,7 +118,7 @@ class AuthManager:
         }
 
         auth_url = f"{self.fitbit_auth_url}?" + "&".join(f"{k}={requests.utils.quote(v)}" for k, v in params.items())
-        logger.debug(f"Fitbit Authorization URL: {auth_url}")
+        logger.debug("Fitbit Authorization URL: %s", auth_url)
         return redirect(auth_url)
 
     def callback(self):
@@ -106,7 +126,7 @@ class AuthManager:
         state = request.args.get('state')
 
         if not code or state != session.get('state'):
-            logger.error(f"Authorization failed: Invalid state or code. Code: {code}, State: {state}, Session State: {session.get('state')}")
+            logger.error("Authorization failed: Invalid state or code. Code: %s, State: %s, Session State: %s", code, state, session.get('state'))
             return "Authorization failed: Invalid state or code.", 400
 
         auth_header = base64.b64encode(f"{self.fitbit_client_id}:{self.fitbit_client_secret}".encode()).decode()
@@ -122,18 +142,18 @@ class AuthManager:
         )
 
         if token_response.status_code != 200:
-            logger.error(f"Token exchange failed: {token_response.text}")
+            logger.error("Token exchange failed: %s", token_response.text)
             return f"Token exchange failed: {token_response.text}", 400
 
         token_data = token_response.json()
-        logger.debug(f"✅ Scopes: {token_data.get('scope')}")
+        logger.debug("✅ Scopes: %s", token_data.get('scope'))
 
         session['fitbit_user'] = True
         session['access_token'] = token_data['access_token']
         session['refresh_token'] = token_data.get('refresh_token')
         session['user_id'] = token_data.get('user_id', 'default')  # Store user_id for session management
         session.modified = True
-        logger.debug(f"✅ Session after saving token: {session}")
+        logger.debug("✅ Session keys after saving token: %s", sorted(session.keys()))
 
         return redirect(url_for('chat_get'))
 
@@ -0,0 +1,39 @@
+import logging
+import jwt
+
+logger = logging.getLogger(__name__)
+
+# Claims kept in the session; everything else in the ID token is dropped after login
+PROFILE_CLAIMS = ("email", "email_verified", "name", "nickname", "picture")
+
+
+class IdentityVerifier:
+    """Verifies Auth0 ID tokens locally against the tenant's JWKS, which is fetched once per TTL."""
+
+    def __init__(self, domain, client_id, jwks_ttl=3600, leeway=60):
+        self.issuer = f"https://{domain}/"
+        self.client_id = client_id
+        self.leeway = leeway
+        self.jwks_client = jwt.PyJWKClient(
+            f"https://{domain}/.well-known/jwks.json", cache_jwk_set=True, lifespan=jwks_ttl, cache_keys=True, timeout=10
+        )
+
+    def verify(self, id_token):
+        """Returns the token's claims; raises jwt.PyJWTError if the signature, audience, issuer or expiry is invalid."""
+        signing_key = self.jwks_client.get_signing_key_from_jwt(id_token)
+        return jwt.decode(
+            id_token,
+            signing_key.key,
+            algorithms=["RS256"],
+            audience=self.client_id,
+            issuer=self.issuer,
+            leeway=self.leeway,
+            options={"require": ["sub", "exp", "iat"]}
+        )
+
+    @staticmethod
+    def profile(claims):
+        """Builds the compact per-user record stored in the session."""
+        record = {"user_id": claims["sub"]}
+        record.update({claim: claims[claim] for claim in PROFILE_CLAIMS if claim in claims})
+        return record
@@ -0,0 +1,43 @@
+"""How many typical free-text answers the local parsers resolve without an LLM call.
+
+    python -m benchmarks.answer_coverage
+"""
+import time
+from chatbot.answers import duration_evidence, parse_duration, understand_answer
+from chatbot.text import NormalizedText
+
+DURATION_ITEMS = [
+    {"id": "p_short", "name": "Less than 24 hours"},
+    {"id": "p_week", "name": "Between 1 and 7 days"},
+    {"id": "p_long", "name": "More than 7 days"},
+]
+DURATION_ANSWERS = (
+    "3 days", "about a week", "a couple of days", "two or three weeks", "since yesterday", "since last week",
+    "just this morning", "half an hour", "for 2-3 months", "since monday", "a few hours", "over a year",
+    "several days now", "since last night", "ages", "i can't remember",
+)
+ITEMS = [{"id": "s_1", "name": "Swelling"}, {"id": "s_2", "name": "Redness"}, {"id": "s_3", "name": "Itching"}]
+SINGLE = [{"id": "s_98", "name": "Fever"}]
+FREE_TEXT_ANSWERS = (
+    (ITEMS, "I don't have swelling but there is some redness"), (ITEMS, "no swelling, no itching"),
+    (ITEMS, "there is redness and swelling"), (ITEMS, "itching mostly"), (ITEMS, "none of those"),
+    (SINGLE, "yes a little"), (SINGLE, "nope"), (SINGLE, "not sure"), (SINGLE, "I don't think I have a fever"),
+    (SINGLE, "yeah since yesterday"), (SINGLE, "I have a fever"), (SINGLE, "kind of warm I guess"),
+)
+
+
+if __name__ == '__main__':
+    started = time.perf_counter()
+    duration_hits = sum(parse_duration(NormalizedText(answer)) is not None for answer in DURATION_ANSWERS)
+    for answer in DURATION_ANSWERS:
+        hours = parse_duration(answer)
+        print(f"  {answer!r:32} -> {duration_evidence(hours, DURATION_ITEMS) if hours is not None else 'LLM'}")
+    free_text_hits = 0
+    for items, answer in FREE_TEXT_ANSWERS:
+        evidence = understand_answer(NormalizedText(answer), items)
+        free_text_hits += bool(evidence)
+        print(f"  {answer!r:52} -> {evidence or 'LLM'}")
+    elapsed = (time.perf_counter() - started) * 1e3
+    total = len(DURATION_ANSWERS) + len(FREE_TEXT_ANSWERS)
+    print(f"duration: {duration_hits}/{len(DURATION_ANSWERS)}, free text: {free_text_hits}/{len(FREE_TEXT_ANSWERS)} "
+          f"resolved locally ({(duration_hits + free_text_hits) / total * 100:.0f}%), {elapsed:.1f} ms total")
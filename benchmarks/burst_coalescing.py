@@ -0,0 +1,89 @@
+"""Burst test for upstream request coalescing.
+
+Many users send the same first message at once. Upstreams are replaced by stubs with
+fixed latency. The test drives the real NLPProcessor / InfermedicaClient code paths
+from concurrent threads, then reports how many upstream calls were made and how many
+were coalesced.
+
+    python -m benchmarks.burst_coalescing --users 50 --latency 0.3
+"""
+import argparse
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from chatbot.infermedica import InfermedicaClient
+from chatbot.nlp import NLPProcessor
+from utils.http_pool import get_http_session
+from utils.single_flight import single_flight_metrics
+
+MESSAGES = ("headache", "fever", "headache", "sore throat", "fever", "headache")
+
+
+class StubResponse:
+    status_code = 200
+    text = ""
+    url = ""
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+def stub_post(latency, counter):
+    def post(url, json=None, **kwargs):
+        counter["infermedica"] += 1
+        time.sleep(latency)
+        if url.endswith("/parse"):
+            return StubResponse({"mentions": [{"id": "s_21", "choice_id": "present"}]})
+        return StubResponse({"question": {"type": "single", "text": "Do you have a fever?", "items": []}, "conditions": []})
+    return post
+
+
+def stub_openai(latency, counter):
+    def create(**kwargs):
+        counter["openai"] += 1
+        time.sleep(latency)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="medical"))])
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def run(users, latency):
+    counter = {"infermedica": 0, "openai": 0}
+    get_http_session("infermedica").post = stub_post(latency, counter)
+    openai_client = stub_openai(latency, counter)
+    nlp = NLPProcessor(openai_client)
+    infermedica = InfermedicaClient(openai_client)
+    barrier = threading.Barrier(users)
+
+    def first_turn(i):
+        text = MESSAGES[i % len(MESSAGES)]
+        barrier.wait()
+        nlp.classify_intent(text)
+        evidence = nlp.parse_symptoms_infermedica(text)
+        infermedica.get_diagnosis(evidence, interview_id=str(uuid.uuid4()))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=first_turn, args=(i,)) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    requested = users * 3
+    made = counter["infermedica"] + counter["openai"]
+    print(f"{users} concurrent first turns in {elapsed:.2f}s")
+    print(f"upstream calls requested: {requested}, made: {made} ({(1 - made / requested) * 100:.0f}% deduplicated)")
+    for name, stats in single_flight_metrics().items():
+        print(f"  {name}: {stats}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+    run(args.users, args.latency)
@@ -0,0 +1,81 @@
+"""Cold-start benchmark: import time and time-to-first-request.
+
+Each measurement runs in a fresh interpreter so module caches don't hide the cost.
+Import time comes from `python -X importtime`; time-to-first-request is measured
+from interpreter start to the first response served by the app.
+
+    python -m benchmarks.cold_start --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Placeholder credentials so the app can be imported without a .env file
+DUMMY_ENV = {
+    "FLASK_SECRET_KEY": "benchmark", "FITBIT_CLIENT_ID": "x", "FITBIT_CLIENT_SECRET": "x",
+    "AUTH0_DOMAIN": "example.auth0.com", "AUTH0_CLIENT_ID": "x", "AUTH0_CLIENT_SECRET": "x",
+    "OPENAI_API_KEY": "x", "INFERMEDICA_APP_ID": "x", "INFERMEDICA_APP_KEY": "x",
+    # Harnesses build their own components; benchmarks.warmup measures warm-up itself
+    "WARMUP": "false"
+}
+
+FIRST_REQUEST_SCRIPT = """
+import time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get('/')
+served = time.perf_counter()
+components = app.app.extensions['components']
+components.nlp_processor, components.infermedica_client, components.session_manager
+built = time.perf_counter()
+print(response.status_code, imported - started, served - started, built - served)
+"""
+
+
+def _run(args):
+    env = {**DUMMY_ENV, **os.environ}
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.run([sys.executable, *args], cwd=root, env=env, capture_output=True, text=True, check=True)
+
+
+def import_profile():
+    """Returns (total import time of `app` in ms, [(cumulative ms, module), ...] sorted by cost)."""
+    stderr = _run(["-X", "importtime", "-c", "import app"]).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((int(cumulative) / 1000, name.rstrip()))
+    total = next(ms for ms, name in modules if name.strip() == "app")
+    # Nesting is two spaces per level after the column separator's own space
+    top_level = [(ms, name.strip()) for ms, name in modules if name.startswith("   ") and not name.startswith("     ")]
+    return total, sorted(top_level, reverse=True)
+
+
+def first_request():
+    """Returns (status, import s, time-to-first-request s, deferred component build s)."""
+    status, imported, served, built = _run(["-c", FIRST_REQUEST_SCRIPT]).stdout.split()[-4:]
+    return int(status), float(imported), float(served), float(built)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    totals, profile = [], None
+    for _ in range(args.runs):
+        total, profile = import_profile()
+        totals.append(total)
+    print(f"import app: median {statistics.median(totals):.1f} ms over {args.runs} runs")
+    print("heaviest direct imports (last run):")
+    for ms, name in profile[:8]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    results = [first_request() for _ in range(args.runs)]
+    print(f"time-to-first-request: median {statistics.median(r[2] for r in results) * 1000:.1f} ms (status {results[-1][0]})")
+    print(f"deferred component build on first chat: median {statistics.median(r[3] for r in results) * 1000:.1f} ms")
@@ -0,0 +1,115 @@
+"""Feedback ingestion: writing each submission synchronously vs queueing it for the batch writer.
+
+`--threads` request threads each submit `--per-thread` feedback records, linked to
+interviews whose outcomes were recorded first. The synchronous sink commits one SQLite
+transaction per submission on the request thread. The pipeline only enqueues, and its writer
+commits in batches. Reports request-side latency, the time until everything is on disk, and
+feedback refused when the queue is full. Then it compares the stats read from the daily
+counters with the same aggregate computed by scanning the feedback table.
+
+    python -m benchmarks.feedback_ingest --threads 16 --per-thread 500 --queue-size 1000
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from chatbot.feedback import FEEDBACK, FeedbackPipeline, FeedbackStore
+
+TRIAGE_LEVELS = ("self_care", "consultation", "consultation_24", "emergency")
+
+
+def store_with_outcomes(interviews):
+    store = FeedbackStore(os.path.join(tempfile.mkdtemp(), "feedback.db"))
+    pipeline = FeedbackPipeline(store, maxsize=interviews + 1)
+    for n in range(interviews):
+        pipeline.record_outcome(f"iv{n}", f"user{n}", [{"id": "s_21", "choice_id": "present"}], TRIAGE_LEVELS[n % 4])
+    pipeline.close()
+    return store
+
+
+def hammer(submit, threads, per_thread):
+    """Runs `submit(user_id, interview_id)` from many threads; returns (latencies, refused, seconds)."""
+    latencies, refused, lock = [], [0], threading.Lock()
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(t):
+        own = []
+        barrier.wait()
+        for i in range(per_thread):
+            n = t * per_thread + i
+            started = time.perf_counter()
+            accepted = submit(f"user{n}", f"iv{n}")
+            own.append(time.perf_counter() - started)
+            if accepted is False:
+                with lock:
+                    refused[0] += 1
+        with lock:
+            latencies.extend(own)
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return sorted(latencies), refused[0], time.perf_counter() - started
+
+
+def report(label, latencies, refused, submitted_in, drained_in):
+    count = len(latencies)
+    print(f"{label:<22}{statistics.median(latencies) * 1e6:>9.0f}{latencies[int(count * 0.99)] * 1e6:>9.0f}"
+          f"{submitted_in:>12.2f}{drained_in:>10.2f}{refused:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--per-thread", type=int, default=500)
+    parser.add_argument("--queue-size", type=int, default=1000)
+    args = parser.parse_args()
+    # Refusals are counted in the table; one warning each would drown it
+    logging.getLogger("chatbot.feedback").setLevel(logging.ERROR)
+    total = args.threads * args.per_thread
+
+    print(f"{'sink':<22}{'p50 us':>9}{'p99 us':>9}{'submit s':>12}{'on disk s':>10}{'refused':>9}")
+    store = store_with_outcomes(total)
+
+    def synchronous(user_id, interview_id):
+        store.write_batch([(FEEDBACK, {"user_id": user_id, "interview_id": interview_id, "ts": time.time(),
+                                       "rating": 4, "comment": "Helpful", "evidence": None})])
+
+    latencies, refused, elapsed = hammer(synchronous, args.threads, args.per_thread)
+    report("synchronous insert", latencies, refused, elapsed, elapsed)
+
+    for label, maxsize in (("queued", args.queue_size), ("queued, tiny queue", max(1, args.queue_size // 100))):
+        pipeline = FeedbackPipeline(store_with_outcomes(total), maxsize=maxsize)
+        latencies, refused, elapsed = hammer(
+            lambda user_id, interview_id: pipeline.submit(user_id, interview_id, comment="Helpful", rating=4),
+            args.threads, args.per_thread)
+        started = time.perf_counter()
+        pipeline.close()
+        report(label, latencies, refused, elapsed, elapsed + time.perf_counter() - started)
+        stats_store = pipeline.store
+
+    def scan():
+        with sqlite3.connect(stats_store.db_file) as conn:
+            return conn.execute(
+                "SELECT date(ts, 'unixepoch'), triage_level, count(*), count(rating), sum(rating) FROM feedback GROUP BY 1, 2"
+            ).fetchall()
+
+    for label, fn in (("stats from counters", stats_store.stats), ("scan feedback rows", scan)):
+        timings = []
+        for _ in range(20):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        print(f"{label:<22}{statistics.median(timings) * 1e6:>9.0f} us")
+
+
+if __name__ == "__main__":
+    main()
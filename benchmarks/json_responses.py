@@ -0,0 +1,104 @@
+"""JSON serialization CPU (stdlib vs orjson) and response bytes per endpoint (identity vs gzip/brotli).
+
+Payloads are shaped like the real ones: `/symptoms` from the cached catalog, a `/chat`
+follow-up turn with its smartwatch data, the `/health_data` acknowledgement, `/metrics`
+with a few breakers, and `sessions.json` holding many in-progress interviews.
+
+    python -m benchmarks.json_responses --iterations 2000 --sessions 500
+"""
+import argparse
+import json
+import time
+import uuid
+from flask import Flask, jsonify
+from chatbot.config import ChatConfig
+from utils import serialization
+from utils.compression import COMPRESSORS, init_compression
+from utils.serialization import init_json
+
+
+def payloads(session_count):
+    with open(ChatConfig.CACHE_FILE, "rb") as f:
+        symptoms = {"symptoms": [name for name, _ in serialization.load(f)]}
+    chat = {
+        "message": "Possible conditions:<br>- Common cold (62.1%)<br>- Influenza (21.4%)<br>Recommendation: self care",
+        "follow_up": {
+            "text": "How long have you had a headache?", "type": "single",
+            "options": ["Less than a day", "1 to 3 days", "4 to 7 days", "More than a week", "Don't know"],
+            "ui_hint": "dropdown", "is_binary": False,
+        },
+        "smartwatch_data": {"sp02": 97.2, "heart_rate": 61},
+        "error_message": None,
+        "user_input": "I have a headache and a mild fever since yesterday",
+    }
+    health_data = {"message": "Health data submitted successfully."}
+    breaker = {"state": "closed", "calls": 20, "failures": 1, "slow_calls": 0, "opened": 0}
+    metrics = {
+        "circuit_breakers": {name: breaker for name in ("infermedica", "openai", "fitbit")},
+        "single_flight": {name: {"upstream_calls": 1200, "coalesced": 340, "in_flight": 2} for name in ("infermedica", "openai")},
+    }
+    sessions = {
+        f"user{i}": {
+            "interview_id": str(uuid.uuid4()),
+            "evidence": [{"id": f"s_{n}", "choice_id": "present", "source": "initial"} for n in range(8)],
+            "last_question": {"text": "Do you have a fever?", "items": [{"id": "s_98", "name": "Fever"}]},
+            "last_question_index": None, "question_count": 4, "last_activity": 1742555540.52, "age": 34, "sex": "female",
+        }
+        for i in range(session_count)
+    }
+    return {"/symptoms": symptoms, "/chat": chat, "/health_data": health_data, "/metrics": metrics, "sessions.json": sessions}
+
+
+def per_call_us(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def serialization_cpu(data, iterations):
+    print(f"{'payload':<14}{'bytes':>9}{'json dumps':>12}{'orjson dumps':>14}{'json loads':>12}{'orjson loads':>14}   (µs per call)")
+    for name, obj in data.items():
+        # The stdlib provider's jsonify settings: sorted keys, ASCII-escaped
+        encoded = json.dumps(obj, sort_keys=True, separators=(",", ":"))
+        print(
+            f"{name:<14}{len(encoded):>9}"
+            f"{per_call_us(lambda: json.dumps(obj, sort_keys=True, separators=(',', ':')), iterations):>12.1f}"
+            f"{per_call_us(lambda: serialization.dumpb(obj), iterations):>14.1f}"
+            f"{per_call_us(lambda: json.loads(encoded), iterations):>12.1f}"
+            f"{per_call_us(lambda: serialization.loads(encoded), iterations):>14.1f}"
+        )
+
+
+def response_bytes(data):
+    app = Flask(__name__)
+    init_json(app)
+    init_compression(app)
+    for path, obj in data.items():
+        if path.startswith("/"):
+            app.add_url_rule(path, path, lambda obj=obj: jsonify(obj))
+
+    client = app.test_client()
+    encodings = [None, *COMPRESSORS]
+    print(f"{'endpoint':<14}" + "".join(f"{encoding or 'identity':>10}" for encoding in encodings))
+    for path in data:
+        if path.startswith("/"):
+            sizes = [len(client.get(path, headers={"Accept-Encoding": encoding} if encoding else {}).data) for encoding in encodings]
+            print(f"{path:<14}" + "".join(f"{size:>10}" for size in sizes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=500)
+    args = parser.parse_args()
+
+    data = payloads(args.sessions)
+    print(f"Serializer backend: {serialization.BACKEND}\n")
+    serialization_cpu(data, args.iterations)
+    print()
+    response_bytes(data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""OpenAI calls under overload: firing immediately vs through the RPM/TPM scheduler.
+
+A fake OpenAI enforces the account's per-minute limits over a sliding window and
+answers 429 past them. Calls arrive open-loop at `--load` times the RPM limit, mixed
+like production: mostly triage, some small talk and Fitbit insights.
+
+    python -m benchmarks.llm_scheduler --rpm 600 --seconds 60 --load 1.5
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from chatbot.llm_scheduler import INSIGHT, PRIORITY_NAMES, SMALL_TALK, TRIAGE, LLMBusyError, LLMScheduler
+
+MIX = (TRIAGE,) * 12 + (SMALL_TALK,) * 5 + (INSIGHT,) * 3
+TOKENS = {TRIAGE: 120, INSIGHT: 320, SMALL_TALK: 200}
+LATENCY = 0.15
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class FakeOpenAI:
+    """Sliding-window RPM/TPM enforcement; a window under 60s models limits enforced in slices."""
+
+    def __init__(self, rpm, tpm, window):
+        self.window = window
+        self.max_requests = rpm * window / 60
+        self.max_tokens = tpm * window / 60
+        self.calls = deque()
+        self.lock = threading.Lock()
+
+    def create(self, tokens):
+        now = time.monotonic()
+        with self.lock:
+            while self.calls and self.calls[0][0] < now - self.window:
+                self.calls.popleft()
+            if len(self.calls) + 1 > self.max_requests or sum(t for _, t in self.calls) + tokens > self.max_tokens:
+                raise RateLimited()
+            self.calls.append((now, tokens))
+        time.sleep(LATENCY)
+
+
+def run(rpm, tpm, window, seconds, load, scheduler):
+    upstream = FakeOpenAI(rpm, tpm, window)
+    outcomes = defaultdict(lambda: defaultdict(int))
+    latencies = defaultdict(list)
+    lock = threading.Lock()
+    rng = random.Random(1)
+
+    def call(priority):
+        started = time.monotonic()
+        tokens = TOKENS[priority]
+        try:
+            if scheduler:
+                with scheduler.slot(priority, tokens):
+                    upstream.create(tokens)
+            else:
+                upstream.create(tokens)
+            outcome = "ok"
+        except RateLimited:
+            outcome = "429"
+        except LLMBusyError:
+            outcome = "shed"
+        with lock:
+            outcomes[priority][outcome] += 1
+            if outcome == "ok":
+                latencies[priority].append(time.monotonic() - started)
+
+    interval = 60 / (rpm * load)
+    with ThreadPoolExecutor(max_workers=256) as pool:
+        started = time.monotonic()
+        n = 0
+        while time.monotonic() - started < seconds:
+            pool.submit(call, rng.choice(MIX))
+            n += 1
+            time.sleep(max(0.0, started + n * interval - time.monotonic()))
+    return outcomes, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rpm", type=int, default=600)
+    parser.add_argument("--tpm", type=int, default=150000)
+    parser.add_argument("--window", type=float, default=60, help="seconds over which the fake OpenAI enforces the limits")
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--load", type=float, default=1.5, help="offered load as a multiple of --rpm")
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'priority':<12}{'ok':>6}{'429':>6}{'shed':>6}{'p50 ms':>9}{'p95 ms':>9}")
+    for mode in ("direct", "scheduled"):
+        scheduler = LLMScheduler(rpm=args.rpm, tpm=args.tpm) if mode == "scheduled" else None
+        outcomes, latencies = run(args.rpm, args.tpm, args.window, args.seconds, args.load, scheduler)
+        for priority, name in enumerate(PRIORITY_NAMES):
+            timings = sorted(latencies[priority]) or [0.0]
+            p95 = timings[int(len(timings) * 0.95)]
+            counts = outcomes[priority]
+            print(f"{mode:<10}{name:<12}{counts['ok']:>6}{counts['429']:>6}{counts['shed']:>6}"
+                  f"{statistics.median(timings) * 1000:>9.0f}{p95 * 1000:>9.0f}")
+        if scheduler:
+            print(f"\nscheduler: {scheduler.snapshot()['priorities']}")
+
+
+if __name__ == "__main__":
+    main()
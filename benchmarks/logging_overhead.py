@@ -0,0 +1,98 @@
+"""CPU cost of per-request logging: eager f-string payload logs vs lazy, sampled, queued logs.
+
+Replays the debug statements one /chat turn with Fitbit data used to emit (sessions dict,
+POST body, raw Fitbit response bodies) against a handler writing to os.devnull. Reports CPU
+microseconds per simulated request on the request thread (thread_time) and for the whole
+process including the QueueListener thread (process_time).
+
+    python -m benchmarks.logging_overhead --requests 5000
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from logging.handlers import QueueHandler, QueueListener
+import queue
+from utils.logging_setup import RedactingFilter, log_payload
+
+SESSION = {
+    "interview_id": "4643aa25-9fe9-445e-8447-17520e4971d2",
+    "evidence": [{"id": f"s_{i}", "choice_id": "present"} for i in range(12)],
+    "last_question": [{"id": "s_21", "name": "Headache", "choices": [{"id": "present", "label": "Yes"}]}],
+    "question_count": 6, "last_activity": 1742555540.5, "age": 30, "sex": "male"
+}
+SESSIONS = {f"user-{i}": SESSION for i in range(200)}
+POST_BODY = {"input": "", "user_id": "user-1", "answer": "Yes", "free_text": "", "age": 30, "sex": "male"}
+FITBIT_BODY = json.dumps({"activities-heart": [{"dateTime": "2025-03-20", "value": {"restingHeartRate": 61, "heartRateZones": [
+    {"name": z, "min": 30, "max": 220, "minutes": 100, "caloriesOut": 1000.5} for z in ("Out of Range", "Fat Burn", "Cardio", "Peak")
+]}}], "activities-heart-intraday": {"dataset": [{"time": f"00:{m:02d}:00", "value": 60} for m in range(60)] * 24}})
+
+
+class FakeResponse:
+    status_code = 200
+
+    @property
+    def text(self):
+        # requests decodes the body on every .text access
+        return FITBIT_BODY.encode().decode()
+
+
+def eager_request(log, response):
+    log.debug(f"Retrieving session for user_id: user-1, session: {SESSIONS['user-1']}")
+    log.debug(f"Received POST data: {POST_BODY}")
+    for name in ("SpO2", "Heart Rate"):
+        log.debug(f"{name} response for 2025-03-20: {response.status_code} {response.text}")
+    log.info(f"Feedback from user user-1: positive")
+
+
+def lazy_request(log, response):
+    log.debug("Retrieving session for user_id: %s", "user-1")
+    log_payload(log, "Received chat POST for user_id: %s", "user-1", payload=POST_BODY)
+    for name in ("SpO2", "Heart Rate"):
+        log_payload(log, "%s response for %s: %s", name, "2025-03-20", response.status_code, payload=lambda: response.text)
+    log.info("Feedback from user %s: %s", "user-1", "positive")
+
+
+def measure(fn, log, requests, listener=None):
+    response = FakeResponse()
+    started_thread, started_process = time.thread_time(), time.process_time()
+    for _ in range(requests):
+        fn(log, response)
+    thread_cpu = time.thread_time() - started_thread
+    if listener:
+        # Drain the queue so the listener's share of the work is included in process time
+        listener.stop()
+        listener.start()
+    process_cpu = time.process_time() - started_process
+    return thread_cpu / requests * 1e6, process_cpu / requests * 1e6
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    eager_log = logging.getLogger("bench.eager")
+    eager_log.addHandler(logging.StreamHandler(devnull))
+    eager_log.propagate = False
+
+    log_queue = queue.SimpleQueue()
+    lazy_log = logging.getLogger("bench.lazy")
+    lazy_log.addHandler(QueueHandler(log_queue))
+    lazy_log.propagate = False
+    redacted_handler = logging.StreamHandler(devnull)
+    redacted_handler.addFilter(RedactingFilter())
+    listener = QueueListener(log_queue, redacted_handler)
+    listener.start()
+
+    print(f"{'level':<8}{'':<10}{'eager us/req':>14}{'lazy us/req':>14}{'saved':>10}")
+    for level in (logging.INFO, logging.DEBUG):
+        eager_log.setLevel(level)
+        lazy_log.setLevel(level)
+        eager = measure(eager_request, eager_log, args.requests)
+        lazy = measure(lazy_request, lazy_log, args.requests, listener)
+        for label, e, l in (("request", eager[0], lazy[0]), ("process", eager[1], lazy[1])):
+            print(f"{logging.getLevelName(level):<8}{label:<10}{e:>14.1f}{l:>14.1f}{(1 - l / e) * 100:>9.0f}%")
+    listener.stop()
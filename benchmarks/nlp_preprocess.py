@@ -0,0 +1,54 @@
+"""Per-turn CPU of NLP input preprocessing, before and after the shared NormalizedText stage.
+
+Before: each NLPProcessor stage on a symptom turn (classify_intent, parse_symptoms_infermedica,
+interpret_vague_symptoms, map_symptom_to_infermedica per symptom) and on a free-text answer
+turn re-ran the camelCase split/lower/strip and matched inline regex strings.
+After: one NormalizedText per turn, reused by every stage.
+
+    python -m benchmarks.nlp_preprocess --turns 20000
+"""
+import argparse
+import re
+import time
+from chatbot.answers import DURATION
+from chatbot.text import NormalizedText
+
+SYMPTOM_TURNS = (
+    "I have had a HeadAche and a mild fever since yesterday, no rash though",
+    "sore throat, runny nose and I feel tired all the time",
+    "chest pain when I breathe deeply but no shortness of breath",
+)
+ANSWER_TURNS = ("about 3 days", "I don't have any swelling", "for two weeks now")
+
+
+def before(symptom_text, answer_text, mapped_symptoms=3):
+    for _ in range(3 + mapped_symptoms):  # classify, parse, interpret, one /suggest per symptom
+        normalized = re.sub(r'([a-z])([A-Z])', r'\1 \2', symptom_text).lower().strip()
+    for _ in range(2):  # duration check, then free-text check
+        normalized = re.sub(r'([a-z])([A-Z])', r'\1 \2', answer_text).lower().strip()
+    re.search(r"(\d+)\s*(year|years|month|months|day|days|hour|hours|week|weeks)", normalized)
+    re.search(r"(don't have|no|not|haven't|didn't)\s*(.+)", normalized)
+
+
+def after(symptom_text, answer_text, mapped_symptoms=3):
+    text = NormalizedText(symptom_text)
+    for _ in range(3 + mapped_symptoms):
+        NormalizedText.of(text).normalized
+    answer = NormalizedText(answer_text)
+    DURATION.search(answer.normalized)
+    answer.negation_spans
+
+
+def measure(fn, turns):
+    started = time.process_time()
+    for i in range(turns):
+        fn(SYMPTOM_TURNS[i % len(SYMPTOM_TURNS)], ANSWER_TURNS[i % len(ANSWER_TURNS)])
+    return (time.process_time() - started) / turns * 1e6
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=20000)
+    args = parser.parse_args()
+    old, new = measure(before, args.turns), measure(after, args.turns)
+    print(f"before: {old:.1f} us/turn, after: {new:.1f} us/turn ({(1 - new / old) * 100:.0f}% less CPU)")
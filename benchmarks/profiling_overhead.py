@@ -0,0 +1,57 @@
+"""Per-request cost of the profiling hooks: off, armed (secret set, request not profiled), and profiling.
+
+Each request does a little CPU work and a short sleep, standing in for a chat turn
+waiting on an upstream call.
+
+    python -m benchmarks.profiling_overhead --requests 300
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from flask import Flask
+from utils.profiling import ProfileStore, init_profiling, make_token
+
+SECRET = "benchmark"
+
+
+def build_app(profile_dir, secret=""):
+    app = Flask(__name__)
+    init_profiling(app, sample_rate=0.0, secret=secret, store=ProfileStore(profile_dir))
+
+    @app.route('/turn')
+    def turn():
+        sum(i * i for i in range(20000))
+        time.sleep(0.002)
+        return "ok"
+
+    return app
+
+
+def timed_requests(app, requests, headers=None):
+    client = app.test_client()
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        client.get('/turn', headers=headers or {})
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as profile_dir:
+        runs = {
+            "off": timed_requests(build_app(profile_dir), args.requests),
+            "armed": timed_requests(build_app(profile_dir, SECRET), args.requests),
+            "profiling": timed_requests(build_app(profile_dir, SECRET), args.requests, {"X-Profile": make_token(SECRET)}),
+        }
+    for mode, timings in runs.items():
+        print(f"{mode:<10} median {statistics.median(timings) * 1000:7.2f} ms   p95 {sorted(timings)[int(len(timings) * 0.95)] * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
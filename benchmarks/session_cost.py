@@ -0,0 +1,76 @@
+"""Per-request session cost: signed-cookie sessions vs the server-side filesystem store.
+
+Fills a session the way a logged-in Fitbit user's looks after visiting the dashboard
+(tokens, ID token, cached basic and full Fitbit data), then times requests that read it
+and reports the Cookie / Set-Cookie header sizes each backend sends.
+
+    python -m benchmarks.session_cost --requests 2000
+"""
+import argparse
+import secrets
+import tempfile
+import time
+from datetime import datetime
+from flask import Flask, session
+from utils.session_store import init_session_store
+
+ZONES = {zone: {"caloriesOut": 123.45, "minutes": 37} for zone in ("out_of_range", "fat_burn", "cardio", "peak")}
+FITBIT_BASIC = {"sp02": 97.2, "heart_rate": 61}
+FITBIT_ALL = {
+    **FITBIT_BASIC, "heart_rate_zones": ZONES, "steps": 8421, "distance": 6.12, "calories": 2310,
+    "active_minutes": 48, "floors": 12, "sleep_duration": 7.4,
+    "sleep_stages": {"light": 212, "deep": 81, "rem": 97, "wake": 54},
+    "weight": 72.5, "bmi": 23.1, "body_fat": 18.2, "water": 1500, "calories_in": 1980,
+}
+
+
+def build_app(server_side):
+    app = Flask(__name__)
+    app.secret_key = "benchmark"
+    if server_side:
+        init_session_store(app, session_dir=tempfile.mkdtemp())
+
+    @app.route('/login')
+    def login():
+        # Random token bodies so the cookie backend's zlib compression sees realistic entropy
+        session['auth0_user'] = "eyJhbGciOiJSUzI1NiJ9." + secrets.token_urlsafe(700) + "." + secrets.token_urlsafe(256)
+        session['fitbit_user'] = True
+        session['access_token'] = "eyJhbGciOiJIUzI1NiJ9." + secrets.token_urlsafe(200)
+        session['refresh_token'] = secrets.token_hex(32)
+        session['user_id'] = "ABC123"
+        session['fitbit_basic_data'] = FITBIT_BASIC
+        session['fitbit_basic_timestamp'] = datetime.now().isoformat()
+        session['fitbit_all_data'] = FITBIT_ALL
+        session['fitbit_all_timestamp'] = datetime.now().isoformat()
+        return "ok"
+
+    @app.route('/page')
+    def page():
+        return session.get('user_id', 'default')
+
+    return app
+
+
+def measure(server_side, requests):
+    client = build_app(server_side).test_client()
+    login = client.get('/login')
+    set_cookie = len(login.headers.get('Set-Cookie', ''))
+    cookie = client.get_cookie('session') if hasattr(client, 'get_cookie') else None
+    cookie_size = len(cookie.value) if cookie else len(login.headers.get('Set-Cookie', '').split(';')[0])
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get('/page')
+    elapsed = time.perf_counter() - started
+    return elapsed / requests * 1e6, cookie_size, set_cookie, len(response.headers.get('Set-Cookie', ''))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'backend':<14}{'us/request':>12}{'cookie bytes':>14}{'login Set-Cookie':>18}{'page Set-Cookie':>17}")
+    for label, server_side in (("cookie", False), ("server-side", True)):
+        per_request, cookie_size, login_header, page_header = measure(server_side, args.requests)
+        print(f"{label:<14}{per_request:>12.1f}{cookie_size:>14}{login_header:>18}{page_header:>17}")
@@ -0,0 +1,116 @@
+"""Bytes per active session: the old free-form session dict vs InterviewState, measured with tracemalloc.
+
+Each session is mid-interview: 8 pieces of evidence drawn from a 300-symptom pool, a
+pending 3-item question as Infermedica returns it, and manual health data for 1 in 4
+users. The dict form also carries the option index it stored next to `last_question`.
+InterviewState sessions are created through a SessionManager, so everything the manager
+holds per user is counted, and again after a fresh manager reloads them from its database.
+
+    python -m benchmarks.session_memory --sessions 10000 100000
+"""
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import uuid
+from chatbot.interview_state import Question, InterviewState
+from chatbot.options import build_option_index
+from chatbot.session_manager import SessionManager
+from utils import serialization
+
+SYMPTOM_POOL = 300
+OPTION_NAMES = ("Less than a day", "1 to 7 days", "More than a week")
+
+
+def interview(rng, i):
+    """Fresh objects per session, the way they arrive from parsed JSON."""
+    evidence = [{"id": f"s_{rng.randrange(SYMPTOM_POOL)}", "choice_id": rng.choice(("present", "present", "absent", "unknown"))}
+                for _ in range(8)]
+    items = [{"id": f"s_{1000 + n}", "name": name, "choices": [
+        {"id": "present", "label": "Yes"}, {"id": "absent", "label": "No"}, {"id": "unknown", "label": "Don't know"}]}
+        for n, name in enumerate(OPTION_NAMES)]
+    health = {"temperature": 37.9, "blood_pressure": {"systolic": 128, "diastolic": 84}} if i % 4 == 0 else None
+    return evidence, items, health
+
+
+def as_dict(evidence, items, health):
+    session = {
+        "interview_id": str(uuid.uuid4()), "evidence": evidence, "last_question": items,
+        "last_question_index": build_option_index("group_single", items),
+        "question_count": 4, "last_activity": time.time(), "age": int("34"), "sex": "".join("female"),
+    }
+    if health:
+        session["manual_health_data"] = health
+    return session
+
+
+def as_state(manager, user_id, evidence, items, health):
+    state = manager.get_session(user_id)
+    state.evidence.extend(evidence)
+    state.last_question = Question.from_items("group_single", items)
+    state.question_count = 4
+    state.set_profile(int("34"), "".join("female"))
+    state.manual_health_data = health
+    return state
+
+
+def held_per_session(build, count):
+    """Returns (bytes per session held by what `build()` returns, the result) with temporaries released."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return held / count, result
+
+
+def dict_sessions(count):
+    rng = random.Random(7)
+    return {f"user{i}": as_dict(*interview(rng, i)) for i in range(count)}
+
+
+def managed_sessions(count, db_file):
+    rng = random.Random(7)
+    manager = SessionManager(db_file=db_file)
+    for i in range(count):
+        as_state(manager, f"user{i}", *interview(rng, i))
+    return manager
+
+
+def persist(manager):
+    """Writes every session in one transaction (save_session does one user per call)."""
+    rows = [(user_id, serialization.dumps(state.to_record())) for user_id, state in manager.sessions.items()]
+    with manager._connect() as conn:
+        conn.executemany("INSERT OR REPLACE INTO sessions (user_id, record) VALUES (?, ?)", rows)
+    return sum(len(record.encode()) for _, record in rows) / len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'sessions':>9}{'model':>28}{'bytes/session':>15}{'record bytes/session':>22}")
+    for count in args.sessions:
+        per_session, sessions = held_per_session(lambda: dict_sessions(count), count)
+        disk = sum(len(serialization.dumpb(s)) for s in sessions.values()) / count
+        print(f"{count:>9}{'dict':>28}{per_session:>15.0f}{disk:>22.0f}")
+        del sessions
+
+        db_file = os.path.join(tempfile.mkdtemp(), "sessions.db")
+        per_session, manager = held_per_session(lambda: managed_sessions(count, db_file), count)
+        disk = persist(manager)
+        print(f"{count:>9}{'SessionManager':>28}{per_session:>15.0f}{disk:>22.0f}")
+        del manager
+        per_session, reloaded = held_per_session(lambda: SessionManager(db_file=db_file), count)
+        print(f"{count:>9}{'SessionManager, reloaded':>28}{per_session:>15.0f}{disk:>22.0f}")
+        del reloaded
+
+
+if __name__ == "__main__":
+    main()
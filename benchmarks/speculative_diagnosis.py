@@ -0,0 +1,134 @@
+"""Answer-turn latency with and without speculative /diagnosis for yes/no questions.
+
+Simulated users open an interview and then answer a series of yes/no questions through
+the real /chat route, pausing `--think` seconds before each answer. Infermedica is a stub
+that sleeps `--latency` seconds per call. Reports answer-turn latency, the speculation hit
+rate and the /diagnosis calls made per answer (what speculation costs).
+
+    python -m benchmarks.speculative_diagnosis --users 20 --answers 6 --budget 300 1200 3000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+from benchmarks.cold_start import DUMMY_ENV
+
+for key, value in {**DUMMY_ENV, "LOG_LEVEL": "CRITICAL"}.items():
+    os.environ.setdefault(key, value)
+
+from app import create_app  # noqa: E402
+from chatbot.admission import AdmissionController  # noqa: E402
+from chatbot.session_manager import SessionManager  # noqa: E402
+from chatbot.vitals import VitalsLog  # noqa: E402
+from chatbot.speculation import DiagnosisSpeculator  # noqa: E402
+from utils.components import Components  # noqa: E402
+from utils.http_pool import get_http_session  # noqa: E402
+
+# How users answer: mostly yes or no, sometimes unsure
+ANSWERS = ("Yes",) * 45 + ("No",) * 40 + ("Don't know",) * 15
+
+
+class StubResponse:
+    status_code = 200
+    url = ""
+
+    def __init__(self, body):
+        self.body = body
+        self.text = json.dumps(body)
+
+    def json(self):
+        return self.body
+
+
+def stub_infermedica(latency, calls, lock):
+    def post(url, json=None, **kwargs):
+        endpoint = url.rsplit("/", 1)[-1]
+        with lock:
+            calls[endpoint] += 1
+        time.sleep(latency)
+        if endpoint == "parse":
+            # Distinct opening symptoms, so users' calls are not coalesced by single-flight
+            return StubResponse({"mentions": [{"id": "s_" + json["text"].split()[-1], "choice_id": "present"}]})
+        # A new yes/no question per evidence state
+        question_id = f"s_{1000 + len(json['evidence'])}"
+        return StubResponse({"question": {"type": "single", "text": "Do you have this symptom?",
+                                          "items": [{"id": question_id, "name": "Symptom"}]},
+                             "conditions": [{"name": "Tension headache", "probability": 0.2}], "should_stop": False})
+    return post
+
+
+def run(budget, users, answers, think, latency):
+    calls, lock = Counter(), threading.Lock()
+    get_http_session("infermedica").post = stub_infermedica(latency, calls, lock)
+    workdir = tempfile.mkdtemp()
+    components = Components()
+    components.__dict__.update(
+        openai_client=SimpleNamespace(), symptom_map=[],
+        session_manager=SessionManager(db_file=os.path.join(workdir, "sessions.db")),
+        vitals_log=VitalsLog(os.path.join(workdir, "vitals.db")),
+        admission_controller=AdmissionController(db_file=os.path.join(workdir, "admission.db"), user_rate=100, user_burst=100,
+                                                 global_rate=1000, global_burst=1000, max_concurrent=users),
+    )
+    components.__dict__["speculator"] = DiagnosisSpeculator(components.infermedica_client, per_minute=budget,
+                                                            max_inflight=users * 2) if budget else None
+    app = create_app(components)
+    latencies = []
+    barrier = threading.Barrier(users)
+
+    def user(n):
+        rng = random.Random(n)
+        client = app.test_client()
+        # Admission buckets are keyed on the signed-in user, not the body user_id
+        with client.session_transaction() as flask_session:
+            flask_session['user_id'] = f"user{n}"
+        barrier.wait()
+        payload = {"user_id": f"user{n}", "age": 40, "sex": "male"}
+        # Closing the response is what a WSGI server does once it is sent; speculation starts then
+        client.post("/chat", json={**payload, "input": f"symptom {n}"}).close()
+        for _ in range(answers):
+            time.sleep(think * rng.uniform(0.5, 1.5))
+            started = time.perf_counter()
+            response = client.post("/chat", json={**payload, "answer": rng.choice(ANSWERS)})
+            elapsed = time.perf_counter() - started
+            response.close()
+            assert response.status_code == 200, response.get_json()
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=user, args=(n,)) for n in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = components.speculator.snapshot() if budget else {}
+    return sorted(latencies), calls["diagnosis"], stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--answers", type=int, default=6)
+    parser.add_argument("--think", type=float, default=1.0, help="mean seconds a user takes to answer")
+    parser.add_argument("--latency", type=float, default=0.4, help="seconds per Infermedica call")
+    parser.add_argument("--budget", type=int, nargs="+", default=[300, 1200, 3000], help="speculative calls per minute to try")
+    args = parser.parse_args()
+
+    print(f"{'budget/min':<12}{'p50 ms':>8}{'p95 ms':>8}{'hit rate':>10}{'skipped':>9}{'/diagnosis per answer':>23}")
+    for budget in (0, *args.budget):
+        latencies, diagnosis_calls, stats = run(budget, args.users, args.answers, args.think, args.latency)
+        answered = len(latencies)
+        # The opening message makes one /diagnosis call per user in both modes
+        per_answer = (diagnosis_calls - args.users) / answered
+        hit_rate = f"{stats['hit_rate']:.0%}" if budget else "-"
+        print(f"{budget or 'off':<12}{statistics.median(latencies) * 1000:>8.0f}{latencies[int(answered * 0.95)] * 1000:>8.0f}"
+              f"{hit_rate:>10}{stats.get('skipped', 0):>9}{per_answer:>23.2f}")
+
+
+if __name__ == "__main__":
+    main()
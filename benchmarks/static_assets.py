@@ -0,0 +1,81 @@
+"""Static asset bytes per page: Flask's default static handler vs the built asset pipeline.
+
+Builds `static/` into a temporary dist directory, then fetches the assets each template
+references the way a browser would: a first visit with an empty cache, and a repeat
+visit that revalidates whatever its cache headers don't let it reuse outright.
+
+    python -m benchmarks.static_assets
+"""
+import argparse
+import os
+import re
+import tempfile
+from flask import Flask, render_template_string
+from utils.assets import build, init_assets
+
+STATIC_REF = re.compile(r"""url_for\('static',\s*filename='([^']+)'\)""")
+ACCEPT_ENCODING = "gzip, deflate, br"
+
+
+def page_assets(template_dir="templates"):
+    pages = {}
+    for name in sorted(os.listdir(template_dir)):
+        with open(os.path.join(template_dir, name)) as f:
+            pages[name] = STATIC_REF.findall(f.read())
+    return pages
+
+
+def build_app(dist_dir=None):
+    app = Flask(__name__, static_folder=os.path.abspath("static"))
+    if dist_dir:
+        init_assets(app, dist_dir=dist_dir)
+    return app
+
+
+def visit(client, app, assets, cache):
+    """Fetches `assets`, honouring `cache` {url: (etag, immutable)}; returns (requests, bytes)."""
+    requests_made = bytes_received = 0
+    for filename in assets:
+        with app.test_request_context():
+            url = render_template_string("{{ url_for('static', filename=f) }}", f=filename)
+        etag, immutable = cache.get(url, (None, False))
+        if immutable:
+            continue
+        headers = {"Accept-Encoding": ACCEPT_ENCODING}
+        if etag:
+            headers["If-None-Match"] = etag
+        response = client.get(url, headers=headers)
+        requests_made += 1
+        bytes_received += len(response.data)
+        cache[url] = (response.headers.get("ETag"), response.cache_control.immutable)
+        response.close()
+    return requests_made, bytes_received
+
+
+def run(app, pages):
+    client = app.test_client()
+    results = {}
+    for page, assets in pages.items():
+        cache = {}
+        results[page] = (visit(client, app, assets, cache), visit(client, app, assets, cache))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args()
+
+    pages = page_assets()
+    with tempfile.TemporaryDirectory() as dist_dir:
+        build(dist_dir=dist_dir)
+        runs = {"default": run(build_app(), pages), "built": run(build_app(dist_dir), pages)}
+
+    print(f"{'page':<22}{'mode':<9}{'first reqs':>11}{'first bytes':>13}{'repeat reqs':>13}{'repeat bytes':>14}")
+    for page in pages:
+        for mode, results in runs.items():
+            (first_requests, first_bytes), (repeat_requests, repeat_bytes) = results[page]
+            print(f"{page:<22}{mode:<9}{first_requests:>11}{first_bytes:>13}{repeat_requests:>13}{repeat_bytes:>14}")
+
+
+if __name__ == "__main__":
+    main()
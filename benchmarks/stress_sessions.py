@@ -0,0 +1,66 @@
+"""Concurrent stress check for SessionManager.
+
+Hammers a shared SessionManager from many threads the way ChatRoutes does
+(lock, mutate, save) and verifies that no evidence is lost in memory or on disk.
+
+    python -m benchmarks.stress_sessions --threads 32 --turns 200 --users 8
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from chatbot.interview_state import InterviewState
+from chatbot.session_manager import SessionManager
+
+
+def run(threads, turns, users):
+    db_file = os.path.join(tempfile.mkdtemp(), "sessions.db")
+    manager = SessionManager(db_file=db_file)
+    barrier = threading.Barrier(threads)
+
+    def worker(worker_id):
+        barrier.wait()
+        for turn in range(turns):
+            user_id = f"user-{(worker_id + turn) % users}"
+            with manager.lock(user_id):
+                user_session = manager.get_session(user_id)
+                user_session.evidence.append({"id": f"s_{worker_id}_{turn}", "choice_id": "present"})
+                user_session.question_count += 1
+                manager.save_session(user_id)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    expected = threads * turns
+    in_memory = sum(len(manager.get_session(f"user-{u}").evidence) for u in range(users))
+    with sqlite3.connect(db_file) as conn:
+        on_disk = sum(len(InterviewState.from_record(json.loads(record)).evidence) for record, in conn.execute("SELECT record FROM sessions"))
+    reloaded = SessionManager(db_file=db_file)
+    after_reload = sum(len(reloaded.get_session(f"user-{u}").evidence) for u in range(users))
+    counts_match = all(
+        manager.get_session(f"user-{u}").question_count == len(manager.get_session(f"user-{u}").evidence)
+        for u in range(users)
+    )
+
+    print(f"{expected} turns in {elapsed:.2f}s ({expected / elapsed:.0f} turns/s)")
+    print(f"evidence in memory: {in_memory}, on disk: {on_disk}, after reload: {after_reload}")
+    assert in_memory == on_disk == after_reload == expected, "evidence was lost"
+    assert counts_match, "question_count diverged from evidence"
+    print("OK: no evidence lost")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--users", type=int, default=8)
+    args = parser.parse_args()
+    run(args.threads, args.turns, args.users)
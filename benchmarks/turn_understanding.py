@@ -0,0 +1,214 @@
+"""LLM calls, tokens and upstream latency per chat turn: separate GPT calls vs one merged call.
+
+Replays scripted conversations through the real /chat route in both TURN_UNDERSTANDING
+modes. OpenAI and Infermedica are stubs that answer from a script and count calls and
+tokens. Upstream latency is modeled rather than slept: each OpenAI call costs `--ttft`
+plus `--per-token` for each completion token, and each Infermedica call costs `--infermedica`.
+
+    python -m benchmarks.turn_understanding --ttft 0.35 --per-token 0.015 --infermedica 0.25
+"""
+import argparse
+import json
+import math
+import os
+import tempfile
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+from benchmarks.cold_start import DUMMY_ENV
+from chatbot.understanding import SYSTEM_PROMPT
+
+for key, value in {**DUMMY_ENV, "LOG_LEVEL": "CRITICAL"}.items():
+    os.environ.setdefault(key, value)
+
+from app import create_app  # noqa: E402
+from chatbot.admission import AdmissionController  # noqa: E402
+from chatbot.session_manager import SessionManager  # noqa: E402
+from chatbot.vitals import VitalsLog  # noqa: E402
+from utils.components import Components  # noqa: E402
+from utils.http_pool import get_http_session  # noqa: E402
+
+# What the model "understands" from each scripted text
+ORACLE = {
+    "i have a bad headache and a fever": {"intent": "medical"},
+    "i just feel off and kind of wiped out": {"intent": "medical", "symptoms": ["fatigue", "malaise"]},
+    "my tummy is all over the place": {"intent": "medical", "symptoms": ["abdominal pain", "nausea"]},
+    "what's the capital of france?": {"intent": "general"},
+    "ages, honestly": {"duration": {"value": 2, "unit": "month"}},
+    "on and off, mostly when i stand up": {"duration": {"value": 3, "unit": "day"}},
+    "the skin is kind of angry looking": {"answer": {"item": "redness", "choice": "yes"}},
+}
+KNOWN_SYMPTOMS = {"headache": "s_21", "fever": "s_98", "redness": "s_208", "itching": "s_192"}
+QUESTIONS = (
+    {"type": "single", "text": "Do you feel nauseous?", "items": [{"id": "s_156", "name": "Nausea"}]},
+    {"type": "group_single", "text": "How long have you had these symptoms?", "items": [
+        {"id": "p_1", "name": "Duration: less than 24 hours"}, {"id": "p_2", "name": "Duration: between 1 and 7 days"},
+        {"id": "p_3", "name": "Duration: more than 7 days"}]},
+    {"type": "group_multiple", "text": "Do you have any of these skin changes?", "items": [
+        {"id": "s_223", "name": "Swelling"}, {"id": "s_208", "name": "Redness"}, {"id": "s_192", "name": "Itching"}]},
+)
+# (turn kind, request fields) per conversation; every conversation opens with a new message
+CONVERSATIONS = (
+    (("message, /parse hit", {"input": "I have a bad headache and a fever"}),
+     ("option answer", {"answer": "No"}),
+     ("free text, local", {"free_text": "since monday"}),
+     ("free text, local", {"free_text": "itching but no swelling"})),
+    (("message, vague", {"input": "I just feel off and kind of wiped out"}),
+     ("option answer", {"answer": "Yes"}),
+     ("free text, LLM", {"free_text": "ages, honestly"}),
+     ("free text, LLM", {"free_text": "the skin is kind of angry looking"})),
+    (("message, vague", {"input": "My tummy is all over the place"}),
+     ("option answer", {"answer": "Don't know"}),
+     ("free text, LLM", {"free_text": "on and off, mostly when I stand up"})),
+    (("message, general", {"input": "What's the capital of France?"}),),
+)
+
+
+def _tokens(text):
+    return math.ceil(len(text) / 4)
+
+
+class Meter:
+    """Counts upstream calls and tokens and sums their modeled latency."""
+
+    def __init__(self, ttft, per_token, infermedica):
+        self.ttft, self.per_token, self.infermedica = ttft, per_token, infermedica
+        self.counts = defaultdict(float)
+
+    def openai(self, messages, reply):
+        prompt = sum(_tokens(m["content"]) + 4 for m in messages)
+        completion = _tokens(reply)
+        self.counts["llm_calls"] += 1
+        self.counts["prompt_tokens"] += prompt
+        self.counts["completion_tokens"] += completion
+        self.counts["upstream_seconds"] += self.ttft + completion * self.per_token
+        return SimpleNamespace(prompt_tokens=prompt, completion_tokens=completion, total_tokens=prompt + completion)
+
+    def infermedica_call(self):
+        self.counts["infermedica_calls"] += 1
+        self.counts["upstream_seconds"] += self.infermedica
+
+
+def _oracle(messages):
+    text = " ".join(m["content"] for m in messages).lower()
+    return next((truth for phrase, truth in ORACLE.items() if phrase in text), {})
+
+
+def _reply(messages):
+    system = messages[0]["content"] if messages[0]["role"] == "system" else ""
+    prompt = messages[-1]["content"]
+    truth = _oracle(messages)
+    if system == SYSTEM_PROMPT:
+        if "Question to classify" in prompt:
+            return json.dumps({"intent": "medical", "symptoms": [], "answer": None, "duration": None, "yes_no": True})
+        return json.dumps({"intent": truth.get("intent", "medical"), "symptoms": truth.get("symptoms", []),
+                           "answer": truth.get("answer"), "duration": truth.get("duration"), "yes_no": None})
+    if system.startswith("Respond with 'medical' or 'general'"):
+        return truth.get("intent", "medical")
+    if system.startswith("You are a medical assistant"):
+        return json.dumps({"symptoms": truth.get("symptoms", [])})
+    if system.startswith("You interpret patient answers"):
+        return json.dumps(truth.get("duration") or truth.get("answer") or {"item": None, "choice": "don't know"})
+    if prompt.startswith("Is this a yes/no question"):
+        return "yes" if "any of these" not in prompt and "How long" not in prompt else "no"
+    return "Paris is the capital of France."
+
+
+def stub_openai(meter):
+    def create(messages, **kwargs):
+        reply = _reply(messages)
+        usage = meter.openai(messages, reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))], usage=usage)
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+class StubResponse:
+    status_code = 200
+    url = ""
+
+    def __init__(self, body):
+        self.body = body
+        self.text = json.dumps(body)
+
+    def json(self):
+        return self.body
+
+
+def stub_infermedica(meter):
+    asked = defaultdict(int)
+
+    def post(url, json=None, **kwargs):
+        meter.infermedica_call()
+        endpoint = url.rsplit("/", 1)[-1]
+        if endpoint == "parse":
+            return StubResponse({"mentions": [{"id": symptom_id, "choice_id": "present"}
+                                              for name, symptom_id in KNOWN_SYMPTOMS.items() if name in json["text"]]})
+        if endpoint == "suggest":
+            return StubResponse([{"id": "s_" + str(abs(hash(json["text"])) % 2000)}])
+        question = QUESTIONS[asked[json["interview_id"]] % len(QUESTIONS)]
+        asked[json["interview_id"]] += 1
+        return StubResponse({"question": question, "conditions": [{"name": "Viral infection", "probability": 0.3}],
+                             "should_stop": False})
+    return post
+
+
+def run(merged, ttft, per_token, infermedica):
+    meter = Meter(ttft, per_token, infermedica)
+    get_http_session("infermedica").post = stub_infermedica(meter)
+    workdir = tempfile.mkdtemp()
+    components = Components()
+    components.__dict__.update(
+        openai_client=stub_openai(meter), symptom_map=[],
+        session_manager=SessionManager(db_file=os.path.join(workdir, "sessions.db")),
+        vitals_log=VitalsLog(os.path.join(workdir, "vitals.db")),
+        admission_controller=AdmissionController(db_file=os.path.join(workdir, "admission.db")),
+    )
+    components.nlp_processor.merged_turns = merged
+    app = create_app(components)
+
+    per_kind = defaultdict(lambda: defaultdict(float))
+    for n, conversation in enumerate(CONVERSATIONS):
+        client = app.test_client()
+        # Admission buckets are keyed on the signed-in user, not the body user_id
+        with client.session_transaction() as flask_session:
+            flask_session['user_id'] = f"user{n}"
+        for kind, fields in conversation:
+            before = dict(meter.counts)
+            started = time.perf_counter()
+            response = client.post("/chat", json={"user_id": f"user{n}", "age": 34, "sex": "female", **fields})
+            local = time.perf_counter() - started
+            assert response.status_code == 200, response.get_json()
+            stats = per_kind[kind]
+            stats["turns"] += 1
+            stats["local_seconds"] += local
+            for key, value in meter.counts.items():
+                stats[key] += value - before.get(key, 0)
+    return per_kind
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ttft", type=float, default=0.35, help="seconds before an OpenAI call's first token")
+    parser.add_argument("--per-token", type=float, default=0.015, help="seconds per completion token")
+    parser.add_argument("--infermedica", type=float, default=0.25, help="seconds per Infermedica call")
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'turn':<22}{'turns':>6}{'LLM calls':>11}{'prompt tok':>12}{'compl tok':>11}"
+          f"{'Inferm.':>9}{'latency ms':>12}")
+    for merged in (False, True):
+        mode = "merged" if merged else "legacy"
+        per_kind = run(merged, args.ttft, args.per_token, args.infermedica)
+        totals = defaultdict(float)
+        for kind, stats in per_kind.items():
+            for key, value in stats.items():
+                totals[key] += value
+        for kind, stats in [*per_kind.items(), ("all turns", totals)]:
+            turns = stats["turns"]
+            latency = (stats["upstream_seconds"] + stats["local_seconds"]) / turns * 1000
+            print(f"{mode:<8}{kind:<22}{turns:>6.0f}{stats['llm_calls'] / turns:>11.2f}{stats['prompt_tokens'] / turns:>12.0f}"
+                  f"{stats['completion_tokens'] / turns:>11.0f}{stats['infermedica_calls'] / turns:>9.2f}{latency:>12.0f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Per-turn vitals summary: precomputed rollups vs recomputing from the raw readings, and bulk import speed.
+
+Fills a VitalsLog with `--days` of history for `--users` users (temperature and blood
+pressure `--per-day` times a day) through the bulk importer. Then times the summary the chat
+turn reads in two ways: the rollup lookup, and a recompute from the readings over the same windows.
+
+    python -m benchmarks.vitals_log --users 200 --days 90 --per-day 4
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from chatbot.vitals import VitalsLog, vitals_evidence
+
+
+def history(users, days, per_day, now):
+    rng = random.Random(3)
+    for user in range(users):
+        for step in range(days * per_day):
+            ts = now - step * 86400 / per_day - rng.uniform(0, 600)
+            yield f"user{user}", "temperature", ts, round(rng.gauss(36.9, 0.5), 1)
+            yield f"user{user}", "systolic", ts, rng.randint(105, 150)
+            yield f"user{user}", "diastolic", ts, rng.randint(65, 95)
+
+
+def timed(fn, user_ids):
+    timings = []
+    for user_id in user_ids:
+        started = time.perf_counter()
+        fn(user_id)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--per-day", type=int, default=4)
+    args = parser.parse_args()
+
+    log = VitalsLog(os.path.join(tempfile.mkdtemp(), "vitals.db"))
+    now = time.time()
+    rows = list(history(args.users, args.days, args.per_day, now))
+    started = time.perf_counter()
+    inserted = log.import_readings(rows)
+    elapsed = time.perf_counter() - started
+    print(f"bulk import: {inserted} readings in {elapsed:.2f}s ({inserted / elapsed:,.0f} readings/s)")
+
+    def recompute(user_id):
+        # Read-only: the same windows computed on every turn instead of stored
+        with log._connect() as conn:
+            summary = {metric: log._compute(conn, user_id, metric, time.time()) for metric in ("temperature", "systolic", "diastolic")}
+        return vitals_evidence(summary)
+
+    user_ids = [f"user{user}" for user in range(args.users)]
+    print(f"{'summary per turn':<26}{'median us':>10}")
+    print(f"{'rollup lookup':<26}{timed(lambda user_id: vitals_evidence(log.summary(user_id)), user_ids):>10.0f}")
+    print(f"{'recompute from readings':<26}{timed(recompute, user_ids):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
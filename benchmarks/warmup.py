@@ -0,0 +1,70 @@
+"""First-request latency per route with and without the startup warm-up, against steady state.
+
+Each run starts a fresh interpreter, imports the app and, with warm-up on, waits for
+/readyz the way a load balancer would. It then times the first request to each route and
+the median of the next `--repeat`. Upstream hosts are not needed; connections that cannot
+be opened are reported as 0.
+
+    python -m benchmarks.warmup --runs 3 --repeat 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from benchmarks.cold_start import DUMMY_ENV
+
+ROUTE_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import app
+client = app.app.test_client()
+while client.get('/readyz').status_code != 200:
+    time.sleep(0.01)
+ready = time.perf_counter() - started
+with client.session_transaction() as flask_session:
+    flask_session['auth0_user'] = {'name': 'Benchmark'}
+    flask_session['user_id'] = 'benchmark'
+routes = [('GET', '/', None), ('GET', '/chat', None), ('GET', '/health_data', None), ('GET', '/health_dashboard', None),
+          ('GET', '/symptoms', None), ('POST', '/feedback', {'user_id': 'benchmark', 'feedback': 'Helpful', 'rating': 4})]
+results = {}
+for method, path, body in routes:
+    timings = []
+    for _ in range(int(sys.argv[1]) + 1):
+        t = time.perf_counter()
+        client.open(path, method=method, json=body).close()
+        timings.append(time.perf_counter() - t)
+    results[f"{method} {path}"] = timings
+print(json.dumps({"ready": ready, "warmup": app.app.extensions['warmup'].snapshot(), "routes": results}))
+"""
+
+
+def run(warmup, repeat):
+    env = {**DUMMY_ENV, **os.environ, "WARMUP": "true" if warmup else "false", "LOG_LEVEL": "CRITICAL"}
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    stdout = subprocess.run([sys.executable, "-c", ROUTE_SCRIPT, str(repeat)], cwd=root, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    results = {mode: [run(mode == "warm-up", args.repeat) for _ in range(args.runs)] for mode in ("cold", "warm-up")}
+    for mode, runs in results.items():
+        print(f"{mode}: ready after {statistics.median(r['ready'] for r in runs) * 1000:.0f} ms (median of {args.runs} runs)")
+    print(f"last warm-up: {json.dumps(results['warm-up'][-1]['warmup']['steps'])}")
+
+    print(f"{'route':<24}{'cold first ms':>15}{'warm first ms':>15}{'steady ms':>11}")
+    for route in results["cold"][0]["routes"]:
+        firsts = {mode: statistics.median(r["routes"][route][0] for r in runs) * 1000 for mode, runs in results.items()}
+        steady = statistics.median(t for r in results["warm-up"] for t in r["routes"][route][1:]) * 1000
+        print(f"{route:<24}{firsts['cold']:>15.1f}{firsts['warm-up']:>15.1f}{steady:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
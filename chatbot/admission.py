@@ -0,0 +1,133 @@
+import logging
+import math
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from chatbot.config import ChatConfig
+
+logger = logging.getLogger(__name__)
+
+
+class Admission:
+    """Outcome of an admission check: `allowed`, or a reason and Retry-After in seconds."""
+
+    def __init__(self, allowed, reason=None, retry_after=0.0, lease_id=None):
+        self.allowed = allowed
+        self.reason = reason
+        self.retry_after = retry_after
+        self.lease_id = lease_id
+
+    @property
+    def retry_after_header(self):
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class AdmissionController:
+    """Per-client and global token buckets plus a cap on in-flight chat turns.
+
+    State lives in SQLite so every worker process draws from the same buckets. Each
+    check is one IMMEDIATE transaction and each release a single autocommit DELETE; if
+    the database is unavailable requests are admitted.
+    """
+
+    def __init__(self, db_file=ChatConfig.ADMISSION_DB,
+                 user_rate=ChatConfig.USER_RATE_PER_MINUTE / 60, user_burst=ChatConfig.USER_BURST,
+                 global_rate=ChatConfig.GLOBAL_RATE_PER_MINUTE / 60, global_burst=ChatConfig.GLOBAL_BURST,
+                 max_concurrent=ChatConfig.MAX_CONCURRENT_TURNS, max_wait=ChatConfig.ADMISSION_MAX_WAIT,
+                 lease_timeout=ChatConfig.ADMISSION_LEASE_TIMEOUT):
+        self.db_file = db_file
+        self.user_rate, self.user_burst = user_rate, user_burst
+        self.global_rate, self.global_burst = global_rate, global_burst
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self.lease_timeout = lease_timeout
+        with self._transaction() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS leases (lease_id TEXT PRIMARY KEY, user_id TEXT NOT NULL, expires REAL NOT NULL)")
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front so concurrent workers cannot both spend the last token
+        conn = sqlite3.connect(self.db_file, timeout=10, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _refill(conn, key, rate, burst, now):
+        row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return float(burst)
+        tokens, updated = row
+        return min(float(burst), tokens + max(0.0, now - updated) * rate)
+
+    def _try_admit(self, user_id):
+        now = time.time()
+        with self._transaction() as conn:
+            buckets = [(f"user:{user_id}", self.user_rate, self.user_burst), ("global", self.global_rate, self.global_burst)]
+            levels = [self._refill(conn, key, rate, burst, now) for key, rate, burst in buckets]
+
+            conn.execute("DELETE FROM leases WHERE expires < ?", (now,))
+            in_flight = conn.execute("SELECT COUNT(*) FROM leases").fetchone()[0]
+
+            decision = None
+            for (key, rate, _), tokens in zip(buckets, levels):
+                if tokens < 1:
+                    decision = Admission(False, "user_rate" if key != "global" else "global_rate", (1 - tokens) / rate)
+                    break
+            if decision is None and in_flight >= self.max_concurrent:
+                decision = Admission(False, "capacity", 1.0)
+            if decision is None:
+                levels = [tokens - 1 for tokens in levels]
+                decision = Admission(True, lease_id=uuid.uuid4().hex)
+                conn.execute("INSERT INTO leases (lease_id, user_id, expires) VALUES (?, ?, ?)",
+                             (decision.lease_id, user_id, now + self.lease_timeout))
+
+            conn.executemany(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                [(key, tokens, now) for (key, _, _), tokens in zip(buckets, levels)]
+            )
+            return decision
+
+    def admit(self, user_id):
+        """Admits a chat turn, waiting up to `max_wait` seconds when a token or slot frees up soon.
+
+        `user_id` keys the per-client bucket, so it must come from something the client cannot
+        freely change (the signed-in session or the remote address), never the request body.
+        """
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            try:
+                decision = self._try_admit(user_id)
+            except sqlite3.Error as e:
+                logger.error("Admission check failed, admitting request: %s", e)
+                return Admission(True)
+            if decision.allowed:
+                return decision
+            wait = min(decision.retry_after, 0.1) if decision.reason == "capacity" else decision.retry_after
+            if time.monotonic() + wait > deadline:
+                logger.info("Rejected chat turn for user_id %s: %s, retry after %.1fs", user_id, decision.reason, decision.retry_after)
+                return decision
+            time.sleep(wait)
+
+    def release(self, admission):
+        """Frees the in-flight slot taken by `admission`."""
+        if not admission.lease_id:
+            return
+        try:
+            # One statement needs no explicit transaction; autocommit takes the write lock only for the delete
+            conn = sqlite3.connect(self.db_file, timeout=10, isolation_level=None)
+            try:
+                conn.execute("DELETE FROM leases WHERE lease_id = ?", (admission.lease_id,))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.error("Error releasing admission lease %s: %s", admission.lease_id, e)
@@ -0,0 +1,156 @@
+import logging
+import re
+from datetime import date
+from rapidfuzz import fuzz
+from chatbot.text import NormalizedText
+
+logger = logging.getLogger(__name__)
+
+UNIT_HOURS = {"minute": 1 / 60, "hour": 1, "day": 24, "night": 24, "week": 168, "month": 730, "year": 8760}
+WORD_NUMBERS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15, "twenty": 20, "thirty": 30,
+    "a couple": 2, "couple": 2, "a few": 3, "few": 3, "several": 4, "a half": 0.5, "half a": 0.5, "half an": 0.5,
+}
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+_NUMBER = r"\d+(?:\.\d+)?|" + "|".join(sorted((re.escape(w) for w in WORD_NUMBERS), key=len, reverse=True))
+_UNIT = r"(minute|hour|day|night|week|month|year)s?"
+# "3 days", "a couple of weeks", "2-3 days", "two or three weeks", "half an hour"
+DURATION = re.compile(rf"\b({_NUMBER})(?:\s*(?:-|to|or)\s*({_NUMBER}))?\s+(?:of\s+)?{_UNIT}\b")
+# "since yesterday", "last week", "this morning", "since monday"
+RELATIVE = {
+    re.compile(r"\b(this morning|today|tonight|this afternoon|this evening|few hours)\b"): 6,
+    re.compile(r"\b(last night|yesterday)\b"): 24,
+    re.compile(r"\b(last|past) week(end)?\b"): 168,
+    re.compile(r"\b(last|past) month\b"): 730,
+    re.compile(r"\b(last|past) year\b"): 8760,
+}
+SINCE_WEEKDAY = re.compile(r"\b(?:since|on|last) (" + "|".join(WEEKDAYS) + r")\b")
+# Duration question options, e.g. "less than 24 hours", "more than 3 months", "between 1 and 7 days"
+LESS_THAN = re.compile(rf"\b(?:less than|under|up to|within)\s+({_NUMBER})\s+{_UNIT}")
+MORE_THAN = re.compile(rf"\b(?:more than|over|longer than|at least)\s+({_NUMBER})\s+{_UNIT}")
+BETWEEN = re.compile(rf"\b(?:between\s+)?({_NUMBER})\s*(?:-|to|and)\s*({_NUMBER})\s+{_UNIT}")
+
+YES = frozenset({"yes", "yeah", "yep", "yup", "sure", "correct", "definitely", "i do", "i have", "i am"})
+NO = frozenset({"no", "nope", "nah", "never", "not really", "i don't", "i haven't", "none"})
+UNSURE = frozenset({"not sure", "don't know", "dont know", "dunno", "maybe", "i'm not sure", "unsure", "no idea"})
+BARE_REPLIES = YES | NO | UNSURE
+CHOICES = {"yes": "present", "no": "absent", "don't know": "unknown"}
+MATCH_CUTOFF = 85
+# Shorter item names only match exactly, so a stray short word cannot pass for a misspelling
+MIN_FUZZY_LENGTH = 5
+
+
+def _number(word):
+    return float(word) if word[0].isdigit() else WORD_NUMBERS[word]
+
+
+def parse_duration(text, today=None):
+    """Returns the duration described in the text in hours, or None if there is none."""
+    text = NormalizedText.of(text).normalized
+    match = DURATION.search(text)
+    if match:
+        low, high, unit = match.groups()
+        return max(_number(low), _number(high) if high else 0) * UNIT_HOURS[unit]
+    for pattern, hours in RELATIVE.items():
+        if pattern.search(text):
+            return hours
+    match = SINCE_WEEKDAY.search(text)
+    if match:
+        today = today or date.today()
+        days = (today.weekday() - WEEKDAYS.index(match.group(1))) % 7 or 7
+        return days * 24
+    return None
+
+
+def option_range(name):
+    """Returns the (low, high) hours an option like "1 to 7 days" covers, or None."""
+    name = NormalizedText.of(name).normalized
+    match = LESS_THAN.search(name)
+    if match:
+        return 0, _number(match.group(1)) * UNIT_HOURS[match.group(2)]
+    match = MORE_THAN.search(name)
+    if match:
+        return _number(match.group(1)) * UNIT_HOURS[match.group(2)], float("inf")
+    match = BETWEEN.search(name)
+    if match:
+        return _number(match.group(1)) * UNIT_HOURS[match.group(3)], _number(match.group(2)) * UNIT_HOURS[match.group(3)]
+    return None
+
+
+def duration_evidence(hours, items):
+    """Maps a duration onto the question's options: the option whose range covers it, else the first item."""
+    ranges = [(item, option_range(item["name"])) for item in items]
+    ranged = [(item, r) for item, r in ranges if r]
+    if ranged:
+        for item, (low, high) in ranged:
+            if low <= hours <= high:
+                return [{"id": item["id"], "choice_id": "present"}]
+        # Past the last boundary: pick the closest option
+        item = min(ranged, key=lambda pair: min(abs(hours - pair[1][0]), abs(hours - pair[1][1])))[0]
+        return [{"id": item["id"], "choice_id": "present"}]
+    return [{"id": items[0]["id"], "choice_id": "present" if hours > 0 else "absent"}]
+
+
+def _leading(text, phrases):
+    words = text.words
+    return any(" ".join(words[:len(p.split())]) == p for p in phrases)
+
+
+def _mention(text, name):
+    """Token index where the text names an item, on whole words, or None.
+
+    Each run of as many words as the name has is compared with it; names of at least
+    MIN_FUZZY_LENGTH characters also match a close misspelling. Matching on word boundaries
+    keeps "no" from matching "Nosebleed" and "yes" from matching "Red eyes".
+    """
+    name = NormalizedText.of(name)
+    size, target = len(name.words), " ".join(name.words)
+    if not size:
+        return None
+    positions = [i for i, token in enumerate(text.tokens) if token[0].isalnum()]
+    for start in range(len(positions) - size + 1):
+        window = " ".join(text.tokens[i] for i in positions[start:start + size])
+        if window == target or (len(target) >= MIN_FUZZY_LENGTH and fuzz.ratio(window, target) >= MATCH_CUTOFF):
+            return positions[start]
+    return None
+
+
+def _unsure(text):
+    # "not really sure", "not 100% sure": a negated "sure" anywhere is doubt, not a denial
+    return (text.normalized in UNSURE or _leading(text, UNSURE)
+            or any("sure" in span.split() for span in text.negated_text()))
+
+
+def understand_answer(text, items):
+    """Resolves a free-text answer to evidence for the question's items without an LLM.
+
+    Bare yes/no/unsure replies are resolved first. Otherwise items named in the text (on
+    whole words) are present unless they fall inside a negation span. A leading "no" with
+    no item named denies every item; yes/unsure replies only apply to a single-item question.
+    Returns [] when the answer can't be resolved locally.
+    """
+    text = NormalizedText.of(text)
+    if not text or not items:
+        return []
+
+    if text.normalized not in BARE_REPLIES:
+        evidence = []
+        for item in items:
+            position = _mention(text, item["name"])
+            if position is None:
+                continue
+            absent = any(start <= position < end for start, end in text.negation_spans)
+            evidence.append({"id": item["id"], "choice_id": "absent" if absent else "present"})
+        if evidence:
+            return evidence
+
+    if _unsure(text):
+        return [{"id": items[0]["id"], "choice_id": "unknown"}] if len(items) == 1 else []
+    if _leading(text, NO):
+        # "no" / "none of those" with no item named denies every option
+        return [{"id": item["id"], "choice_id": "absent"} for item in items]
+    if len(items) == 1 and _leading(text, YES):
+        return [{"id": items[0]["id"], "choice_id": "present"}]
+    return []
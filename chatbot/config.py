@@ -4,4 +4,67 @@ class ChatConfig:
     PROBABILITY_THRESHOLD = 0.5
     MIN_QUESTIONS = 6
     MAX_QUESTIONS = 10
-    PROBABILITY_DIFF_THRESHOLD = 0.1
\ No newline at end of file
+    PROBABILITY_DIFF_THRESHOLD = 0.1
+    ANALYTICS_FILE = "interviews.jsonl"
+    # "merged": one structured GPT call per turn; "legacy": separate intent, vague-symptom and yes/no calls
+    TURN_UNDERSTANDING = "merged"
+    # Rendered report charts; git-ignored
+    CHART_DIR = "reports"
+    CHART_HEART_RATE_DAYS = 90
+    FITBIT_HISTORY_DB = "fitbit_history.db"
+    FITBIT_SYNC_LOOKBACK_DAYS = 7
+    VITALS_DB = "vitals.db"
+    FEEDBACK_DB = "feedback.db"
+    FEEDBACK_QUEUE_SIZE = 1000
+    FEEDBACK_BATCH_SIZE = 200
+    FEEDBACK_FLUSH_INTERVAL = 1.0
+    FEEDBACK_PUT_TIMEOUT = 0.05
+    FEEDBACK_RECENT_USERS = 10000
+    FEEDBACK_MAX_LENGTH = 2000
+    SESSIONS_DB = "sessions.db"
+    # Imported into SESSIONS_DB once, when the table is empty
+    SESSIONS_LEGACY_FILE = "sessions.json"
+    SESSION_LOCK_STRIPES = 64
+    SESSION_DIR = "flask_session"
+    SESSION_LIFETIME = 86400
+    SESSION_CLEANUP_INTERVAL = 3600
+    ADMISSION_DB = "admission.db"
+    USER_RATE_PER_MINUTE = 12
+    USER_BURST = 5
+    GLOBAL_RATE_PER_MINUTE = 300
+    GLOBAL_BURST = 30
+    # Chat turns (requests) in flight across all workers, not interviews; an idle interview holds no slot
+    MAX_CONCURRENT_TURNS = 16
+    ADMISSION_MAX_WAIT = 2.0
+    ADMISSION_LEASE_TIMEOUT = 120
+    INFERMEDICA_TIMEOUT = 8
+    OPENAI_TIMEOUT = 15
+    BREAKER_WINDOW = 20
+    BREAKER_MIN_CALLS = 5
+    BREAKER_FAILURE_RATE = 0.5
+    BREAKER_SLOW_CALL_SECONDS = 5.0
+    BREAKER_OPEN_SECONDS = 30
+    HTTP_POOL_SIZE = 10
+    # Startup warm-up (WARMUP=false to skip): keep-alive connections opened per upstream host
+    WARMUP_CONNECTIONS = 2
+    WARMUP_CONNECT_TIMEOUT = 5
+    ASSET_DIST_DIR = "static/dist"
+    COMPRESS_MIN_SIZE = 1024
+    PROFILE_DIR = "profiles"
+    PROFILE_KEEP = 50
+    PROFILE_INTERVAL = 0.005
+    PROFILE_TOKEN_MAX_AGE = 300
+    OPS_TOKEN_MAX_AGE = 300
+    # Per-worker share of the OpenAI account limits
+    OPENAI_RPM_LIMIT = 500
+    OPENAI_TPM_LIMIT = 60000
+    LLM_BUDGET_HEADROOM = 0.9
+    LLM_TRIAGE_RESERVE = 0.2
+    LLM_MAX_WAIT = (8.0, 4.0, 2.0)
+    LLM_BURST_SECONDS = 5
+    # Speculative /diagnosis for yes/no questions (SPECULATIVE_DIAGNOSIS=true)
+    SPECULATION_CHOICES = ("present", "absent")
+    SPECULATION_TTL = 120
+    SPECULATION_PER_MINUTE = 120
+    SPECULATION_MAX_INFLIGHT = 8
+    SPECULATION_MAX_INTERVIEWS = 1000
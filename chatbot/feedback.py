@@ -0,0 +1,226 @@
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from chatbot.config import ChatConfig
+from utils import serialization
+
+logger = logging.getLogger(__name__)
+
+OUTCOME, FEEDBACK = "outcome", "feedback"
+# Feedback on an interview that has not finished yet
+IN_PROGRESS = "in_progress"
+
+
+def _day(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).date().isoformat()
+
+
+class FeedbackStore:
+    """Feedback and completed-interview outcomes in SQLite, with daily per-triage-level counters.
+
+    Every batch updates `daily_stats` in the same transaction as the rows it inserts, so
+    aggregates are a read of a few small rows instead of a scan of the feedback table.
+    """
+
+    def __init__(self, db_file=ChatConfig.FEEDBACK_DB):
+        self.db_file = db_file
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS outcomes ("
+                " interview_id TEXT PRIMARY KEY, user_id TEXT NOT NULL, completed_at REAL NOT NULL,"
+                " triage_level TEXT NOT NULL, evidence TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS feedback ("
+                " id INTEGER PRIMARY KEY, ts REAL NOT NULL, user_id TEXT NOT NULL, interview_id TEXT,"
+                " triage_level TEXT NOT NULL, evidence TEXT, rating INTEGER, comment TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS feedback_interview ON feedback (interview_id)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS daily_stats ("
+                " day TEXT NOT NULL, triage_level TEXT NOT NULL, interviews INTEGER NOT NULL DEFAULT 0,"
+                " feedback INTEGER NOT NULL DEFAULT 0, rated INTEGER NOT NULL DEFAULT 0, rating_sum INTEGER NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (day, triage_level)) WITHOUT ROWID"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def write_batch(self, events):
+        """Writes queued (kind, fields) events in order, in one transaction."""
+        with self._connect() as conn:
+            for kind, fields in events:
+                if kind == OUTCOME:
+                    self._write_outcome(conn, **fields)
+                else:
+                    self._write_feedback(conn, **fields)
+
+    @staticmethod
+    def _bump(conn, ts, triage_level, interviews=0, feedback=0, rating=None):
+        conn.execute(
+            "INSERT INTO daily_stats (day, triage_level, interviews, feedback, rated, rating_sum) VALUES (?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT(day, triage_level) DO UPDATE SET interviews = interviews + excluded.interviews,"
+            " feedback = feedback + excluded.feedback, rated = rated + excluded.rated, rating_sum = rating_sum + excluded.rating_sum",
+            (_day(ts), triage_level, interviews, feedback, rating is not None, rating or 0)
+        )
+
+    def _write_outcome(self, conn, interview_id, user_id, ts, triage_level, evidence):
+        inserted = conn.execute(
+            "INSERT OR IGNORE INTO outcomes (interview_id, user_id, completed_at, triage_level, evidence) VALUES (?, ?, ?, ?, ?)",
+            (interview_id, user_id, ts, triage_level, serialization.dumps(evidence))
+        ).rowcount
+        if inserted:
+            self._bump(conn, ts, triage_level, interviews=1)
+
+    def _write_feedback(self, conn, user_id, interview_id, ts, rating, comment, evidence):
+        # A finished interview's outcome supplies the evidence and triage level; otherwise keep the snapshot
+        outcome = conn.execute(
+            "SELECT triage_level, evidence FROM outcomes WHERE interview_id = ?", (interview_id,)
+        ).fetchone() if interview_id else None
+        if outcome:
+            triage_level, evidence_json = outcome
+        else:
+            triage_level, evidence_json = IN_PROGRESS, serialization.dumps(evidence) if evidence else None
+        conn.execute(
+            "INSERT INTO feedback (ts, user_id, interview_id, triage_level, evidence, rating, comment) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (ts, user_id, interview_id, triage_level, evidence_json, rating, comment)
+        )
+        self._bump(conn, ts, triage_level, feedback=1, rating=rating)
+
+    def stats(self, days=30):
+        """Feedback totals, per triage level and per day for the last `days` days, from the daily counters."""
+        since = (datetime.now(timezone.utc).date() - timedelta(days=days - 1)).isoformat()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT day, triage_level, interviews, feedback, rated, rating_sum FROM daily_stats WHERE day >= ? ORDER BY day",
+                (since,)
+            ).fetchall()
+
+        def summarize(groups):
+            return {
+                key: {
+                    "interviews": interviews, "feedback": feedback,
+                    "feedback_rate": round(feedback / interviews, 3) if interviews else None,
+                    "avg_rating": round(rating_sum / rated, 2) if rated else None,
+                }
+                for key, (interviews, feedback, rated, rating_sum) in groups.items()
+            }
+
+        by_triage, by_day, total = {}, {}, {"all": [0, 0, 0, 0]}
+        for day, triage_level, *counts in rows:
+            for groups, key in ((by_triage, triage_level), (by_day, day), (total, "all")):
+                sums = groups.setdefault(key, [0, 0, 0, 0])
+                for i, count in enumerate(counts):
+                    sums[i] += count
+        return {"days": days, **summarize(total)["all"], "by_triage_level": summarize(by_triage), "by_day": summarize(by_day)}
+
+
+class FeedbackPipeline:
+    """Takes feedback and interview outcomes off the request thread and batch-writes them to a FeedbackStore.
+
+    Events go into a bounded queue. A request waits at most `put_timeout` for room, and
+    then its feedback is refused so the caller can ask the client to retry. Outcomes are never
+    waited for. Refused and lost events are counted. One background thread drains the queue in
+    batches of up to `batch_size`, or every `flush_interval` seconds, and flushes what is left at exit.
+    """
+
+    def __init__(self, store=None, maxsize=ChatConfig.FEEDBACK_QUEUE_SIZE, batch_size=ChatConfig.FEEDBACK_BATCH_SIZE,
+                 flush_interval=ChatConfig.FEEDBACK_FLUSH_INTERVAL, put_timeout=ChatConfig.FEEDBACK_PUT_TIMEOUT):
+        self.store = store or FeedbackStore()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        # user_id -> last interview this worker completed, so feedback sent after the final answer links to it
+        self._last_completed = OrderedDict()
+        self._stopping = threading.Event()
+        self.counters = {"enqueued": 0, "written": 0, "rejected": 0, "dropped": 0, "failed": 0, "batches": 0}
+        self._writer = threading.Thread(target=self._run, name="feedback-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def record_outcome(self, interview_id, user_id, evidence, triage_level):
+        """Queues a completed interview so later feedback can be linked to its evidence and triage level."""
+        with self._lock:
+            self._last_completed.pop(user_id, None)
+            self._last_completed[user_id] = interview_id
+            if len(self._last_completed) > ChatConfig.FEEDBACK_RECENT_USERS:
+                self._last_completed.popitem(last=False)
+        fields = {"interview_id": interview_id, "user_id": user_id, "ts": time.time(), "triage_level": triage_level, "evidence": evidence}
+        self._offer((OUTCOME, fields), wait=False)
+
+    def last_completed(self, user_id):
+        with self._lock:
+            return self._last_completed.get(user_id)
+
+    def submit(self, user_id, interview_id, comment=None, rating=None, evidence=None):
+        """Queues feedback; returns False when the queue stayed full (the caller should answer 503)."""
+        fields = {"user_id": user_id, "interview_id": interview_id, "ts": time.time(), "rating": rating,
+                  "comment": comment, "evidence": evidence}
+        return self._offer((FEEDBACK, fields), wait=True)
+
+    def _offer(self, event, wait):
+        try:
+            self._queue.put(event, timeout=self.put_timeout) if wait else self._queue.put_nowait(event)
+        except queue.Full:
+            with self._lock:
+                self.counters["rejected" if wait else "dropped"] += 1
+            logger.warning("Feedback queue full; %s %s", "rejected" if wait else "dropped", event[0])
+            return False
+        with self._lock:
+            self.counters["enqueued"] += 1
+        return True
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch):
+        try:
+            self.store.write_batch(batch)
+            written = len(batch)
+        except Exception as e:
+            # One bad event rolls back the whole transaction; retry singly so only that event is lost
+            logger.warning("Failed to write a batch of %s feedback events, retrying one at a time: %s", len(batch), e)
+            written = 0
+            for event in batch:
+                try:
+                    self.store.write_batch([event])
+                    written += 1
+                except Exception as e:
+                    logger.error("Failed to write %s event for user %s: %s", event[0], event[1].get("user_id"), e)
+        with self._lock:
+            self.counters["written"] += written
+            self.counters["failed"] += len(batch) - written
+            self.counters["batches"] += 1
+
+    def close(self, timeout=5.0):
+        """Stops the writer after it has flushed everything already queued."""
+        self._stopping.set()
+        self._writer.join(timeout)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counters, queue_depth=self._queue.qsize(), capacity=self._queue.maxsize)
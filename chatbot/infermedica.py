@@ -1,16 +1,17 @@
 import logging
 import requests
 import json
-from openai import OpenAI
-import httpx  # Added import for custom HTTP client
 import uuid
 from decouple import config
 from chatbot.config import ChatConfig
+from chatbot.upstream import chat_completion, infermedica_post
+from utils.circuit_breaker import CircuitOpenError, get_breaker, server_error
+from utils.logging_setup import log_payload
 
 logger = logging.getLogger(__name__)
 
 class InfermedicaClient:
-    def __init__(self):
+    def __init__(self, openai_client):
         self.api_url = "https://api.infermedica.com/v3"
         self.app_id = config("INFERMEDICA_APP_ID")
         self.app_key = config("INFERMEDICA_APP_KEY")
@@ -19,9 +20,12 @@ class InfermedicaClient:
             "App-Key": self.app_key,
             "Content-Type": "application/json"
         }
-        # Initialize OpenAI client with a custom HTTP client
-        http_client = httpx.Client()
-        self.client = OpenAI(api_key=config("OPENAI_API_KEY"), http_client=http_client)
+        # OpenAI client shared with the rest of the app
+        self.client = openai_client
+        self.breaker = get_breaker("infermedica")
+
+    def _post(self, endpoint, payload):
+        return infermedica_post(f"{self.api_url}/{endpoint}", payload, self.headers)
 
     def get_diagnosis(self, evidence, age=30, sex="male", interview_id=str(uuid.uuid4())):
         """Calls Infermedica /diagnosis."""
@@ -32,11 +36,17 @@ class InfermedicaClient:
             "interview_id": interview_id
         }
         try:
-            response = requests.post(f"{self.api_url}/diagnosis", json=payload, headers=self.headers)
-            logger.debug(f"Diagnosis response: {response.text}")
-            return response.json() if response.status_code == 200 else {"error": f"API error: {response.status_code}"}
+            response = self._post("diagnosis", payload)
+            log_payload(logger, "Diagnosis response: %s", response.status_code, payload=lambda: response.text)
+            if response.status_code == 200:
+                return response.json()
+            # `degraded` tells the caller the service itself is failing, not the request
+            return {"error": f"API error: {response.status_code}", "degraded": server_error(response)}
+        except (CircuitOpenError, requests.RequestException) as e:
+            logger.error("Infermedica diagnosis unavailable: %s", e)
+            return {"error": str(e), "degraded": True}
         except Exception as e:
-            logger.error(f"Infermedica diagnosis error: {str(e)}")
+            logger.error("Infermedica diagnosis error: %s", e)
             return {"error": str(e)}
 
     def get_triage(self, evidence, age=30, sex="male"):
@@ -46,7 +56,7 @@ class InfermedicaClient:
 
         payload = {"sex": sex, "age": {"value": age}, "evidence": evidence, "interview_id": str(uuid.uuid4())}
         try:
-            response = requests.post(f"{self.api_url}/triage", json=payload, headers=self.headers)
+            response = self._post("triage", payload)
             if response.status_code == 200:
                 triage_data = response.json()
                 triage_level = triage_data.get("triage_level", "unknown")
@@ -61,14 +71,15 @@ class InfermedicaClient:
                 }
             return {"triage_level": "unknown", "message": "We are still assessing your condition."}
         except Exception as e:
-            logger.error(f"Infermedica triage error: {str(e)}")
+            logger.error("Infermedica triage error: %s", e)
             return {"triage_level": "unknown", "message": "We are still assessing your condition."}
 
     def is_yes_no_question(self, question_text):
         """Classifies if a question is yes/no using OpenAI."""
         prompt = f"Is this a yes/no question? Respond with 'yes' or 'no'. Question: '{question_text}'"
         try:
-            response = self.client.chat.completions.create(
+            response = chat_completion(
+                self.client,
                 model="gpt-3.5-turbo",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=5,
@@ -77,7 +88,7 @@ class InfermedicaClient:
             answer = response.choices[0].message.content.strip().lower()
             return answer == "yes"
         except Exception as e:
-            logger.error(f"Error in yes/no detection: {str(e)}")
+            logger.error("Error in yes/no detection: %s", e)
             return False
 
     def format_response(self, conditions, triage_data, is_final=False):
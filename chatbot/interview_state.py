@@ -0,0 +1,149 @@
+import sys
+import time
+import uuid
+from chatbot.options import build_option_index
+
+# Evidence choices are stored as one byte each; the record format writes their first letter
+CHOICES = ("present", "absent", "unknown")
+CHOICE_CODES = {choice: code for code, choice in enumerate(CHOICES)}
+CHOICE_LETTERS = "pau"
+UNKNOWN = CHOICE_CODES["unknown"]
+
+STATE_VERSION = 1
+DEFAULT_AGE = 30
+DEFAULT_SEX = "male"
+
+
+class Evidence:
+    """Interview evidence as parallel arrays: interned symptom IDs and one-byte choice codes.
+
+    Iterating yields the Infermedica `{"id", "choice_id"}` dicts, built on demand.
+    """
+
+    __slots__ = ("ids", "choices")
+
+    def __init__(self, items=()):
+        self.ids = []
+        self.choices = bytearray()
+        self.extend(items)
+
+    def append(self, item):
+        self.ids.append(sys.intern(item["id"]))
+        self.choices.append(CHOICE_CODES.get(item.get("choice_id"), UNKNOWN))
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        return {"id": self.ids[i], "choice_id": CHOICES[self.choices[i]]}
+
+    def __iter__(self):
+        for symptom_id, code in zip(self.ids, self.choices):
+            yield {"id": symptom_id, "choice_id": CHOICES[code]}
+
+    def as_list(self):
+        """The evidence list Infermedica's /diagnosis and /triage expect."""
+        return list(self)
+
+    def __repr__(self):
+        return f"Evidence({self.as_list()!r})"
+
+
+class Question:
+    """The follow-up question awaiting an answer: its type and item IDs and names.
+
+    The option index used to match answers is built on first use and not persisted.
+    """
+
+    __slots__ = ("type", "ids", "names", "_index")
+
+    def __init__(self, question_type, ids, names):
+        self.type = question_type
+        self.ids = tuple(sys.intern(i) for i in ids)
+        self.names = tuple(names)
+        self._index = None
+
+    @classmethod
+    def from_items(cls, question_type, items):
+        return cls(question_type, [item["id"] for item in items], [item["name"] for item in items])
+
+    @property
+    def items(self):
+        """`{"id", "name"}` dicts, the shape the answer parsers take."""
+        return [{"id": i, "name": name} for i, name in zip(self.ids, self.names)]
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = build_option_index(self.type, self.items)
+        return self._index
+
+
+class InterviewState:
+    """One user's in-progress interview plus the profile fields the chat flow needs."""
+
+    __slots__ = ("_interview_id", "evidence", "last_question", "question_count", "last_activity", "age", "sex", "manual_health_data")
+
+    def __init__(self, age=DEFAULT_AGE, sex=DEFAULT_SEX):
+        self._interview_id = uuid.uuid4().bytes
+        self.evidence = Evidence()
+        self.last_question = None
+        self.question_count = 0
+        self.last_activity = time.time()
+        self.age = age
+        self.sex = sex
+        # Readings older versions kept in the session; the vitals log replaces it (see chatbot.vitals --sessions)
+        self.manual_health_data = None
+
+    @property
+    def interview_id(self):
+        return str(uuid.UUID(bytes=self._interview_id))
+
+    def set_profile(self, age, sex):
+        self.age = age
+        self.sex = sys.intern(sex) if isinstance(sex, str) else sex
+
+    def to_record(self):
+        """Versioned compact form for sessions.json: a flat list, evidence choices as one letter each."""
+        question = self.last_question
+        return [
+            STATE_VERSION, self._interview_id.hex(), self.evidence.ids,
+            "".join(CHOICE_LETTERS[code] for code in self.evidence.choices),
+            [question.type, question.ids, question.names] if question else None,
+            self.question_count, self.last_activity, self.age, self.sex, self.manual_health_data,
+        ]
+
+    @classmethod
+    def from_record(cls, record):
+        """Restores a state from `to_record` output, or from the unversioned dict sessions.json used to hold."""
+        state = cls.__new__(cls)
+        if isinstance(record, dict):
+            return cls._from_legacy(state, record)
+        if not record or record[0] != STATE_VERSION:
+            raise ValueError(f"Unsupported interview state version: {record[0] if record else None!r}")
+
+        _, interview_id, ids, choices, question, state.question_count, state.last_activity, age, sex, state.manual_health_data = record
+        state._interview_id = bytes.fromhex(interview_id)
+        state.evidence = Evidence()
+        state.evidence.ids = [sys.intern(i) for i in ids]
+        state.evidence.choices = bytearray(CHOICE_LETTERS.index(letter) for letter in choices)
+        state.last_question = Question(*question) if question else None
+        state.set_profile(age, sex)
+        return state
+
+    @staticmethod
+    def _from_legacy(state, record):
+        state._interview_id = uuid.UUID(record.get("interview_id") or str(uuid.uuid4())).bytes
+        state.evidence = Evidence(record.get("evidence", []))
+        items = record.get("last_question")
+        question_type = (record.get("last_question_index") or {}).get("type")
+        state.last_question = Question.from_items(question_type, items) if items else None
+        state.question_count = record.get("question_count", 0)
+        state.last_activity = record.get("last_activity", time.time())
+        state.set_profile(record.get("age", DEFAULT_AGE), record.get("sex", DEFAULT_SEX))
+        state.manual_health_data = record.get("manual_health_data") or None
+        return state
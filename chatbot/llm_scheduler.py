@@ -0,0 +1,209 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from decouple import config
+from chatbot.config import ChatConfig
+from utils.circuit_breaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first. Triage calls sit on a patient's turn; insights and small talk can wait or be shed.
+TRIAGE, INSIGHT, SMALL_TALK = 0, 1, 2
+PRIORITY_NAMES = ("triage", "insight", "small_talk")
+
+# Rough OpenAI accounting: ~4 characters per token plus a few tokens of framing per message
+CHARS_PER_TOKEN = 4
+TOKENS_PER_MESSAGE = 4
+DEFAULT_MAX_TOKENS = 256
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+class LLMBusyError(Exception):
+    """Raised when a call could not get RPM/TPM budget within its priority's wait limit."""
+
+    def __init__(self, priority, retry_after):
+        super().__init__(f"OpenAI budget exhausted for {PRIORITY_NAMES[priority]} call, retry in {retry_after:.1f}s")
+        self.priority = priority
+        self.retry_after = retry_after
+
+
+def estimate_tokens(kwargs):
+    """Estimates what a chat completion counts against TPM: prompt tokens plus `max_tokens`."""
+    messages = kwargs.get("messages", [])
+    prompt = sum(len(str(m.get("content", ""))) for m in messages) // CHARS_PER_TOKEN + TOKENS_PER_MESSAGE * len(messages)
+    return prompt + (kwargs.get("max_tokens") or DEFAULT_MAX_TOKENS)
+
+
+class Slot:
+    """A granted call; `used(usage)` settles the token estimate against the real usage."""
+
+    def __init__(self, estimate):
+        self.estimate = estimate
+        self.actual = None
+
+    def used(self, usage):
+        self.actual = getattr(usage, "total_tokens", None)
+
+
+class LLMScheduler:
+    """Admits OpenAI calls against requests-per-minute and tokens-per-minute budgets.
+
+    Both budgets are token buckets refilled at `headroom` of the account limit. They hold only
+    `burst_seconds` of budget, because OpenAI enforces per-minute limits over shorter windows;
+    together this slows us down before OpenAI starts answering 429. Waiting calls are
+    served in priority order; below-triage calls also leave `reserve` of each bucket for
+    triage, and give up after their priority's wait limit with LLMBusyError.
+    """
+
+    def __init__(self, rpm=ChatConfig.OPENAI_RPM_LIMIT, tpm=ChatConfig.OPENAI_TPM_LIMIT,
+                 headroom=ChatConfig.LLM_BUDGET_HEADROOM, reserve=ChatConfig.LLM_TRIAGE_RESERVE,
+                 max_wait=ChatConfig.LLM_MAX_WAIT, burst_seconds=ChatConfig.LLM_BURST_SECONDS):
+        self.request_rate = rpm * headroom / 60
+        self.token_rate = tpm * headroom / 60
+        self.request_capacity = max(1.0, self.request_rate * burst_seconds)
+        self.token_capacity = self.token_rate * burst_seconds
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self._requests = self.request_capacity
+        self._tokens = self.token_capacity
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stats = [{"calls": 0, "waited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "rejected": 0} for _ in PRIORITY_NAMES]
+        self._throttled = 0
+
+    def _refill(self, now):
+        elapsed = now - self._refilled
+        self._refilled = now
+        self._requests = min(self.request_capacity, self._requests + elapsed * self.request_rate)
+        self._tokens = min(self.token_capacity, self._tokens + elapsed * self.token_rate)
+
+    def _shortfall(self, priority, tokens):
+        """Seconds until both buckets can cover the call at this priority (0 if they can now)."""
+        keep = 0.0 if priority == TRIAGE else self.reserve
+        request_gap = 1 + keep * self.request_capacity - self._requests
+        token_gap = tokens + keep * self.token_capacity - self._tokens
+        return max(0.0, request_gap / self.request_rate, token_gap / self.token_rate)
+
+    def acquire(self, priority, tokens):
+        """Blocks until the call may run and charges its estimate; raises LLMBusyError on timeout."""
+        # A call bigger than the whole bucket would otherwise never fit
+        tokens = min(tokens, self.token_capacity * (1 - self.reserve))
+        started = time.monotonic()
+        deadline = started + self.max_wait[priority]
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = self._paused_until - now
+                    if self._queue[0] == ticket and wait <= 0:
+                        wait = self._shortfall(priority, tokens)
+                        if wait <= 0:
+                            self._requests -= 1
+                            self._tokens -= tokens
+                            self._record_wait(priority, now - started)
+                            return Slot(tokens)
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._stats[priority]["rejected"] += 1
+                        raise LLMBusyError(priority, max(wait, 0.0) or 1.0)
+                    # Not at the head: sleep until the queue moves or our deadline passes
+                    self._cond.wait(min(remaining, wait) if wait > 0 else remaining)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+
+    def _record_wait(self, priority, waited):
+        stats = self._stats[priority]
+        stats["calls"] += 1
+        if waited > 0.001:
+            stats["waited"] += 1
+            stats["wait_seconds"] += waited
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+
+    def settle(self, slot, refund=False):
+        """Returns unused budget: everything if the call never reached OpenAI, else estimate minus actual."""
+        with self._cond:
+            if refund:
+                self._requests = min(self.request_capacity, self._requests + 1)
+                self._tokens = min(self.token_capacity, self._tokens + slot.estimate)
+            elif slot.actual is not None:
+                self._tokens = min(self.token_capacity, self._tokens + slot.estimate - slot.actual)
+            self._cond.notify_all()
+
+    def throttle(self, retry_after):
+        """Holds every queued call after OpenAI answers 429 despite the budget."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            self._throttled += 1
+        logger.warning("OpenAI rate limited us; pausing LLM calls for %.1fs", retry_after)
+
+    @contextmanager
+    def slot(self, priority, tokens):
+        slot = self.acquire(priority, tokens)
+        try:
+            yield slot
+        except CircuitOpenError:
+            self.settle(slot, refund=True)
+            raise
+        except Exception as e:
+            if getattr(e, "status_code", None) == 429:
+                self.settle(slot, refund=True)
+                self.throttle(_retry_after(e))
+            else:
+                self.settle(slot)
+            raise
+        else:
+            self.settle(slot)
+
+    def snapshot(self):
+        with self._cond:
+            self._refill(time.monotonic())
+            depth = [0] * len(PRIORITY_NAMES)
+            for priority, _ in self._queue:
+                depth[priority] += 1
+            return {
+                "requests_available": round(self._requests, 1),
+                "tokens_available": round(self._tokens),
+                "throttled": self._throttled,
+                "priorities": {
+                    name: {
+                        "queue_depth": depth[priority],
+                        **{key: value for key, value in stats.items() if key not in ("wait_seconds", "max_wait_seconds")},
+                        "avg_wait_ms": round(stats["wait_seconds"] / stats["waited"] * 1000, 1) if stats["waited"] else 0.0,
+                        "max_wait_ms": round(stats["max_wait_seconds"] * 1000, 1),
+                    }
+                    for priority, (name, stats) in enumerate(zip(PRIORITY_NAMES, self._stats))
+                },
+            }
+
+
+def _retry_after(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 1.0))
+    except ValueError:
+        return 1.0
+
+
+def get_llm_scheduler():
+    """Returns the process-wide scheduler; OPENAI_RPM_LIMIT / OPENAI_TPM_LIMIT override this worker's share."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(
+                rpm=config("OPENAI_RPM_LIMIT", default=ChatConfig.OPENAI_RPM_LIMIT, cast=int),
+                tpm=config("OPENAI_TPM_LIMIT", default=ChatConfig.OPENAI_TPM_LIMIT, cast=int),
+            )
+        return _scheduler
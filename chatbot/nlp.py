@@ -1,20 +1,19 @@
 import logging
-import re
-from fuzzywuzzy import process
-from openai import OpenAI
-import requests
 import json
-import httpx
 from decouple import config
+from chatbot.answers import CHOICES, UNIT_HOURS, duration_evidence, parse_duration, understand_answer
 from chatbot.config import ChatConfig
+from chatbot.text import NormalizedText
+from chatbot.understanding import SYSTEM_PROMPT, YES_NO_TYPES, TurnUnderstanding, build_prompt
+from chatbot.upstream import chat_completion, infermedica_post
 
 logger = logging.getLogger(__name__)
 
+
 class NLPProcessor:
-    def __init__(self):
-        # Initialize OpenAI client with a custom HTTP client
-        http_client = httpx.Client()
-        self.client = OpenAI(api_key=config("OPENAI_API_KEY"), http_client=http_client)
+    def __init__(self, openai_client):
+        # OpenAI client shared with the rest of the app
+        self.client = openai_client
         self.symptom_map = {}
         self.infermedica_api_url = config('INFERMEDICA_API_URL', default='https://api.infermedica.com/v3')
         self.infermedica_headers = {
@@ -22,6 +21,8 @@ class NLPProcessor:
             "App-Key": config("INFERMEDICA_APP_KEY"),
             "Content-Type": "application/json"
         }
+        # One structured GPT call per turn when local parsing misses; "legacy" restores the separate calls
+        self.merged_turns = config("TURN_UNDERSTANDING", default=ChatConfig.TURN_UNDERSTANDING) == "merged"
         # Manual symptom mapping for common symptoms (fallback when Infermedica fails)
         self.manual_symptom_mapping = {
             "itching": "s_192",  # Itching or burning skin
@@ -34,14 +35,16 @@ class NLPProcessor:
         }
 
     def load_symptom_map(self, symptom_map):
-        self.symptom_map = symptom_map
+        # The cache is a list of [name, id] pairs; lookups below are by name
+        self.symptom_map = {name.lower(): symptom_id for name, symptom_id in (symptom_map or [])}
 
     def classify_intent(self, user_input):
         """Classifies input intent as 'medical' or 'general'."""
-        user_input = re.sub(r'([a-z])([A-Z])', r'\1 \2', user_input).lower().strip()
-        prompt = f"Classify the intent of this input as 'medical' (symptom report or health-related) or 'general' (non-medical): '{user_input}'"
+        text = NormalizedText.of(user_input)
+        prompt = f"Classify the intent of this input as 'medical' (symptom report or health-related) or 'general' (non-medical): '{text}'"
         try:
-            response = self.client.chat.completions.create(
+            response = chat_completion(
+                self.client,
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "Respond with 'medical' or 'general'."},
@@ -50,23 +53,24 @@ class NLPProcessor:
                 max_tokens=10
             )
             intent = response.choices[0].message.content.strip().lower()
-            logger.debug(f"Classified intent: {intent}")
+            logger.debug("Classified intent: %s", intent)
             return intent
         except Exception as e:
-            logger.error(f"Intent classification error: {str(e)}")
+            logger.error("Intent classification error: %s", e)
             return "medical"
 
     def interpret_vague_symptoms(self, user_input):
         """Interprets vague symptom descriptions using GPT-4."""
-        user_input = re.sub(r'([a-z])([A-Z])', r'\1 \2', user_input).lower().strip()
+        text = NormalizedText.of(user_input)
         prompt = f"""
-        The user has provided a vague symptom description: '{user_input}'. 
+        The user has provided a vague symptom description: '{text}'. 
         Interpret this description and suggest likely medical symptoms that could be associated with it.
         Return a list of symptoms in JSON format, e.g., {{"symptoms": ["fever", "fatigue"]}}.
         If the input is too vague to determine specific symptoms, return {{"symptoms": []}}.
         """
         try:
-            response = self.client.chat.completions.create(
+            response = chat_completion(
+                self.client,
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "You are a medical assistant. Respond with JSON."},
@@ -75,60 +79,110 @@ class NLPProcessor:
                 max_tokens=100
             )
             result = json.loads(response.choices[0].message.content.strip())
-            logger.debug(f"Interpreted vague symptoms: {result}")
+            logger.debug("Interpreted vague symptoms: %s", result)
             return result.get("symptoms", [])
         except Exception as e:
-            logger.error(f"Error interpreting vague symptoms: {str(e)}")
+            logger.error("Error interpreting vague symptoms: %s", e)
             return []
 
     def map_symptom_to_infermedica(self, symptom_text, age=30, sex="male"):
         """Maps a symptom description to an Infermedica symptom ID using the /suggest endpoint."""
-        symptom_text = re.sub(r'([a-z])([A-Z])', r'\1 \2', symptom_text).lower().strip()
+        symptom_text = NormalizedText.of(symptom_text)
         payload = {
-            "text": symptom_text,
+            "text": symptom_text.normalized,
             "age": {"value": age},
             "sex": sex,
             "limit": 1  # Get the top suggestion
         }
         try:
-            response = requests.post(f"{self.infermedica_api_url}/suggest", json=payload, headers=self.infermedica_headers)
+            response = infermedica_post(f"{self.infermedica_api_url}/suggest", payload, self.infermedica_headers)
             if response.status_code == 200:
                 data = response.json()
                 if data and isinstance(data, list) and len(data) > 0:
                     suggestion = data[0]
                     symptom_id = suggestion.get("id")
                     if symptom_id:
-                        logger.debug(f"Mapped symptom '{symptom_text}' to Infermedica ID: {symptom_id}")
+                        logger.debug("Mapped symptom '%s' to Infermedica ID: %s", symptom_text, symptom_id)
                         return symptom_id
-                logger.warning(f"No Infermedica suggestion found for symptom: {symptom_text}")
+                logger.warning("No Infermedica suggestion found for symptom: %s", symptom_text)
             else:
-                logger.warning(f"Infermedica /suggest failed: {response.status_code}, {response.text}")
+                logger.warning("Infermedica /suggest failed: %s, %s", response.status_code, response.text)
         except Exception as e:
-            logger.error(f"Infermedica suggest error for symptom '{symptom_text}': {str(e)}")
+            logger.error("Infermedica suggest error for symptom '%s': %s", symptom_text, e)
         return None
 
-    def parse_symptoms_infermedica(self, user_input, age=30, sex="male"):
-        """Extracts symptoms using Infermedica /parse with fallback."""
-        user_input = re.sub(r'([a-z])([A-Z])', r'\1 \2', user_input).lower().strip()
-        payload = {"text": user_input, "age": {"value": age}, "sex": sex}
+    def understand_message(self, user_input, age=30, sex="male"):
+        """Returns (intent, symptoms) for a new message.
+
+        Merged: Infermedica /parse first, since symptoms it finds make the message medical; only
+        on a miss does one GPT call return the intent and candidate symptoms together.
+        """
+        text = NormalizedText.of(user_input)
+        if not self.merged_turns:
+            if self.classify_intent(text) == "general":
+                return "general", []
+            return "medical", self.parse_symptoms_infermedica(text, age, sex)
+
+        symptoms = self._parse_mentions(text, age, sex)
+        if symptoms:
+            return "medical", symptoms
+        turn = self.understand_turn(text)
+        if turn.intent == "general":
+            return "general", []
+        return "medical", self.map_symptom_names(turn.symptoms, age, sex)
+
+    def understand_turn(self, text=None, question_text=None, items=None, duration=False, classify_question=None):
+        """One JSON-mode GPT call for whatever the turn needs: intent, symptoms, answer, duration, question type."""
+        try:
+            response = chat_completion(
+                self.client,
+                model="gpt-3.5-turbo",
+                response_format={"type": "json_object"},
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": build_prompt(text, question_text, items, duration, classify_question)}
+                ],
+                max_tokens=120,
+                temperature=0.0
+            )
+            turn = TurnUnderstanding.parse(json.loads(response.choices[0].message.content), items or ())
+            logger.debug("Turn understanding: %s", turn)
+            return turn
+        except Exception as e:
+            logger.error("Turn understanding error: %s", e)
+            return TurnUnderstanding()
+
+    def is_yes_no_question(self, question_type, question_text):
+        """Infermedica's question type answers this locally; GPT is asked only about types it doesn't document."""
+        if question_type in YES_NO_TYPES:
+            return YES_NO_TYPES[question_type]
+        return bool(self.understand_turn(classify_question=question_text).yes_no)
+
+    def _parse_mentions(self, text, age, sex):
+        """Symptoms Infermedica /parse finds in the text, or [] on a miss or error."""
+        payload = {"text": text.normalized, "age": {"value": age}, "sex": sex}
         try:
-            response = requests.post(f"{self.infermedica_api_url}/parse", json=payload, headers=self.infermedica_headers)
-            logger.debug(f"Calling Infermedica /parse with URL: {response.url}")
+            response = infermedica_post(f"{self.infermedica_api_url}/parse", payload, self.infermedica_headers)
+            logger.debug("Calling Infermedica /parse with URL: %s", response.url)
             if response.status_code == 200:
                 data = response.json()
                 mentions = data.get("mentions", [])
                 symptoms = [{"id": m["id"], "choice_id": m["choice_id"]} for m in mentions]
-                logger.debug(f"Parsed symptoms: {symptoms}")
+                logger.debug("Parsed symptoms: %s", symptoms)
                 if symptoms:
                     return symptoms
-            logger.warning(f"Parse failed or no symptoms found: {response.status_code}, {response.text}")
+            logger.warning("Parse failed or no symptoms found: %s, %s", response.status_code, response.text)
         except Exception as e:
-            logger.error(f"Infermedica parse error: {str(e)}")
+            logger.error("Infermedica parse error: %s", e)
+        return []
 
-        possible_symptoms = self.interpret_vague_symptoms(user_input)
-        if not possible_symptoms:
-            return []
+    def parse_symptoms_infermedica(self, user_input, age=30, sex="male"):
+        """Extracts symptoms using Infermedica /parse with fallback."""
+        text = NormalizedText.of(user_input)
+        return self._parse_mentions(text, age, sex) or self.map_symptom_names(self.interpret_vague_symptoms(text), age, sex)
 
+    def map_symptom_names(self, possible_symptoms, age=30, sex="male"):
+        """Maps symptom names to evidence: the cached catalog, then Infermedica /suggest, then the manual table."""
         symptoms = []
         for symptom in possible_symptoms:
             symptom_lower = symptom.lower()
@@ -145,69 +199,68 @@ class NLPProcessor:
                     if symptom_lower in self.manual_symptom_mapping:
                         symptom_id = self.manual_symptom_mapping[symptom_lower]
                         symptoms.append({"id": symptom_id, "choice_id": "present"})
-                        logger.debug(f"Manually mapped symptom '{symptom_lower}' to ID: {symptom_id}")
+                        logger.debug("Manually mapped symptom '%s' to ID: %s", symptom_lower, symptom_id)
                     else:
-                        logger.warning(f"Symptom '{symptom}' could not be mapped to an Infermedica ID")
+                        logger.warning("Symptom '%s' could not be mapped to an Infermedica ID", symptom)
         return symptoms
 
     def parse_duration_answer(self, user_input, question_text, last_question):
-        """Parses duration answers using regex or GPT-4."""
-        user_input = re.sub(r'([a-z])([A-Z])', r'\1 \2', user_input).lower().strip()
-        duration_pattern = r"(\d+)\s*(year|years|month|months|day|days|hour|hours|week|weeks)"
-        match = re.search(duration_pattern, user_input)
-        if match:
-            value = int(match.group(1))
-            unit = match.group(2)
-            choice_id = "present" if value > 0 else "absent"
-            return [{"id": last_question[0]["id"], "choice_id": choice_id}]
-        prompt = f"Interpret this duration answer for the question: '{question_text}'. Text: '{user_input}'. Return JSON: {{'value': number, 'unit': 'year/month/day/hour/week'}} or null if unclear."
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Respond with JSON or null."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=50
+        """Parses duration answers locally (numbers, word numbers, relative dates), with GPT as a last resort."""
+        text = NormalizedText.of(user_input)
+        hours = parse_duration(text)
+        if hours is None:
+            logger.debug("No local duration match, asking GPT: %s", text)
+            if self.merged_turns:
+                hours = self.understand_turn(text, question_text, last_question, duration=True).duration_hours
+                return duration_evidence(hours, last_question) if hours is not None else []
+            prompt = (
+                f"Interpret this duration answer for the question: '{question_text}'. Text: '{text}'. "
+                'Respond with a JSON object {"value": <number or null>, "unit": "minute|hour|day|week|month|year"}.'
             )
-            parsed = json.loads(response.choices[0].message.content.strip() or "null")
-            if parsed and "value" in parsed and "unit" in parsed:
-                choice_id = "present" if parsed["value"] > 0 else "absent"
-                return [{"id": last_question[0]["id"], "choice_id": choice_id}]
-            return []
-        except Exception as e:
-            logger.error(f"Duration parsing error: {str(e)}")
-            return []
+            parsed = self._structured_answer(prompt)
+            if not parsed or not isinstance(parsed.get("value"), (int, float)) or parsed.get("unit") not in UNIT_HOURS:
+                return []
+            hours = parsed["value"] * UNIT_HOURS[parsed["unit"]]
+        return duration_evidence(hours, last_question)
 
     def parse_free_text_answer(self, user_input, question_items, question_text):
-        """Parses free-text answers with negation handling."""
-        user_input = re.sub(r'([a-z])([A-Z])', r'\1 \2', user_input).lower().strip()
-        negation_pattern = r"(don't have|no|not|haven't|didn't)\s*(.+)"
-        match = re.search(negation_pattern, user_input)
-        if match:
-            negated_symptom = match.group(2).strip()
-            for item in question_items:
-                if negated_symptom in item["name"].lower():
-                    return [{"id": item["id"], "choice_id": "absent"}]
-
-        prompt = f"Interpret this free-text answer for the question: '{question_text}'. Text: '{user_input}'. Return JSON: {{'item': 'item_name', 'choice': 'yes/no/don’t know'}} or null if unclear."
+        """Parses free-text answers with negation scoping and fuzzy item matching, with GPT as a last resort."""
+        text = NormalizedText.of(user_input)
+        evidence = understand_answer(text, question_items)
+        if evidence:
+            return evidence
+
+        logger.debug("No local answer match, asking GPT: %s", text)
+        if self.merged_turns:
+            return self.understand_turn(text, question_text, question_items).answer
+        names = {item["name"].lower(): item for item in question_items}
+        prompt = (
+            f"Interpret this free-text answer for the question: '{question_text}'. Text: '{text}'. "
+            f"Options: {json.dumps(list(names))}. "
+            'Respond with a JSON object {"item": <one of the options or null>, "choice": "yes|no|don\'t know"}.'
+        )
+        parsed = self._structured_answer(prompt)
+        if not parsed or not isinstance(parsed.get("item"), str) or parsed.get("choice") not in CHOICES:
+            return []
+        item = names.get(parsed["item"].lower())
+        return [{"id": item["id"], "choice_id": CHOICES[parsed["choice"]]}] if item else []
+
+    def _structured_answer(self, prompt):
+        """Asks GPT for a JSON object (JSON mode); returns the parsed dict or None."""
         try:
-            response = self.client.chat.completions.create(
+            response = chat_completion(
+                self.client,
                 model="gpt-3.5-turbo",
+                response_format={"type": "json_object"},
                 messages=[
-                    {"role": "system", "content": "Respond with JSON or null."},
+                    {"role": "system", "content": "You interpret patient answers. Respond only with a JSON object."},
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=50
+                max_tokens=50,
+                temperature=0.0
             )
-            parsed_answer = json.loads(response.choices[0].message.content.strip() or "null")
-            if parsed_answer and "item" in parsed_answer and "choice" in parsed_answer:
-                item_name = parsed_answer["item"].lower()
-                choice = parsed_answer["choice"].lower()
-                for item in question_items:
-                    if item["name"].lower() == item_name:
-                        return [{"id": item["id"], "choice_id": {"yes": "present", "no": "absent", "don't know": "unknown"}[choice]}]
-            return []
+            parsed = json.loads(response.choices[0].message.content)
+            return parsed if isinstance(parsed, dict) else None
         except Exception as e:
-            logger.error(f"GPT free-text parsing error: {str(e)}")
-            return []
\ No newline at end of file
+            logger.error("GPT answer parsing error: %s", e)
+            return None
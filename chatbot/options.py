@@ -0,0 +1,54 @@
+import logging
+from rapidfuzz import fuzz, process
+from chatbot.text import NormalizedText
+
+logger = logging.getLogger(__name__)
+
+MATCH_CUTOFF = 80
+# Extra checkbox offered with group_multiple questions; the only answer that denies every option
+NONE_OF_THESE = "None of these"
+NONE_ANSWERS = frozenset({"none of these", "none of the above", "none"})
+
+
+def build_option_index(question_type, items):
+    """Precomputes a follow-up question's option index; built once per question by `Question.index`.
+
+    `choices` is the RapidFuzz-ready list of normalized option names, parallel to `ids`;
+    `lookup` maps each normalized name to its position for exact hits.
+    """
+    choices = [NormalizedText.of(item["name"]).normalized for item in items]
+    return {
+        "type": question_type,
+        "choices": choices,
+        "ids": [item["id"] for item in items],
+        "lookup": {choice: i for i, choice in enumerate(choices)},
+    }
+
+
+def match_options(index, answers):
+    """Maps one or more selected option labels onto evidence in a single scoring pass.
+
+    Returns None if any answer matches no option. Only the selected options are reported,
+    as present; leaving a checkbox unticked says nothing about that symptom. A
+    `group_multiple` answer of "None of these" on its own reports every option absent.
+    """
+    answers = [NormalizedText.of(answer).normalized for answer in answers]
+    if index.get("type") == "group_multiple" and any(answer in NONE_ANSWERS and answer not in index["lookup"] for answer in answers):
+        if len(answers) > 1:
+            logger.debug("'None of these' selected together with options: %s", answers)
+            return None
+        return [{"id": option_id, "choice_id": "absent"} for option_id in index["ids"]]
+    positions = [index["lookup"].get(answer) for answer in answers]
+    unresolved = [i for i, position in enumerate(positions) if position is None]
+    if unresolved:
+        # One cdist call scores every unresolved answer against every option
+        scores = process.cdist([answers[i] for i in unresolved], index["choices"], scorer=fuzz.WRatio,
+                               score_cutoff=MATCH_CUTOFF, workers=1)
+        for row, i in enumerate(unresolved):
+            best = int(scores[row].argmax())
+            if scores[row][best] < MATCH_CUTOFF:
+                logger.debug("No option matched answer: %s", answers[i])
+                return None
+            positions[i] = best
+
+    return [{"id": index["ids"][i], "choice_id": "present"} for i in sorted(set(positions))]
@@ -1,32 +1,30 @@
 import logging
 from flask import request, jsonify, render_template, session, redirect, url_for
-from openai import OpenAI
+import os
 import time
 import json
-from decouple import config
-import httpx
-from fuzzywuzzy import process
-from chatbot.session_manager import SessionManager
-from chatbot.infermedica import InfermedicaClient
-from chatbot.nlp import NLPProcessor
-from fitbit.fitbit import FitbitClient
-from utils.helpers import load_cached_symptoms
 from chatbot.config import ChatConfig
+from chatbot.interview_state import Question
+from chatbot.llm_scheduler import SMALL_TALK
+from chatbot.options import NONE_OF_THESE, match_options
+from chatbot.text import NormalizedText
+from chatbot.upstream import chat_completion
+from chatbot.vitals import vitals_evidence
+from utils import serialization
+from utils.identity import forbidden, signed_in_user_id
+from utils.logging_setup import log_payload
+from utils.ops_access import ops_only
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client with a custom HTTP client
-http_client = httpx.Client()
-client = OpenAI(api_key=config("OPENAI_API_KEY"), http_client=http_client)
 
 class ChatRoutes:
-    def __init__(self, app, session_manager, infermedica_client, nlp_processor, fitbit_client, symptom_map):
+    def __init__(self, app, components):
         self.app = app
-        self.session_manager = session_manager
-        self.infermedica_client = infermedica_client
-        self.nlp_processor = nlp_processor
-        self.fitbit_client = fitbit_client
-        self.symptom_map = symptom_map
+        # Shared services are built lazily on first use; see utils.components
+        self.components = components
+        # (cache file mtime, symptom names) served by /symptoms
+        self._symptom_names = None
 
         # Define routes with unique endpoint names
         self.app.route('/chat', methods=['GET'], endpoint='chat_get')(self.chat_get)
@@ -34,6 +32,7 @@ class ChatRoutes:
         self.app.route('/reset', methods=['POST'])(self.reset)
         self.app.route('/symptoms', methods=['GET'])(self.get_symptoms)
         self.app.route('/feedback', methods=['POST'])(self.feedback)
+        self.app.route('/feedback/stats', methods=['GET'])(ops_only(self.feedback_stats))
         self.app.route('/debug/token', methods=['GET'])(self.debug_token)
 
     def chat_get(self):
@@ -41,13 +40,11 @@ class ChatRoutes:
             return redirect(url_for('index'))
 
         user_id = session.get('user_id', 'default')
-        user_session = self.session_manager.get_session(user_id)
+        user_session = self.components.session_manager.get_session(user_id)
         smartwatch_data = None
         if 'fitbit_user' in session and session.get('access_token'):
-            self.fitbit_client.set_access_token(session.get('access_token'))
-            self.fitbit_client.set_refresh_token(session.get('refresh_token'))
-            smartwatch_data = self.fitbit_client.get_basic_fitbit_data()
-            logger.debug(f"Smartwatch Data: {smartwatch_data}")
+            smartwatch_data = self.components.fitbit_client.get_basic_fitbit_data(self.components.fitbit_client.credentials_for(session))
+            logger.debug("Smartwatch Data: %s", smartwatch_data)
         else:
             # Clear any invalid Fitbit-related session data if the user is not logged in with Fitbit
             if 'fitbit_user' in session:
@@ -62,7 +59,7 @@ class ChatRoutes:
             }
 
         # Check if health data exists
-        has_health_data = bool(user_session.get('manual_health_data', {}))
+        has_health_data = bool(self.components.vitals_log.summary(user_id))
 
         return render_template(
             'chat.html',
@@ -70,27 +67,49 @@ class ChatRoutes:
             fitbit_user='fitbit_user' in session,
             smartwatch_data=smartwatch_data,
             messages=[],
-            age=user_session.get('age'),
-            sex=user_session.get('sex'),
+            age=user_session.age,
+            sex=user_session.sex,
             has_health_data=has_health_data
         )
 
     def chat_post(self):
+        data = request.get_json(silent=True) or {}
+        # The turn reads and writes this user's session and vitals, so it must be the signed-in user
+        user_id = signed_in_user_id(data)
+        if user_id is None:
+            return forbidden(follow_up="", user_input=data.get('input', ''))
+
+        # Each turn fans out to several paid upstream calls; shed load before doing any work
+        admission = self.components.admission_controller.admit(user_id)
+        if not admission.allowed:
+            message = ("You're sending messages too quickly. Please wait a moment and try again."
+                       if admission.reason == "user_rate" else "The assistant is busy right now. Please try again shortly.")
+            response = jsonify({"message": message, "follow_up": "", "error_message": message, "user_input": data.get('input', '')})
+            response.headers['Retry-After'] = admission.retry_after_header
+            return response, 429 if admission.reason == "user_rate" else 503
+
+        try:
+            # Turns for one user run one at a time so concurrent requests cannot interleave evidence updates
+            with self.components.session_manager.lock(user_id):
+                return self._chat_turn(user_id)
+        finally:
+            self.components.admission_controller.release(admission)
+
+    def _chat_turn(self, user_id):
         try:
-            data = request.get_json()
+            data = request.get_json(silent=True)
             if not data:
                 logger.error("No JSON data received in request")
                 return jsonify({"message": "Invalid request: No JSON data provided.", "follow_up": "", "user_input": ""}), 400
 
             user_input = data.get('input', '')
-            user_id = data.get('user_id', 'default')
             answer = data.get('answer', '')
             free_text = data.get('free_text', '')
             age = int(data.get('age', 30))
             sex = data.get('sex', 'male')
 
-            # Debug: Log the received data
-            logger.debug(f"Received POST data: {data}")
+            # Debug: Log the received data (payload only for a sample of requests)
+            log_payload(logger, "Received chat POST for user_id: %s", user_id, payload=data)
 
             # Validate age (backend check)
             if age < 18:
@@ -104,112 +123,127 @@ class ChatRoutes:
             if not user_input and not answer and not free_text:
                 return jsonify({"message": "No input, answer, or description provided.", "follow_up": "", "user_input": user_input})
 
-            user_session = self.session_manager.get_session(user_id)
-            user_session["last_activity"] = time.time()
-            user_session["age"] = age
-            user_session["sex"] = sex
-            self.session_manager._save_sessions()  # Save after updating session
+            user_session = self.components.session_manager.get_session(user_id)
+            user_session.last_activity = time.time()
+            user_session.set_profile(age, sex)
+            self.components.session_manager.save_session(user_id)  # Save after updating session
 
             # Step 1: Process Initial Symptoms
             if user_input:
-                intent = self.nlp_processor.classify_intent(user_input)
+                # Normalized once; every NLP stage below reuses it instead of re-tokenizing
+                text = NormalizedText(user_input)
+                intent, symptoms = self.components.nlp_processor.understand_message(text, age, sex)
                 if intent == "general":
-                    response = client.chat.completions.create(
-                        model="gpt-3.5-turbo",
-                        messages=[
-                            {"role": "system", "content": "You are a helpful assistant."},
-                            {"role": "user", "content": f"Answer this general question: {user_input}"}
-                        ],
-                        max_tokens=100
-                    )
+                    try:
+                        response = chat_completion(
+                            self.components.openai_client,
+                            priority=SMALL_TALK,
+                            model="gpt-3.5-turbo",
+                            messages=[
+                                {"role": "system", "content": "You are a helpful assistant."},
+                                {"role": "user", "content": f"Answer this general question: {user_input}"}
+                            ],
+                            max_tokens=100
+                        )
+                    except Exception as e:
+                        logger.error("General question failed: %s", e)
+                        return jsonify({"message": "I can't answer general questions right now. Please describe your symptoms and I'll help assess them.",
+                                        "follow_up": "", "user_input": user_input})
                     return jsonify({"message": response.choices[0].message.content.strip(), "follow_up": "", "user_input": user_input})
 
-                if user_session.get("evidence") and user_session.get("question_count", 0) > 0:
-                    self.session_manager.reset_session(user_id)
-                    user_session = self.session_manager.get_session(user_id)
+                if user_session.evidence and user_session.question_count > 0:
+                    self.components.session_manager.reset_session(user_id)
+                    user_session = self.components.session_manager.get_session(user_id)
 
-                symptoms = self.nlp_processor.parse_symptoms_infermedica(user_input, age, sex)
+                if not symptoms and self.components.infermedica_client.breaker.is_open:
+                    # Infermedica is down: match against the local symptom catalog so interim triage has something to go on
+                    symptoms = self.components.local_triage.match_symptoms(user_input)
                 if not symptoms:
                     return jsonify({"message": "Couldn’t identify symptoms. Please describe them differently.", 
                                    "follow_up": "", 
                                    "error_message": "Please provide more specific symptoms or check your input.",
                                    "user_input": user_input})
 
-                user_session["evidence"].extend(symptoms)
-                user_session["question_count"] = 0
-                logger.debug(f"Appended initial evidence: {symptoms}")
-                self.session_manager._save_sessions()  # Save after updating evidence
+                user_session.evidence.extend(symptoms)
+                user_session.question_count = 0
+                logger.debug("Appended initial evidence: %s", symptoms)
+                self.components.session_manager.save_session(user_id)  # Save after updating evidence
 
             # Step 2: Process User Answers to Follow-Up Questions
             if answer or free_text:
-                if not user_session.get("last_question"):
+                question = user_session.last_question
+                if not question:
                     return jsonify({"message": "No previous question to answer. Please provide symptoms first.", "follow_up": "", "user_input": user_input})
 
                 if free_text:
-                    if user_session["last_question"] and any("long" in q["name"].lower() or "duration" in q["name"].lower() for q in user_session["last_question"]):
-                        parsed_evidence = self.nlp_processor.parse_duration_answer(free_text, user_session["last_question"][0]["name"], user_session["last_question"])
+                    text = NormalizedText(free_text)
+                    if any("long" in name.lower() or "duration" in name.lower() for name in question.names):
+                        parsed_evidence = self.components.nlp_processor.parse_duration_answer(text, question.names[0], question.items)
                     else:
-                        parsed_evidence = self.nlp_processor.parse_free_text_answer(free_text, user_session["last_question"], user_session["last_question"][0]["name"])
+                        parsed_evidence = self.components.nlp_processor.parse_free_text_answer(text, question.items, question.names[0])
                     
                     if not parsed_evidence:
                         return jsonify({"message": "Couldn’t understand your description. Please try again or select from the options.", 
                                        "follow_up": "", 
                                        "user_input": free_text})
-                    user_session["evidence"].extend(parsed_evidence)
-                    logger.debug(f"Appended free-text evidence: {parsed_evidence}")
-                    self.session_manager._save_sessions()  # Save after updating evidence
+                    user_session.evidence.extend(parsed_evidence)
+                    logger.debug("Appended free-text evidence: %s", parsed_evidence)
+                    self.components.session_manager.save_session(user_id)  # Save after updating evidence
                 else:
-                    if isinstance(answer, list):
-                        if not answer:
-                            return jsonify({"message": "No answer provided. Please select an option.", "follow_up": "", "user_input": user_input})
-                        answer_value = answer[0]
-                    else:
-                        answer_value = answer
-
-                    logger.debug(f"Processing answer: {answer_value}")
-
-                    choice_id = {"yes": "present", "no": "absent", "don't know": "unknown"}.get(answer_value.lower(), "unknown")
-                    if choice_id == "unknown" and user_session["last_question"]:
-                        item_names = [item["name"].lower() for item in user_session["last_question"]]
-                        match = process.extractOne(answer_value.lower(), item_names, score_cutoff=80)
-                        if match:
-                            selected_item = next(item for item in user_session["last_question"] if item["name"].lower() == match[0])
-                            user_session["evidence"].append({"id": selected_item["id"], "choice_id": "present"})
-                        else:
+                    answers = answer if isinstance(answer, list) else [answer]
+                    if not answers:
+                        return jsonify({"message": "No answer provided. Please select an option.", "follow_up": "", "user_input": user_input})
+                    answer_value = answers[0]
+
+                    logger.debug("Processing answer: %s", answers)
+
+                    choice_id = {"yes": "present", "no": "absent", "don't know": "unknown"}.get(answer_value.lower()) if len(answers) == 1 else None
+                    if choice_id is None:
+                        # Option labels: one scoring pass against the question's option index
+                        matched = match_options(question.index, answers)
+                        if not matched:
                             return jsonify({"message": "Couldn’t understand your answer. Please select from the options or describe your symptom.", 
                                            "follow_up": "", 
                                            "user_input": answer_value})
+                        user_session.evidence.extend(matched)
                     else:
-                        user_session["evidence"].append({"id": user_session["last_question"][0]["id"], "choice_id": choice_id})
+                        user_session.evidence.append({"id": question.ids[0], "choice_id": choice_id})
                     
-                    user_session["question_count"] = user_session.get("question_count", 0) + 1
-                    logger.debug(f"Updated evidence: {user_session['evidence'][-1]}, question_count: {user_session['question_count']}")
-                    self.session_manager._save_sessions()  # Save after updating evidence and question count
+                    user_session.question_count += 1
+                    logger.debug("Updated evidence: %s, question_count: %s", user_session.evidence[-1], user_session.question_count)
+                    self.components.session_manager.save_session(user_id)  # Save after updating evidence and question count
 
             # Step 3: Get Diagnosis
-            # Incorporate manual health data into evidence
-            manual_health_data = user_session.get('manual_health_data', {})
-            if 'temperature' in manual_health_data:
-                temperature = manual_health_data['temperature']
-                if temperature >= 38.0:  # Fever threshold
-                    user_session["evidence"].append({"id": "s_98", "choice_id": "present"})  # Fever
-                    self.session_manager._save_sessions()  # Save after updating evidence
-            if 'blood_pressure' in manual_health_data:
-                bp = manual_health_data['blood_pressure']
-                systolic = bp['systolic']
-                diastolic = bp['diastolic']
-                if systolic >= 140 or diastolic >= 90:  # Hypertension threshold
-                    user_session["evidence"].append({"id": "s_99", "choice_id": "present"})  # High blood pressure
-                    self.session_manager._save_sessions()  # Save after updating evidence
-
-            diagnosis = self.infermedica_client.get_diagnosis(
-                evidence=user_session["evidence"],
-                age=age,
-                sex=sex,
-                interview_id=user_session["interview_id"]
-            )
+            # Incorporate manual health data into evidence (precomputed rollups, one lookup)
+            health_evidence = vitals_evidence(self.components.vitals_log.summary(user_id))
+            # Vitals are checked every turn; only evidence not already recorded is added
+            new_health_evidence = [item for item in health_evidence if item["id"] not in user_session.evidence.ids]
+            if new_health_evidence:
+                user_session.evidence.extend(new_health_evidence)
+                self.components.session_manager.save_session(user_id)  # Save after updating evidence
+
+            # A yes/no answer to the previous question may already have its diagnosis computed
+            evidence = user_session.evidence.as_list()
+            speculator = self.components.speculator
+            diagnosis = speculator.take(user_session.interview_id, evidence, age, sex) if speculator else None
+            if diagnosis is None:
+                diagnosis = self.components.infermedica_client.get_diagnosis(
+                    evidence=evidence,
+                    age=age,
+                    sex=sex,
+                    interview_id=user_session.interview_id
+                )
+            if diagnosis.get("degraded"):
+                # Upstream outage: answer immediately from the local rule table and keep the evidence for when it recovers
+                triage_level, response_text = self.components.local_triage.guidance(user_session.evidence)
+                logger.warning("Serving local interim triage (%s) for user_id: %s", triage_level, user_id)
+                return jsonify({"message": response_text,
+                               "follow_up": "",
+                               "degraded": True,
+                               "triage_level": triage_level,
+                               "user_input": user_input if user_input else (answer if answer else free_text)})
             if "error" in diagnosis:
-                logger.error(f"Diagnosis error payload: {json.dumps({'evidence': user_session['evidence'], 'interview_id': user_session['interview_id']})}")
+                logger.error("Diagnosis error payload: %s", json.dumps({'evidence': user_session.evidence.as_list(), 'interview_id': user_session.interview_id}))
                 return jsonify({"message": f"Diagnosis error: {diagnosis['error']}. Please try again or contact support.", 
                                "follow_up": "", 
                                "error_message": "Diagnosis failed. Please try again or contact support.",
@@ -219,23 +253,29 @@ class ChatRoutes:
             conditions = diagnosis.get("conditions", [])
             top_condition = max(conditions, key=lambda c: c["probability"]) if conditions else {"name": "Unknown", "probability": 0}
             should_stop = (
-                user_session.get("question_count", 0) >= ChatConfig.MIN_QUESTIONS and 
+                user_session.question_count >= ChatConfig.MIN_QUESTIONS and 
                 top_condition["probability"] >= ChatConfig.PROBABILITY_THRESHOLD
-            ) or user_session.get("question_count", 0) >= ChatConfig.MAX_QUESTIONS or diagnosis.get("should_stop", False)
+            ) or user_session.question_count >= ChatConfig.MAX_QUESTIONS or diagnosis.get("should_stop", False)
 
-            logger.debug(f"Diagnosis conditions: {conditions}, top_condition: {top_condition}, should_stop: {should_stop}, question_count: {user_session.get('question_count', 0)}")
+            logger.debug("Diagnosis conditions: %s, top_condition: %s, should_stop: %s, question_count: %s", conditions, top_condition, should_stop, user_session.question_count)
 
             # Step 5: Get Triage if Stopping
-            triage_data = self.infermedica_client.get_triage(user_session["evidence"], age=age, sex=sex) if should_stop else {"triage_level": "unknown", "message": "We are still assessing your condition."}
+            triage_data = self.components.infermedica_client.get_triage(user_session.evidence.as_list(), age=age, sex=sex) if should_stop else {"triage_level": "unknown", "message": "We are still assessing your condition."}
 
             # Step 6: Handle Follow-Up Questions
+            speculation = None
+            # Captured before a final turn resets the session; clients send it back with /feedback
+            interview_id = user_session.interview_id
             if "question" in diagnosis and diagnosis["question"].get("items") and not should_stop:
-                user_session["last_question"] = diagnosis["question"]["items"]
                 question_type = diagnosis["question"]["type"]
                 question_text = diagnosis["question"]["text"]
                 items = diagnosis["question"]["items"]
+                user_session.last_question = Question.from_items(question_type, items)
 
-                is_binary_question = self.infermedica_client.is_yes_no_question(question_text)
+                if self.components.nlp_processor.merged_turns:
+                    is_binary_question = self.components.nlp_processor.is_yes_no_question(question_type, question_text)
+                else:
+                    is_binary_question = self.components.infermedica_client.is_yes_no_question(question_text)
                 if is_binary_question:
                     options = ["Yes", "No", "Don't know"]
                     ui_hint = "dropdown"
@@ -243,7 +283,7 @@ class ChatRoutes:
                     options = [item["name"] for item in items]
                     ui_hint = "dropdown"
                 elif question_type == "group_multiple":
-                    options = [item["name"] for item in items]
+                    options = [item["name"] for item in items] + [NONE_OF_THESE]
                     ui_hint = "checkboxes"
                 else:
                     options = []
@@ -256,40 +296,48 @@ class ChatRoutes:
                     "ui_hint": ui_hint,
                     "is_binary": is_binary_question
                 }
-                logger.debug(f"Follow-up question: {follow_up}")
-                self.session_manager._save_sessions()  # Save after setting last_question
+                logger.debug("Follow-up question: %s", follow_up)
+                if is_binary_question and speculator:
+                    # Vitals evidence is already in `evidence`, so the next turn only adds the answer
+                    speculation = (user_session.interview_id, evidence, age, sex, items[0]["id"])
+                self.components.session_manager.save_session(user_id)  # Save after setting last_question
             else:
-                user_session["last_question"] = None
+                user_session.last_question = None
                 follow_up = "This is my final assessment based on your symptoms."
-                self.session_manager.reset_session(user_id)
-                logger.debug(f"Triaging complete, resetting session for user_id: {user_id}")
+                self.components.analytics_engine.record_interview(interview_id, user_session.evidence.as_list(), triage_data["triage_level"])
+                self.components.feedback_pipeline.record_outcome(interview_id, user_id, user_session.evidence.as_list(), triage_data["triage_level"])
+                self.components.session_manager.reset_session(user_id)
+                logger.debug("Triaging complete, resetting session for user_id: %s", user_id)
 
             # Step 7: Format the Response
-            response_text = self.infermedica_client.format_response(conditions, triage_data, is_final=should_stop)
+            response_text = self.components.infermedica_client.format_response(conditions, triage_data, is_final=should_stop)
 
             # Step 8: Integrate Fitbit Data (only for Fitbit users)
             smartwatch_data = None
             if 'fitbit_user' in session and session.get('access_token'):
-                self.fitbit_client.set_access_token(session.get('access_token'))
-                self.fitbit_client.set_refresh_token(session.get('refresh_token'))
-                smartwatch_data = self.fitbit_client.get_basic_fitbit_data()
+                smartwatch_data = self.components.fitbit_client.get_basic_fitbit_data(self.components.fitbit_client.credentials_for(session))
             else:
                 smartwatch_data = {
                     "sp02": "N/A",
                     "heart_rate": "N/A"
                 }
 
-            logger.debug(f"Returning response: message={response_text}, follow_up={follow_up}, smartwatch_data={smartwatch_data}")
+            logger.debug("Returning response: message=%s, follow_up=%s, smartwatch_data=%s", response_text, follow_up, smartwatch_data)
 
-            return jsonify({
+            response = jsonify({
                 "message": response_text,
                 "follow_up": follow_up,
                 "smartwatch_data": smartwatch_data,
                 "error_message": "An unexpected error occurred." if "error" in diagnosis else None,
-                "user_input": user_input if user_input else (answer if answer else free_text)
+                "user_input": user_input if user_input else (answer if answer else free_text),
+                "interview_id": interview_id
             })
+            if speculation:
+                # Precompute the next /diagnosis for the likely answers once the response has gone out
+                response.call_on_close(lambda: speculator.speculate(*speculation))
+            return response
         except Exception as e:
-            logger.error(f"Error in chat_post: {str(e)}", exc_info=True)
+            logger.error("Error in chat_post: %s", e, exc_info=True)
             return jsonify({
                 "message": "An unexpected error occurred. Please try again.",
                 "follow_up": "",
@@ -299,45 +347,82 @@ class ChatRoutes:
         
     def reset(self):
         try:
-            data = request.get_json()
-            user_id = data.get('user_id', 'default')
-            self.session_manager.reset_session(user_id)
+            user_id = signed_in_user_id(request.get_json(silent=True) or {})
+            if user_id is None:
+                return forbidden(user_input=None)
+            self.components.session_manager.reset_session(user_id)
             return jsonify({"message": "Session reset successfully. Start a new diagnosis by entering your symptoms.", "user_input": None})
         except Exception as e:
-            logger.error(f"Error in reset: {str(e)}", exc_info=True)
+            logger.error("Error in reset: %s", e, exc_info=True)
             return jsonify({"message": "Error resetting session.", "error_message": str(e)}), 500
 
     def get_symptoms(self):
         try:
-            with open(ChatConfig.CACHE_FILE, 'r') as f:
-                symptoms = json.load(f)
-            return jsonify({"symptoms": [symptom[0] for symptom in symptoms]})
+            # Re-read only when the cache file has been refreshed
+            mtime = os.path.getmtime(ChatConfig.CACHE_FILE)
+            if self._symptom_names is None or self._symptom_names[0] != mtime:
+                with open(ChatConfig.CACHE_FILE, 'rb') as f:
+                    symptoms = serialization.load(f)
+                self._symptom_names = (mtime, [symptom[0] for symptom in symptoms])
+            return jsonify({"symptoms": self._symptom_names[1]})
         except FileNotFoundError:
             return jsonify({"symptoms": []}), 404
         except Exception as e:
-            logger.error(f"Error in get_symptoms: {str(e)}", exc_info=True)
+            logger.error("Error in get_symptoms: %s", e, exc_info=True)
             return jsonify({"error": "Failed to retrieve symptoms."}), 500
 
     def feedback(self):
         try:
-            data = request.get_json()
-            user_id = data.get('user_id', 'default')
+            data = request.get_json(silent=True) or {}
+            user_id = signed_in_user_id(data)
+            if user_id is None:
+                return forbidden()
             feedback_response = data.get('feedback')
-            if not user_id or not feedback_response:
-                return jsonify({"message": "User ID and feedback are required"}), 400
-
-            logger.info(f"Feedback from user {user_id}: {feedback_response}")
-            return jsonify({"message": "Thank you for your feedback!"})
+            if not feedback_response:
+                return jsonify({"message": "Feedback is required"}), 400
+            if not isinstance(feedback_response, str):
+                return jsonify({"message": "Feedback must be text"}), 400
+            if len(feedback_response) > ChatConfig.FEEDBACK_MAX_LENGTH:
+                return jsonify({"message": f"Feedback must be at most {ChatConfig.FEEDBACK_MAX_LENGTH} characters"}), 400
+
+            rating = data.get('rating')
+            if rating is not None and (not isinstance(rating, int) or isinstance(rating, bool) or not 1 <= rating <= 5):
+                return jsonify({"message": "Rating must be a whole number from 1 to 5"}), 400
+
+            # Link to the interview the client names, else the one this user just finished, else the one in progress
+            pipeline = self.components.feedback_pipeline
+            requested = data.get('interview_id')
+            interview_id = pipeline.last_completed(user_id)
+            evidence = None
+            if not interview_id or (requested and requested != interview_id):
+                user_session = self.components.session_manager.get_session(user_id)
+                interview_id = user_session.interview_id
+                evidence = user_session.evidence.as_list() if user_session.evidence else None
+            # A client may only name this user's last finished or current interview, not anyone else's
+            if requested and requested != interview_id:
+                return jsonify({"message": "Unknown interview_id for this user"}), 400
+
+            if not pipeline.submit(user_id, interview_id, comment=feedback_response, rating=rating, evidence=evidence):
+                response = jsonify({"message": "We couldn't save your feedback right now. Please try again shortly."})
+                response.headers['Retry-After'] = '1'
+                return response, 503
+            logger.debug("Queued feedback from user %s for interview %s", user_id, interview_id)
+            return jsonify({"message": "Thank you for your feedback!", "interview_id": interview_id})
         except Exception as e:
-            logger.error(f"Error in feedback: {str(e)}", exc_info=True)
+            logger.error("Error in feedback: %s", e, exc_info=True)
             return jsonify({"message": "Error submitting feedback.", "error_message": str(e)}), 500
 
+    def feedback_stats(self):
+        # Read from the daily counters the writer maintains, not from the feedback rows
+        days = min(max(request.args.get('days', 30, type=int), 1), 365)
+        return jsonify(self.components.feedback_pipeline.store.stats(days=days))
+
     def debug_token(self):
         try:
-            logger.debug(f"Current session contents: {dict(session)}")
+            logger.debug("Current session keys: %s", sorted(session.keys()))
             if 'access_token' in session:
                 return jsonify({"access_token": session['access_token']})
             return jsonify({"error": "No access token found"}), 400
         except Exception as e:
-            logger.error(f"Error in debug_token: {str(e)}", exc_info=True)
+            logger.error("Error in debug_token: %s", e, exc_info=True)
             return jsonify({"error": "Failed to retrieve token."}), 500
\ No newline at end of file
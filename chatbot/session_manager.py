@@ -1,71 +1,103 @@
 import logging
 from collections import defaultdict
-import uuid
-import time
-import json
+from contextlib import contextmanager
 import os
+import sqlite3
+import threading
+from chatbot.config import ChatConfig
+from chatbot.interview_state import InterviewState
+from utils import serialization
 
 logger = logging.getLogger(__name__)
 
 class SessionManager:
-    def __init__(self, storage_file="sessions.json"):
-        self.storage_file = storage_file
-        self.sessions = defaultdict(lambda: {
-            "interview_id": str(uuid.uuid4()),
-            "evidence": [],
-            "last_question": None,
-            "question_count": 0,
-            "last_activity": time.time(),
-            "age": 30,
-            "sex": "male"
-        })
+    """In-progress interviews, kept in memory and persisted one SQLite row per user.
+
+    A save writes only the user that changed, so its cost does not grow with the number of sessions.
+    """
+
+    def __init__(self, db_file=ChatConfig.SESSIONS_DB, legacy_file=None):
+        self.db_file = db_file
+        self.sessions = defaultdict(InterviewState)
+        # Striped per-user locks serialize turns for one user without blocking everyone else
+        self._locks = [threading.RLock() for _ in range(ChatConfig.SESSION_LOCK_STRIPES)]
+        self._sessions_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS sessions (user_id TEXT PRIMARY KEY, record TEXT NOT NULL) WITHOUT ROWID")
+            if legacy_file and not conn.execute("SELECT 1 FROM sessions LIMIT 1").fetchone():
+                self._import_legacy(conn, legacy_file)
         self._load_sessions()
 
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=10)
+        try:
+            # WAL without a sync per commit: a crash may lose the last turn, never corrupt the file
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _import_legacy(self, conn, legacy_file):
+        """Copies a sessions.json written by earlier versions into the empty table."""
+        if not os.path.exists(legacy_file):
+            return
+        try:
+            with open(legacy_file, 'rb') as f:
+                loaded_sessions = serialization.load(f)
+            conn.executemany(
+                "INSERT OR REPLACE INTO sessions (user_id, record) VALUES (?, ?)",
+                [(user_id, serialization.dumps(InterviewState.from_record(record).to_record()))
+                 for user_id, record in loaded_sessions.items()]
+            )
+            logger.info("Imported %s sessions from %s", len(loaded_sessions), legacy_file)
+        except Exception as e:
+            logger.error("Error importing sessions from %s: %s", legacy_file, e)
+
     def _load_sessions(self):
-        """Load sessions from the storage file if it exists."""
-        if os.path.exists(self.storage_file):
+        """Load all stored sessions into memory; a row that fails to decode is skipped, not the rest."""
+        try:
+            with self._connect() as conn:
+                rows = conn.execute("SELECT user_id, record FROM sessions").fetchall()
+        except sqlite3.Error as e:
+            logger.error("Error loading sessions from %s: %s", self.db_file, e)
+            return
+        skipped = 0
+        for user_id, record in rows:
             try:
-                with open(self.storage_file, 'r') as f:
-                    loaded_sessions = json.load(f)
-                    # Convert loaded sessions to defaultdict
-                    for user_id, session_data in loaded_sessions.items():
-                        self.sessions[user_id] = session_data
-                logger.debug(f"Loaded sessions from {self.storage_file}: {self.sessions}")
+                self.sessions[user_id] = InterviewState.from_record(serialization.loads(record))
             except Exception as e:
-                logger.error(f"Error loading sessions from {self.storage_file}: {str(e)}")
-                self.sessions = defaultdict(lambda: {
-                    "interview_id": str(uuid.uuid4()),
-                    "evidence": [],
-                    "last_question": None,
-                    "question_count": 0,
-                    "last_activity": time.time(),
-                    "age": 30,
-                    "sex": "male"
-                })
+                skipped += 1
+                logger.error("Skipping unreadable session for user_id %s in %s: %s", user_id, self.db_file, e)
+        logger.debug("Loaded %s sessions from %s (%s skipped)", len(self.sessions), self.db_file, skipped)
+
+    def lock(self, user_id):
+        """Returns the re-entrant lock guarding `user_id`'s session."""
+        return self._locks[hash(user_id) % len(self._locks)]
 
-    def _save_sessions(self):
-        """Save sessions to the storage file."""
+    def save_session(self, user_id):
+        """Persists one user's session after it was mutated under `lock(user_id)`."""
         try:
-            with open(self.storage_file, 'w') as f:
-                json.dump(dict(self.sessions), f)
-            logger.debug(f"Saved sessions to {self.storage_file}")
+            with self.lock(user_id):
+                encoded = serialization.dumps(self.get_session(user_id).to_record())
+                # Written under the user's lock so an older state can never overwrite a newer one
+                with self._connect() as conn:
+                    conn.execute("INSERT OR REPLACE INTO sessions (user_id, record) VALUES (?, ?)", (user_id, encoded))
+            logger.debug("Saved session for user_id: %s", user_id)
         except Exception as e:
-            logger.error(f"Error saving sessions to {self.storage_file}: {str(e)}")
+            logger.error("Error saving session for %s to %s: %s", user_id, self.db_file, e)
 
     def get_session(self, user_id):
-        logger.debug(f"Retrieving session for user_id: {user_id}, session: {self.sessions[user_id]}")
-        return self.sessions[user_id]
+        with self._sessions_lock:
+            user_session = self.sessions[user_id]
+        logger.debug("Retrieving session for user_id: %s", user_id)
+        return user_session
 
     def reset_session(self, user_id):
         """Resets session data for a given user_id."""
-        self.sessions[user_id] = {
-            "interview_id": str(uuid.uuid4()),
-            "evidence": [],
-            "last_question": None,
-            "question_count": 0,
-            "last_activity": time.time(),
-            "age": 30,
-            "sex": "male"
-        }
-        self._save_sessions()
-        logger.debug(f"Reset session for user_id: {user_id}, new session: {self.sessions[user_id]}")
\ No newline at end of file
+        with self.lock(user_id), self._sessions_lock:
+            self.sessions[user_id] = InterviewState()
+        self.save_session(user_id)
+        logger.debug("Reset session for user_id: %s", user_id)
@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from chatbot.config import ChatConfig
+from utils.single_flight import request_key
+
+logger = logging.getLogger(__name__)
+
+
+class DiagnosisSpeculator:
+    """Runs /diagnosis for a yes/no question's likely answers while the user is still choosing.
+
+    Each interview keeps the futures of its latest speculation, keyed by the exact evidence
+    the next turn would send, for `ttl` seconds. `take` hands back the matching diagnosis,
+    waiting for it if the call is still in flight, and drops the rest. Speculative calls are
+    billed Infermedica requests, so they are capped by a per-minute budget and a concurrency
+    limit, and skipped while Infermedica's breaker is open.
+    """
+
+    def __init__(self, infermedica_client, choices=ChatConfig.SPECULATION_CHOICES, ttl=ChatConfig.SPECULATION_TTL,
+                 per_minute=ChatConfig.SPECULATION_PER_MINUTE, max_inflight=ChatConfig.SPECULATION_MAX_INFLIGHT,
+                 max_interviews=ChatConfig.SPECULATION_MAX_INTERVIEWS):
+        self.client = infermedica_client
+        self.choices = choices
+        self.ttl = ttl
+        self.max_inflight = max_inflight
+        self.max_interviews = max_interviews
+        # Budget bucket refilled at `per_minute`, holding at most 10 seconds' worth
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * 10)
+        self._budget = self.capacity
+        self._refilled = time.monotonic()
+        self._inflight = 0
+        # interview_id -> (expires, {evidence key: future}); insertion order is expiry order
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="speculate")
+        self.counters = {"launched": 0, "skipped": 0, "hits": 0, "joined": 0, "misses": 0, "wasted": 0, "failed": 0}
+
+    @staticmethod
+    def key(evidence, age, sex):
+        return request_key(age, sex, evidence)
+
+    def speculate(self, interview_id, evidence, age, sex, question_id):
+        """Starts background /diagnosis calls for each likely answer to a yes/no question about `question_id`."""
+        if self.client.breaker.is_open:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            slots = {}
+            self._entries.pop(interview_id, None)
+            self._entries[interview_id] = (now + self.ttl, slots)
+            while len(self._entries) > self.max_interviews:
+                self._discard(next(iter(self._entries)))
+            for choice in self.choices:
+                if self._inflight >= self.max_inflight or not self._spend(now):
+                    self.counters["skipped"] += 1
+                    continue
+                candidate = evidence + [{"id": question_id, "choice_id": choice}]
+                self._inflight += 1
+                self.counters["launched"] += 1
+                future = self._pool.submit(self._diagnose, candidate, age, sex, interview_id)
+                slots[self.key(candidate, age, sex)] = future
+        logger.debug("Speculating %s answers for interview %s", len(slots), interview_id)
+
+    def take(self, interview_id, evidence, age, sex):
+        """Returns the speculative diagnosis for this exact evidence, or None on a miss."""
+        with self._lock:
+            entry = self._entries.pop(interview_id, None)
+            if entry is None:
+                return None
+            expires, slots = entry
+            future = slots.pop(self.key(evidence, age, sex), None) if expires > time.monotonic() else None
+            self.counters["wasted"] += len(slots)
+            if future is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["hits" if future.done() else "joined"] += 1
+
+        # Still in flight: waiting for it beats starting the same call again
+        diagnosis = future.result()
+        return None if "error" in diagnosis else diagnosis
+
+    def _diagnose(self, evidence, age, sex, interview_id):
+        try:
+            diagnosis = self.client.get_diagnosis(evidence=evidence, age=age, sex=sex, interview_id=interview_id)
+        except Exception as e:
+            logger.error("Speculative diagnosis failed: %s", e)
+            diagnosis = {"error": str(e)}
+        with self._lock:
+            self._inflight -= 1
+            if "error" in diagnosis:
+                self.counters["failed"] += 1
+        return diagnosis
+
+    def _spend(self, now):
+        self._budget = min(self.capacity, self._budget + (now - self._refilled) * self.rate)
+        self._refilled = now
+        if self._budget < 1:
+            return False
+        self._budget -= 1
+        return True
+
+    def _expire(self, now):
+        for interview_id, (expires, _) in list(self._entries.items()):
+            if expires > now:
+                break
+            self._discard(interview_id)
+
+    def _discard(self, interview_id):
+        _, slots = self._entries.pop(interview_id)
+        self.counters["wasted"] += len(slots)
+
+    def snapshot(self):
+        with self._lock:
+            answered = self.counters["hits"] + self.counters["joined"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "in_flight": self._inflight,
+                "interviews": len(self._entries),
+                "hit_rate": round((self.counters["hits"] + self.counters["joined"]) / answered, 3) if answered else None,
+            }
@@ -0,0 +1,78 @@
+import re
+from functools import cached_property
+
+CAMEL_CASE = re.compile(r'([a-z])([A-Z])')
+WHITESPACE = re.compile(r'\s+')
+TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?|[.,;:!?]")
+
+# NegEx-style cues: a negation covers the following tokens up to a clause terminator
+NEGATION_CUES = frozenset({"no", "not", "never", "without", "none", "denies", "don't", "dont", "haven't", "havent",
+                           "didn't", "didnt", "doesn't", "doesnt", "isn't", "isnt", "aren't", "wasn't", "hasn't", "nor"})
+NEGATION_TERMINATORS = frozenset({".", ",", ";", ":", "!", "?", "but", "however", "although", "though", "except", "yet"})
+MAX_NGRAM = 3
+
+
+class NormalizedText:
+    """User text normalized once per turn and shared by every NLP stage.
+
+    Holds the normalized string (camelCase split, lowercased, whitespace collapsed), its
+    tokens, negation spans and n-grams. Equal normalized strings hash equal, so instances
+    can key caches directly.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw or ""
+        self.normalized = WHITESPACE.sub(" ", CAMEL_CASE.sub(r'\1 \2', self.raw)).lower().replace("\u2019", "'").strip()
+        self.tokens = tuple(TOKEN.findall(self.normalized))
+
+    @classmethod
+    def of(cls, text):
+        """Returns `text` unchanged if it is already normalized, otherwise normalizes it."""
+        return text if isinstance(text, cls) else cls(text)
+
+    @cached_property
+    def words(self):
+        """Tokens without punctuation."""
+        return tuple(token for token in self.tokens if token[0].isalnum())
+
+    @cached_property
+    def negation_spans(self):
+        """(start, end) token ranges covered by a negation cue, end exclusive."""
+        spans = []
+        start = None
+        for i, token in enumerate(self.tokens):
+            if token in NEGATION_CUES:
+                if start is None:
+                    start = i + 1
+            elif token in NEGATION_TERMINATORS and start is not None:
+                if i > start:
+                    spans.append((start, i))
+                start = None
+        if start is not None and len(self.tokens) > start:
+            spans.append((start, len(self.tokens)))
+        return tuple(spans)
+
+    def negated_text(self):
+        """The words inside negation spans, one string per span."""
+        return [" ".join(t for t in self.tokens[start:end] if t[0].isalnum()) for start, end in self.negation_spans]
+
+    @cached_property
+    def ngrams(self):
+        """Set of 1..3-word n-grams, for phrase lookups against symptom names and options."""
+        words = self.words
+        return frozenset(" ".join(words[i:i + n]) for n in range(1, MAX_NGRAM + 1) for i in range(len(words) - n + 1))
+
+    def __str__(self):
+        return self.normalized
+
+    def __repr__(self):
+        return f"NormalizedText({self.normalized!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, NormalizedText) and self.normalized == other.normalized
+
+    def __hash__(self):
+        return hash(self.normalized)
+
+    def __bool__(self):
+        return bool(self.normalized)
@@ -0,0 +1,104 @@
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Checked in order; a symptom name starting with any prefix maps to that level
+TRIAGE_RULES = (
+    ("emergency", (
+        "chest pain, severe", "chest pain, continuing during rest", "dyspnea, breathing with effort at rest",
+        "loss of consciousness", "consciousness disturbances, acute", "seizures", "hemoptysis, massive", "hematemesis",
+        "sudden onset speech and language impairment", "speech and language impairment, rapid onset",
+        "muscle weakness, hemiparesis", "bilateral muscle paralysis", "active suicide attempt", "suicidal intent",
+        "red-coloured stool, heavy bleeding", "bleeding from anus, heavy", "headache, sudden onset",
+        "fever, higher than 104",
+    )),
+    ("consultation_24", (
+        "chest pain", "dyspnea", "hemoptysis", "black-coloured stool", "stiff neck", "confusion",
+        "suicidal thoughts", "abdominal pain, severe", "dizziness, sudden and severe", "fever, between 38",
+        "vomiting, 7 days or more", "blood clots in urine", "headache, sudden worsening",
+    )),
+    ("consultation", (
+        "fever", "vomiting", "bleeding", "abdominal pain", "back pain, severe", "dysphagia",
+    )),
+)
+
+# Symptom combinations that escalate beyond their individual levels
+COMBINATION_RULES = (
+    ("emergency", ("chest pain", "dyspnea")),
+    ("emergency", ("fever", "stiff neck")),
+)
+
+# Everyday phrasings for catalog symptoms, used when matching free text locally
+ALIASES = {
+    "shortness of breath": "dyspnea",
+    "short of breath": "dyspnea",
+    "can't breathe": "dyspnea",
+    "passed out": "loss of consciousness",
+    "fainted": "loss of consciousness",
+    "coughing up blood": "hemoptysis",
+    "vomiting blood": "hematemesis",
+    "throwing up": "vomiting",
+    "high temperature": "fever",
+}
+
+TRIAGE_GUIDANCE = {
+    "emergency": "Some of your symptoms can be serious. **Seek immediate medical attention or call your local emergency number.**",
+    "consultation_24": "It is recommended that you see a doctor **within 24 hours**.",
+    "consultation": "You should consult a doctor soon, especially if your symptoms persist or get worse.",
+    "self_care": "Your symptoms may be manageable at home with rest and hydration. Contact a doctor if they worsen.",
+}
+
+DEGRADED_NOTICE = (
+    "**Our diagnosis service is temporarily unavailable.** This is interim guidance from a basic rule check, "
+    "not a diagnosis. Your answers are saved; please try again in a few minutes for a full assessment."
+)
+
+
+class LocalTriage:
+    """Rule-based interim triage from the cached symptom catalog, used while Infermedica is unavailable."""
+
+    def __init__(self, symptom_map):
+        pairs = symptom_map.items() if isinstance(symptom_map, dict) else (symptom_map or [])
+        self.symptom_names = {}
+        self.name_to_id = {}
+        for name, symptom_id in pairs:
+            self.symptom_names[symptom_id] = name.lower()
+            self.name_to_id.setdefault(name.lower(), symptom_id)
+        # Longest names first so "chest pain, severe" wins over "chest pain"
+        self._names_by_length = sorted(self.name_to_id, key=len, reverse=True)
+
+    def match_symptoms(self, text):
+        """Finds catalog symptom names mentioned in free text; returns Infermedica-style evidence."""
+        text = " " + re.sub(r"[^a-z0-9' ]+", " ", text.lower()) + " "
+        for phrase, name in ALIASES.items():
+            text = text.replace(f" {phrase} ", f" {name} ")
+        evidence, seen = [], set()
+        for name in self._names_by_length:
+            if f" {name} " in text and self.name_to_id[name] not in seen:
+                seen.add(self.name_to_id[name])
+                evidence.append({"id": self.name_to_id[name], "choice_id": "present"})
+                text = text.replace(f" {name} ", " ")
+        logger.debug("Locally matched %s symptoms", len(evidence))
+        return evidence
+
+    def triage(self, evidence):
+        """Returns (triage_level, matched symptom names) for the present evidence."""
+        present = [self.symptom_names.get(e["id"], "") for e in evidence if e.get("choice_id") == "present"]
+        for level, required in COMBINATION_RULES:
+            matched = [next((name for name in present if name.startswith(prefix)), None) for prefix in required]
+            if all(matched):
+                return level, matched
+        for level, prefixes in TRIAGE_RULES:
+            matched = [name for name in present if name.startswith(prefixes)]
+            if matched:
+                return level, matched
+        return "self_care", []
+
+    def guidance(self, evidence):
+        """Builds the clearly labelled interim response text."""
+        level, matched = self.triage(evidence)
+        response = f"{DEGRADED_NOTICE} **Interim recommendation:** {TRIAGE_GUIDANCE[level]}"
+        if matched:
+            response += " This is based on: " + ", ".join(matched) + "."
+        return level, response
@@ -0,0 +1,75 @@
+import logging
+from chatbot.answers import CHOICES, UNIT_HOURS
+
+logger = logging.getLogger(__name__)
+
+INTENTS = ("medical", "general")
+# Infermedica's documented question types; "single" is the yes / no / don't know question about one symptom
+YES_NO_TYPES = {"single": True, "group_single": False, "group_multiple": False}
+
+SYSTEM_PROMPT = (
+    "You read one turn of a symptom-checker chat. Respond only with a JSON object with exactly these keys:\n"
+    '"intent": "medical" (symptom report or health-related) or "general" (non-medical);\n'
+    '"symptoms": for a new message, the likely medical symptoms it describes, [] if too vague; otherwise [];\n'
+    '"answer": for a pending question with options, {"item": <one of the options or null>, "choice": "yes|no|don\'t know"}, else null;\n'
+    '"duration": for a pending question about how long, {"value": <number or null>, "unit": "minute|hour|day|week|month|year"}, else null;\n'
+    '"yes_no": for a question to classify, true if it is a yes/no question, else null.'
+)
+
+
+class TurnUnderstanding:
+    """What the merged GPT call made of a turn. Fields the turn did not ask about stay empty."""
+
+    __slots__ = ("intent", "symptoms", "answer", "duration_hours", "yes_no")
+
+    def __init__(self, intent="medical", symptoms=(), answer=None, duration_hours=None, yes_no=None):
+        self.intent = intent
+        self.symptoms = list(symptoms)
+        # Resolved evidence for the pending question's options
+        self.answer = answer or []
+        self.duration_hours = duration_hours
+        self.yes_no = yes_no
+
+    @classmethod
+    def parse(cls, payload, items=()):
+        """Validates the model's JSON field by field; anything malformed is dropped rather than guessed."""
+        if not isinstance(payload, dict):
+            return cls()
+        turn = cls()
+        if payload.get("intent") in INTENTS:
+            turn.intent = payload["intent"]
+        symptoms = payload.get("symptoms")
+        if isinstance(symptoms, list):
+            turn.symptoms = [s for s in symptoms if isinstance(s, str) and s.strip()]
+
+        answer = payload.get("answer")
+        if isinstance(answer, dict) and isinstance(answer.get("item"), str) and answer.get("choice") in CHOICES:
+            names = {item["name"].lower(): item for item in items}
+            item = names.get(answer["item"].lower())
+            if item:
+                turn.answer = [{"id": item["id"], "choice_id": CHOICES[answer["choice"]]}]
+
+        duration = payload.get("duration")
+        if isinstance(duration, dict) and isinstance(duration.get("value"), (int, float)) and duration.get("unit") in UNIT_HOURS:
+            turn.duration_hours = duration["value"] * UNIT_HOURS[duration["unit"]]
+
+        if isinstance(payload.get("yes_no"), bool):
+            turn.yes_no = payload["yes_no"]
+        return turn
+
+    def __repr__(self):
+        return (f"TurnUnderstanding(intent={self.intent!r}, symptoms={self.symptoms!r}, answer={self.answer!r}, "
+                f"duration_hours={self.duration_hours!r}, yes_no={self.yes_no!r})")
+
+
+def build_prompt(text=None, question_text=None, items=None, duration=False, classify_question=None):
+    """The user message for one merged call: only the parts of the turn that are present."""
+    parts = []
+    if text is not None:
+        parts.append(f"New message: '{text}'" if question_text is None else f"Reply: '{text}'")
+    if question_text is not None:
+        kind = "about how long" if duration else "with options " + str([item["name"].lower() for item in items or ()])
+        parts.append(f"Pending question ({kind}): '{question_text}'")
+    if classify_question is not None:
+        parts.append(f"Question to classify: '{classify_question}'")
+    return "\n".join(parts)
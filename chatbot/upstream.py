@@ -0,0 +1,32 @@
+import logging
+from chatbot.config import ChatConfig
+from chatbot.llm_scheduler import TRIAGE, estimate_tokens, get_llm_scheduler
+from utils.circuit_breaker import get_breaker, server_error
+from utils.http_pool import get_http_session
+from utils.single_flight import get_single_flight, request_key
+
+logger = logging.getLogger(__name__)
+
+
+def infermedica_post(url, payload, headers):
+    """POSTs to Infermedica through its circuit breaker, sharing identical in-flight calls."""
+    # interview_id only groups calls on Infermedica's side; the answer depends on the rest of the payload
+    key = request_key(url, {k: v for k, v in payload.items() if k != "interview_id"})
+    return get_single_flight("infermedica").do(
+        key, get_breaker("infermedica").call, get_http_session("infermedica").post, url, json=payload, headers=headers,
+        timeout=ChatConfig.INFERMEDICA_TIMEOUT, failed=server_error
+    )
+
+
+def chat_completion(client, priority=TRIAGE, **kwargs):
+    """Runs an OpenAI chat completion through the RPM/TPM scheduler and circuit breaker, sharing identical in-flight calls.
+
+    Only the call that actually reaches OpenAI is charged against the budget; coalesced callers ride along.
+    """
+    def scheduled():
+        with get_llm_scheduler().slot(priority, estimate_tokens(kwargs)) as slot:
+            response = get_breaker("openai").call(client.chat.completions.create, **kwargs)
+            slot.used(getattr(response, "usage", None))
+            return response
+
+    return get_single_flight("openai").do(request_key(kwargs), scheduled)
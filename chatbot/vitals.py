@@ -0,0 +1,224 @@
+"""Append-only log of manually entered vitals, with rollups kept ready for every turn.
+
+Bulk-imports historical readings from CSV (user_id,metric,timestamp,value) and migrates
+the single readings older sessions.json files kept per user:
+
+    python -m chatbot.vitals readings.csv --sessions sessions.json
+"""
+import argparse
+import csv
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from chatbot.config import ChatConfig
+
+logger = logging.getLogger(__name__)
+
+# Accepted range per metric; readings outside it are typos, not vitals
+METRICS = {"temperature": (30.0, 45.0), "systolic": (50, 260), "diastolic": (30, 160)}
+DAY = 86400
+MAX_WINDOW = DAY
+TREND_WINDOW = 7 * DAY
+FEVER = 38.0
+HYPERTENSION = (140, 90)
+ROLLUP_COLUMNS = ("latest_ts", "latest_value", "max_24h", "max_24h_ts", "trend_7d", "readings_7d", "valid_until")
+
+
+def _slope_per_day(points):
+    """Least-squares slope of (ts, value) points in units per day, or None for fewer than two distinct times."""
+    if len({ts for ts, _ in points}) < 2:
+        return None
+    origin = points[0][0]
+    days = [(ts - origin) / DAY for ts, _ in points]
+    mean_t = sum(days) / len(days)
+    mean_v = sum(value for _, value in points) / len(points)
+    covariance = sum((t - mean_t) * (value - mean_v) for t, (_, value) in zip(days, points))
+    variance = sum((t - mean_t) ** 2 for t in days)
+    return round(covariance / variance, 3)
+
+
+def parse_timestamp(value):
+    """Epoch seconds from an epoch number or an ISO 8601 string (naive times are taken as UTC)."""
+    try:
+        return float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        return (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).timestamp()
+
+
+class VitalsLog:
+    """Per-user vitals readings in SQLite, indexed by (user, metric, time), plus one rollup row per series.
+
+    Readings are only ever inserted. Each write refreshes the affected rollups: latest
+    reading, 24-hour maximum and 7-day trend. A rollup also stores when it goes stale, which
+    is when its maximum or oldest 7-day reading leaves the window. Reads are a single primary-key
+    lookup and only recompute a series once that time has passed.
+    """
+
+    def __init__(self, db_file=ChatConfig.VITALS_DB):
+        self.db_file = db_file
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS readings ("
+                " user_id TEXT NOT NULL, metric TEXT NOT NULL, ts REAL NOT NULL, value REAL NOT NULL,"
+                " PRIMARY KEY (user_id, metric, ts)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rollups ("
+                " user_id TEXT NOT NULL, metric TEXT NOT NULL, latest_ts REAL, latest_value REAL,"
+                " max_24h REAL, max_24h_ts REAL, trend_7d REAL, readings_7d INTEGER NOT NULL, valid_until REAL,"
+                " PRIMARY KEY (user_id, metric)) WITHOUT ROWID"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps the log safe to share across threads and workers
+        conn = sqlite3.connect(self.db_file, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _validate(metric, value):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown vitals metric: {metric}")
+        low, high = METRICS[metric]
+        value = float(value)
+        if not low <= value <= high:
+            raise ValueError(f"{metric} reading {value:g} is outside {low:g}-{high:g}")
+        return value
+
+    def record(self, user_id, readings, ts=None):
+        """Appends one reading per metric, e.g. {"temperature": 37.9}, taken at `ts` (default now)."""
+        ts = time.time() if ts is None else ts
+        return self.import_readings([(user_id, metric, ts, value) for metric, value in readings.items()])
+
+    def import_readings(self, rows):
+        """Bulk-inserts (user_id, metric, ts, value) rows in one transaction; duplicates are ignored.
+
+        Every touched series has its rollup refreshed once at the end. Returns the number of new readings.
+        """
+        rows = [(user_id, metric, float(ts), self._validate(metric, value)) for user_id, metric, ts, value in rows]
+        if not rows:
+            return 0
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO readings (user_id, metric, ts, value) VALUES (?, ?, ?, ?)", rows)
+            inserted = conn.total_changes - before
+            now = time.time()
+            for user_id, metric in {(user_id, metric) for user_id, metric, _, _ in rows}:
+                self._refresh(conn, user_id, metric, now)
+        logger.debug("Stored %s vitals readings (%s new)", len(rows), inserted)
+        return inserted
+
+    def _refresh(self, conn, user_id, metric, now):
+        """Recomputes and stores one series' rollup."""
+        rollup = self._compute(conn, user_id, metric, now)
+        conn.execute(
+            f"INSERT OR REPLACE INTO rollups (user_id, metric, {', '.join(ROLLUP_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (user_id, metric, *(rollup[column] for column in ROLLUP_COLUMNS))
+        )
+        return rollup
+
+    @staticmethod
+    def _compute(conn, user_id, metric, now):
+        """One series' rollup from its latest reading and the readings in the 7-day window."""
+        latest = conn.execute(
+            "SELECT ts, value FROM readings WHERE user_id = ? AND metric = ? ORDER BY ts DESC LIMIT 1", (user_id, metric)
+        ).fetchone()
+        window = conn.execute(
+            "SELECT ts, value FROM readings WHERE user_id = ? AND metric = ? AND ts > ? AND ts <= ? ORDER BY ts",
+            (user_id, metric, now - TREND_WINDOW, now)
+        ).fetchall()
+        recent = [(ts, value) for ts, value in window if ts > now - MAX_WINDOW]
+        max_ts, max_value = max(recent, key=lambda point: (point[1], point[0])) if recent else (None, None)
+
+        expiries = []
+        if window:
+            expiries.append(window[0][0] + TREND_WINDOW)
+        if max_ts is not None:
+            expiries.append(max_ts + MAX_WINDOW)
+        if latest and latest[0] > now:
+            # A reading stamped in the future enters the windows when its time comes
+            expiries.append(latest[0])
+        return dict(zip(ROLLUP_COLUMNS, (latest[0] if latest else None, latest[1] if latest else None, max_value, max_ts,
+                                         _slope_per_day(window), len(window), min(expiries) if expiries else None)))
+
+    def summary(self, user_id):
+        """Returns {metric: rollup} for the user's series, refreshing only the ones whose window moved."""
+        now = time.time()
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT metric, {', '.join(ROLLUP_COLUMNS)} FROM rollups WHERE user_id = ?", (user_id,)
+            ).fetchall()
+            summary = {}
+            for metric, *rollup in rows:
+                rollup = dict(zip(ROLLUP_COLUMNS, rollup))
+                if rollup["valid_until"] is not None and rollup["valid_until"] <= now:
+                    rollup = self._refresh(conn, user_id, metric, now)
+                summary[metric] = rollup
+        return summary
+
+    def series(self, user_id, metric, start=None, end=None):
+        """Returns [(ts, value), ...] for a metric, oldest first."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT ts, value FROM readings WHERE user_id = ? AND metric = ? AND ts >= ? AND ts <= ? ORDER BY ts",
+                (user_id, metric, start or 0, end or float("inf"))
+            ).fetchall()
+
+
+def vitals_evidence(summary, now=None):
+    """Evidence implied by the user's recent vitals: fever in the last 24 hours, high blood pressure this week."""
+    now = time.time() if now is None else now
+    evidence = []
+    temperature = summary.get("temperature")
+    if temperature and temperature["max_24h"] is not None and temperature["max_24h"] >= FEVER:
+        evidence.append({"id": "s_98", "choice_id": "present"})  # Fever
+    systolic, diastolic = summary.get("systolic"), summary.get("diastolic")
+    if systolic and diastolic and systolic["latest_ts"] > now - TREND_WINDOW:
+        if systolic["latest_value"] >= HYPERTENSION[0] or diastolic["latest_value"] >= HYPERTENSION[1]:
+            evidence.append({"id": "s_99", "choice_id": "present"})  # High blood pressure
+    return evidence
+
+
+def _csv_rows(path):
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            yield row["user_id"], row["metric"], parse_timestamp(row["timestamp"]), row["value"]
+
+
+def _session_rows(path):
+    """Readings older sessions.json files kept in `manual_health_data`, stamped with the session's last activity."""
+    from chatbot.interview_state import InterviewState
+    from utils import serialization
+    with open(path, "rb") as f:
+        sessions = serialization.load(f)
+    for user_id, record in sessions.items():
+        state = InterviewState.from_record(record)
+        data = state.manual_health_data or {}
+        if "temperature" in data:
+            yield user_id, "temperature", state.last_activity, data["temperature"]
+        if "blood_pressure" in data:
+            yield user_id, "systolic", state.last_activity, data["blood_pressure"]["systolic"]
+            yield user_id, "diastolic", state.last_activity, data["blood_pressure"]["diastolic"]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv", nargs="*", help="CSV files with user_id,metric,timestamp,value columns")
+    parser.add_argument("--sessions", help="sessions.json whose manual_health_data should be migrated")
+    parser.add_argument("--db", default=ChatConfig.VITALS_DB)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    log = VitalsLog(args.db)
+    sources = [(path, _csv_rows(path)) for path in args.csv]
+    if args.sessions:
+        sources.append((args.sessions, _session_rows(args.sessions)))
+    for path, rows in sources:
+        started = time.perf_counter()
+        print(f"{path}: {log.import_readings(rows)} new readings in {time.perf_counter() - started:.2f}s")
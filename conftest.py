@@ -0,0 +1,6 @@
+import os
+from benchmarks.cold_start import DUMMY_ENV
+
+# Placeholder credentials so modules that read config at import time can be loaded in tests
+for key, value in {**DUMMY_ENV, "LOG_LEVEL": "WARNING"}.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,48 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class FitbitCredentials:
+    """One user's Fitbit token pair, shared by every request thread serving that user."""
+
+    def __init__(self, user_id, access_token, refresh_token):
+        self.user_id = user_id
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self._refresh_lock = threading.Lock()
+        # Tokens replaced by a refresh; a request still carrying one must not roll the pair back
+        self._superseded = set()
+
+    def adopt(self, access_token, refresh_token):
+        """Takes tokens from the caller's session unless a refresh has already replaced them."""
+        with self._refresh_lock:
+            if access_token and access_token != self.access_token and access_token not in self._superseded:
+                self.access_token = access_token
+                self.refresh_token = refresh_token
+
+    def refresh(self, stale_access_token, refresh_fn):
+        """Single-flight refresh after a 401 on `stale_access_token`.
+
+        The first caller performs the refresh while concurrent callers wait on the lock
+        and then reuse its result instead of spending the (single-use) refresh token again.
+        """
+        with self._refresh_lock:
+            if self.access_token != stale_access_token:
+                logger.debug("Fitbit token for user_id %s already refreshed by another request", self.user_id)
+                return True
+            token_data = refresh_fn(self.refresh_token)
+            if not token_data:
+                return False
+            self._superseded.add(self.access_token)
+            self.access_token = token_data['access_token']
+            self.refresh_token = token_data.get('refresh_token', self.refresh_token)
+            return True
+
+    def write_back(self, session):
+        """Copies the current tokens into the user's Flask session."""
+        if session.get('access_token') != self.access_token:
+            session['access_token'] = self.access_token
+            session['refresh_token'] = self.refresh_token
+            session.modified = True
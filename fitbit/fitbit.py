@@ -1,16 +1,19 @@
 import logging
-import requests
 from datetime import datetime, timedelta
 from decouple import config
 import base64
-from flask import session
+import threading
+from flask import session, has_request_context
+from fitbit.credentials import FitbitCredentials
+from fitbit.store import FitbitHistoryStore
+from chatbot.config import ChatConfig
+from utils.http_pool import get_http_session
+from utils.logging_setup import log_payload
 
 logger = logging.getLogger(__name__)
 
 class FitbitClient:
-    def __init__(self):
-        self.access_token = None
-        self.refresh_token = None
+    def __init__(self, history_store=None):
         self.client_id = config("FITBIT_CLIENT_ID")
         self.client_secret = config("FITBIT_CLIENT_SECRET")
         self.token_url = "https://api.fitbit.com/oauth2/token"
@@ -22,42 +25,195 @@ class FitbitClient:
         if self.environment.lower() == "production":
             self.redirect_uri = "https://healthsync-ai-chatbot.onrender.com/callback"
 
-        logger.debug(f"FitbitClient Environment: {self.environment}")
-        logger.debug(f"Fitbit Redirect URI: {self.redirect_uri}")
+        logger.debug("FitbitClient Environment: %s", self.environment)
+        logger.debug("Fitbit Redirect URI: %s", self.redirect_uri)
+        self.history_store = history_store or FitbitHistoryStore()
+        # Per-user credentials; the client itself holds no tokens so it can be shared across threads
+        self._credentials = {}
+        self._credentials_lock = threading.Lock()
 
-    def set_access_token(self, token):
-        self.access_token = token
+    def credentials_for(self, flask_session):
+        """Returns the shared credentials object for the session's user, seeded from its tokens."""
+        user_id = flask_session.get('user_id', 'default')
+        with self._credentials_lock:
+            credentials = self._credentials.get(user_id)
+            if credentials is None:
+                credentials = FitbitCredentials(user_id, flask_session.get('access_token'), flask_session.get('refresh_token'))
+                self._credentials[user_id] = credentials
+                return credentials
+        credentials.adopt(flask_session.get('access_token'), flask_session.get('refresh_token'))
+        return credentials
 
-    def set_refresh_token(self, token):
-        self.refresh_token = token
-
-    def refresh_access_token(self):
-        if not self.refresh_token:
+    def _request_token_refresh(self, refresh_token):
+        """Exchanges a refresh token for a new token pair; returns the token response or None."""
+        if not refresh_token:
             logger.error("No refresh token available to refresh access token")
-            return False
+            return None
 
         auth_header = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode()).decode()
-        response = requests.post(
+        response = get_http_session("fitbit").post(
             self.token_url,
             headers={"Authorization": f"Basic {auth_header}"},
             data={
                 "grant_type": "refresh_token",
-                "refresh_token": self.refresh_token,
+                "refresh_token": refresh_token,
                 "client_id": self.client_id
             }
         )
 
         if response.status_code != 200:
-            logger.error(f"Failed to refresh token: {response.text}")
-            return False
+            logger.error("Failed to refresh token: %s", response.text)
+            return None
+
+        logger.debug("Refreshed Fitbit access token")
+        return response.json()
+
+    def _get(self, url, credentials):
+        """GETs a Fitbit endpoint, refreshing the token once on 401 and retrying."""
+        stale_token = credentials.access_token
+        response = get_http_session("fitbit").get(url, headers={"Authorization": f"Bearer {stale_token}"})
+        if response.status_code != 401:
+            return response
+
+        logger.error("Fitbit API error: %s %s for url: %s", response.status_code, response.reason, response.url)
+        if not credentials.refresh(stale_token, self._request_token_refresh):
+            return response
+        if has_request_context():
+            credentials.write_back(session)
+        return get_http_session("fitbit").get(url, headers={"Authorization": f"Bearer {credentials.access_token}"})
+
+    @staticmethod
+    def _spo2_history(payload):
+        return {"sp02": [(e["dateTime"], e["value"]["avg"]) for e in payload if e.get("value", {}).get("avg")]}
+
+    @staticmethod
+    def _heart_rate_history(payload):
+        history = {"resting_heart_rate": []}
+        for entry in payload.get("activities-heart", []):
+            value = entry.get("value", {})
+            if value.get("restingHeartRate"):
+                history["resting_heart_rate"].append((entry["dateTime"], value["restingHeartRate"]))
+            for zone in value.get("heartRateZones", []):
+                zone_name = zone['name'].lower().replace(" ", "_")
+                history.setdefault(f"heart_rate_zones.{zone_name}.caloriesOut", []).append((entry["dateTime"], zone.get("caloriesOut")))
+                history.setdefault(f"heart_rate_zones.{zone_name}.minutes", []).append((entry["dateTime"], zone.get("minutes")))
+        return history
+
+    @staticmethod
+    def _sleep_history(payload):
+        history = {"sleep_duration": [], "sleep_stages.light": [], "sleep_stages.deep": [], "sleep_stages.rem": [], "sleep_stages.wake": []}
+        for entry in payload.get("sleep", []):
+            if not entry.get("isMainSleep", True) or not entry.get("duration"):
+                continue
+            history["sleep_duration"].append((entry["dateOfSleep"], entry["duration"] / 60000))
+            levels = entry.get("levels", {}).get("summary", {})
+            for stage in ("light", "deep", "rem", "wake"):
+                history[f"sleep_stages.{stage}"].append((entry["dateOfSleep"], levels.get(stage, {}).get("minutes")))
+        return history
+
+    @staticmethod
+    def _weight_history(payload):
+        history = {"weight": [], "bmi": [], "body_fat": []}
+        for entry in payload.get("weight", []):
+            history["weight"].append((entry["date"], entry.get("weight")))
+            history["bmi"].append((entry["date"], entry.get("bmi")))
+            history["body_fat"].append((entry["date"], entry.get("fat")))
+        return history
+
+    # Range endpoints with the metrics one response carries and the longest window Fitbit accepts
+    RANGE_ENDPOINTS = {
+        "spo2": {
+            "url": "https://api.fitbit.com/1/user/-/spo2/date/{start}/{end}.json",
+            "metrics": ("sp02",), "max_days": 30, "extract": "_spo2_history"
+        },
+        "heart": {
+            "url": "https://api.fitbit.com/1/user/-/activities/heart/date/{start}/{end}.json",
+            "metrics": ("resting_heart_rate", "heart_rate_zones"), "max_days": 365, "extract": "_heart_rate_history"
+        },
+        "sleep": {
+            "url": "https://api.fitbit.com/1.2/user/-/sleep/date/{start}/{end}.json",
+            "metrics": ("sleep_duration", "sleep_stages"), "max_days": 100, "extract": "_sleep_history"
+        },
+        "weight": {
+            "url": "https://api.fitbit.com/1/user/-/body/log/weight/date/{start}/{end}.json",
+            "metrics": ("weight", "bmi", "body_fat"), "max_days": 31, "extract": "_weight_history"
+        }
+    }
+
+    def sync_history(self, credentials, metrics=None):
+        """Brings the history store up to date for `metrics` (all by default) using high-water marks.
+
+        Metrics served by the same endpoint share one request that starts the day after
+        their oldest high-water mark, so only the delta is downloaded. Returns the calls
+        made and the calls saved: one per endpoint that was already up to date and so
+        skipped the full-week request it would otherwise need.
+        """
+        user_id = credentials.user_id
+        today = datetime.now().date()
+        yesterday = today - timedelta(days=1)
+        report = {"calls_made": 0, "calls_saved": 0, "rate_limited": False}
+
+        for endpoint in self.RANGE_ENDPOINTS.values():
+            wanted = [metric for metric in endpoint["metrics"] if metrics is None or metric in metrics]
+            if not wanted:
+                continue
+            marks = self.history_store.high_water_marks(user_id, wanted)
+            start = min(
+                datetime.fromisoformat(marks[metric]).date() + timedelta(days=1) if metric in marks
+                else today - timedelta(days=ChatConfig.FITBIT_SYNC_LOOKBACK_DAYS)
+                for metric in wanted
+            )
+            calls = 0
+            # Past days are final once synced; today is covered by the single-day endpoints
+            while start <= yesterday:
+                end = min(start + timedelta(days=endpoint["max_days"] - 1), today)
+                response = self._get(endpoint["url"].format(start=start.isoformat(), end=end.isoformat()), credentials)
+                calls += 1
+                log_payload(logger, "%s range response (%s to %s): %s", wanted, start, end, response.status_code, payload=lambda: response.text)
+                if response.status_code == 429:
+                    report["rate_limited"] = True
+                    break
+                if response.status_code != 200:
+                    break
+                if response.json():
+                    self.history_store.ingest(user_id, getattr(self, endpoint["extract"])(response.json()))
+                self.history_store.set_high_water_mark(user_id, wanted, min(end, yesterday).isoformat())
+                start = end + timedelta(days=1)
 
-        token_data = response.json()
-        self.access_token = token_data['access_token']
-        self.refresh_token = token_data.get('refresh_token', self.refresh_token)
-        logger.debug(f"Refreshed access token: {self.access_token}")
-        return True
+            report["calls_made"] += calls
+            if not calls:
+                # Already up to date: the full-week request this replaces was not needed at all
+                report["calls_saved"] += 1
+            if report["rate_limited"]:
+                break
+
+        self.history_store.record_sync(user_id, report["calls_made"], report["calls_saved"])
+        logger.debug("Fitbit sync for user_id %s: %s", user_id, report)
+        return report
+
+    def _latest(self, user_id, metric):
+        """Returns the newest stored value of `metric` from the past week, or "N/A"."""
+        one_week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+        latest = self.history_store.latest(user_id, metric, since=one_week_ago)
+        return latest[1] if latest else "N/A"
+
+    def _record_today(self, user_id, values):
+        """Stores today's successfully fetched values so trends build up without range calls."""
+        today = datetime.now().strftime('%Y-%m-%d')
+        self.history_store.ingest(user_id, {
+            metric: [(today, value)] for metric, value in values.items() if isinstance(value, (int, float))
+        })
 
-    def get_basic_fitbit_data(self):
+    def get_sync_stats(self, user_id):
+        """Returns cumulative range calls made and saved for `user_id`."""
+        return self.history_store.sync_stats(user_id)
+
+    def get_history(self, user_id, metric, days=30):
+        """Returns the stored daily series of `metric` for `user_id`."""
+        start = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        return self.history_store.series(user_id, metric, start=start)
+
+    def get_basic_fitbit_data(self, credentials):
         """Fetch only SpO2 and heart rate for the chat page."""
         # Check if cached data exists and is recent
         if 'fitbit_basic_data' in session and 'fitbit_basic_timestamp' in session:
@@ -66,102 +222,56 @@ class FitbitClient:
                 logger.debug("Returning cached basic Fitbit data")
                 return session['fitbit_basic_data']
 
-        if not self.access_token:
+        if not credentials or not credentials.access_token:
             logger.error("No access token set for Fitbit API")
             return {"sp02": "N/A", "heart_rate": "N/A"}
 
-        headers = {"Authorization": f"Bearer {self.access_token}"}
         today = datetime.now().strftime('%Y-%m-%d')
-        one_week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
 
         # Initialize return dictionary
         fitbit_data = {
             "sp02": "N/A",
             "heart_rate": "N/A"
         }
+        today_values = {}
 
         # Fetch SpO2 data
-        sp02_response = requests.get(
-            f"https://api.fitbit.com/1/user/-/spo2/date/{today}.json",
-            headers=headers
-        )
-        logger.debug(f"SpO2 response for {today}: {sp02_response.status_code} {sp02_response.text}")
+        sp02_response = self._get(f"https://api.fitbit.com/1/user/-/spo2/date/{today}.json", credentials)
+        log_payload(logger, "SpO2 response for %s: %s", today, sp02_response.status_code, payload=lambda: sp02_response.text)
         if sp02_response.status_code == 429:
             logger.error("Fitbit API rate limit exceeded for SpO2")
             return {"sp02": "Rate Limit Exceeded", "heart_rate": "Rate Limit Exceeded"}
         if sp02_response.status_code == 200 and sp02_response.json() and 'value' in sp02_response.json():
             fitbit_data["sp02"] = sp02_response.json()['value'].get('avg', "N/A")
+            today_values["sp02"] = fitbit_data["sp02"]
         else:
-            if sp02_response.status_code == 401:
-                logger.error(f"SpO2 API error for {today}: {sp02_response.status_code} {sp02_response.reason} for url: {sp02_response.url}")
-                if self.refresh_access_token():
-                    headers["Authorization"] = f"Bearer {self.access_token}"
-                    sp02_response = requests.get(
-                        f"https://api.fitbit.com/1/user/-/spo2/date/{today}.json",
-                        headers=headers
-                    )
-                    logger.debug(f"SpO2 retry response for {today}: {sp02_response.status_code} {sp02_response.text}")
-                    if sp02_response.status_code == 200 and sp02_response.json() and 'value' in sp02_response.json():
-                        fitbit_data["sp02"] = sp02_response.json()['value'].get('avg', "N/A")
-            if sp02_response.status_code != 200 or not sp02_response.json() or 'value' not in sp02_response.json():
-                sp02_range_response = requests.get(
-                    f"https://api.fitbit.com/1/user/-/spo2/date/{one_week_ago}/{today}.json",
-                    headers=headers
-                )
-                logger.debug(f"SpO2 range response ({one_week_ago} to {today}): {sp02_range_response.status_code} {sp02_range_response.text}")
-                if sp02_range_response.status_code == 429:
-                    logger.error("Fitbit API rate limit exceeded for SpO2 range")
-                    return {"sp02": "Rate Limit Exceeded", "heart_rate": "Rate Limit Exceeded"}
-                if sp02_range_response.status_code == 200 and sp02_range_response.json():
-                    for entry in reversed(sp02_range_response.json()):
-                        if 'value' in entry and entry['value'].get('avg'):
-                            fitbit_data["sp02"] = entry['value']['avg']
-                            break
+            if self.sync_history(credentials, ["sp02"])["rate_limited"]:
+                logger.error("Fitbit API rate limit exceeded for SpO2 range")
+                return {"sp02": "Rate Limit Exceeded", "heart_rate": "Rate Limit Exceeded"}
+            fitbit_data["sp02"] = self._latest(credentials.user_id, "sp02")
 
         # Fetch Heart Rate data
-        heart_rate_response = requests.get(
-            f"https://api.fitbit.com/1/user/-/activities/heart/date/{today}/1d/1m.json",
-            headers=headers
-        )
-        logger.debug(f"Heart Rate response for {today}: {heart_rate_response.status_code} {heart_rate_response.text}")
+        heart_rate_response = self._get(f"https://api.fitbit.com/1/user/-/activities/heart/date/{today}/1d/1m.json", credentials)
+        log_payload(logger, "Heart Rate response for %s: %s", today, heart_rate_response.status_code, payload=lambda: heart_rate_response.text)
         if heart_rate_response.status_code == 429:
             logger.error("Fitbit API rate limit exceeded for Heart Rate")
             return {"sp02": "Rate Limit Exceeded", "heart_rate": "Rate Limit Exceeded"}
         if heart_rate_response.status_code == 200 and heart_rate_response.json().get('activities-heart'):
             fitbit_data["heart_rate"] = heart_rate_response.json()['activities-heart'][0].get('value', {}).get('restingHeartRate', "N/A")
+            today_values["resting_heart_rate"] = fitbit_data["heart_rate"]
         else:
-            if heart_rate_response.status_code == 401:
-                logger.error(f"Heart Rate API error for {today}: {heart_rate_response.status_code} {heart_rate_response.reason} for url: {heart_rate_response.url}")
-                if self.refresh_access_token():
-                    headers["Authorization"] = f"Bearer {self.access_token}"
-                    heart_rate_response = requests.get(
-                        f"https://api.fitbit.com/1/user/-/activities/heart/date/{today}/1d/1m.json",
-                        headers=headers
-                    )
-                    logger.debug(f"Heart Rate retry response for {today}: {heart_rate_response.status_code} {heart_rate_response.text}")
-                    if heart_rate_response.status_code == 200 and heart_rate_response.json().get('activities-heart'):
-                        fitbit_data["heart_rate"] = heart_rate_response.json()['activities-heart'][0].get('value', {}).get('restingHeartRate', "N/A")
-            if heart_rate_response.status_code != 200 or not heart_rate_response.json().get('activities-heart'):
-                heart_rate_range_response = requests.get(
-                    f"https://api.fitbit.com/1/user/-/activities/heart/date/{one_week_ago}/{today}.json",
-                    headers=headers
-                )
-                logger.debug(f"Heart Rate range response ({one_week_ago} to {today}): {heart_rate_range_response.status_code} {heart_rate_range_response.text}")
-                if heart_rate_range_response.status_code == 429:
-                    logger.error("Fitbit API rate limit exceeded for Heart Rate range")
-                    return {"sp02": "Rate Limit Exceeded", "heart_rate": "Rate Limit Exceeded"}
-                if heart_rate_range_response.status_code == 200 and heart_rate_range_response.json():
-                    for entry in reversed(heart_rate_range_response.json()['activities-heart']):
-                        if 'value' in entry and entry['value'].get('restingHeartRate'):
-                            fitbit_data["heart_rate"] = entry['value']['restingHeartRate']
-                            break
+            if self.sync_history(credentials, ["resting_heart_rate"])["rate_limited"]:
+                logger.error("Fitbit API rate limit exceeded for Heart Rate range")
+                return {"sp02": "Rate Limit Exceeded", "heart_rate": "Rate Limit Exceeded"}
+            fitbit_data["heart_rate"] = self._latest(credentials.user_id, "resting_heart_rate")
 
         # Cache the data
+        self._record_today(credentials.user_id, today_values)
         session['fitbit_basic_data'] = fitbit_data
         session['fitbit_basic_timestamp'] = datetime.now().isoformat()
         return fitbit_data
 
-    def get_all_fitbit_data(self):
+    def get_all_fitbit_data(self, credentials):
         """Fetch all available Fitbit metrics for the health dashboard."""
         # Check if cached data exists and is recent
         if 'fitbit_all_data' in session and 'fitbit_all_timestamp' in session:
@@ -170,7 +280,7 @@ class FitbitClient:
                 logger.debug("Returning cached all Fitbit data")
                 return session['fitbit_all_data']
 
-        if not self.access_token:
+        if not credentials or not credentials.access_token:
             logger.error("No access token set for Fitbit API")
             return {
                 "sp02": "N/A",
@@ -195,9 +305,7 @@ class FitbitClient:
                 "calories_in": "N/A"
             }
 
-        headers = {"Authorization": f"Bearer {self.access_token}"}
         today = datetime.now().strftime('%Y-%m-%d')
-        one_week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
 
         # Initialize return dictionary
         fitbit_data = {
@@ -222,56 +330,32 @@ class FitbitClient:
             "water": "N/A",
             "calories_in": "N/A"
         }
+        today_values = {}
 
         # Fetch SpO2 data
-        sp02_response = requests.get(
-            f"https://api.fitbit.com/1/user/-/spo2/date/{today}.json",
-            headers=headers
-        )
-        logger.debug(f"SpO2 response for {today}: {sp02_response.status_code} {sp02_response.text}")
+        sp02_response = self._get(f"https://api.fitbit.com/1/user/-/spo2/date/{today}.json", credentials)
+        log_payload(logger, "SpO2 response for %s: %s", today, sp02_response.status_code, payload=lambda: sp02_response.text)
         if sp02_response.status_code == 429:
             logger.error("Fitbit API rate limit exceeded for SpO2")
             return {key: "Rate Limit Exceeded" for key in fitbit_data}
         if sp02_response.status_code == 200 and sp02_response.json() and 'value' in sp02_response.json():
             fitbit_data["sp02"] = sp02_response.json()['value'].get('avg', "N/A")
+            today_values["sp02"] = fitbit_data["sp02"]
         else:
-            if sp02_response.status_code == 401:
-                logger.error(f"SpO2 API error for {today}: {sp02_response.status_code} {sp02_response.reason} for url: {sp02_response.url}")
-                if self.refresh_access_token():
-                    headers["Authorization"] = f"Bearer {self.access_token}"
-                    sp02_response = requests.get(
-                        f"https://api.fitbit.com/1/user/-/spo2/date/{today}.json",
-                        headers=headers
-                    )
-                    logger.debug(f"SpO2 retry response for {today}: {sp02_response.status_code} {sp02_response.text}")
-                    if sp02_response.status_code == 200 and sp02_response.json() and 'value' in sp02_response.json():
-                        fitbit_data["sp02"] = sp02_response.json()['value'].get('avg', "N/A")
-            if sp02_response.status_code != 200 or not sp02_response.json() or 'value' not in sp02_response.json():
-                sp02_range_response = requests.get(
-                    f"https://api.fitbit.com/1/user/-/spo2/date/{one_week_ago}/{today}.json",
-                    headers=headers
-                )
-                logger.debug(f"SpO2 range response ({one_week_ago} to {today}): {sp02_range_response.status_code} {sp02_range_response.text}")
-                if sp02_range_response.status_code == 429:
-                    logger.error("Fitbit API rate limit exceeded for SpO2 range")
-                    return {key: "Rate Limit Exceeded" for key in fitbit_data}
-                if sp02_range_response.status_code == 200 and sp02_range_response.json():
-                    for entry in reversed(sp02_range_response.json()):
-                        if 'value' in entry and entry['value'].get('avg'):
-                            fitbit_data["sp02"] = entry['value']['avg']
-                            break
+            if self.sync_history(credentials, ["sp02"])["rate_limited"]:
+                logger.error("Fitbit API rate limit exceeded for SpO2 range")
+                return {key: "Rate Limit Exceeded" for key in fitbit_data}
+            fitbit_data["sp02"] = self._latest(credentials.user_id, "sp02")
 
         # Fetch Heart Rate data (including zones)
-        heart_rate_response = requests.get(
-            f"https://api.fitbit.com/1/user/-/activities/heart/date/{today}/1d/1m.json",
-            headers=headers
-        )
-        logger.debug(f"Heart Rate response for {today}: {heart_rate_response.status_code} {heart_rate_response.text}")
+        heart_rate_response = self._get(f"https://api.fitbit.com/1/user/-/activities/heart/date/{today}/1d/1m.json", credentials)
+        log_payload(logger, "Heart Rate response for %s: %s", today, heart_rate_response.status_code, payload=lambda: heart_rate_response.text)
         if heart_rate_response.status_code == 429:
             logger.error("Fitbit API rate limit exceeded for Heart Rate")
             return {key: "Rate Limit Exceeded" for key in fitbit_data}
         if heart_rate_response.status_code == 200 and heart_rate_response.json().get('activities-heart'):
             fitbit_data["heart_rate"] = heart_rate_response.json()['activities-heart'][0].get('value', {}).get('restingHeartRate', "N/A")
+            today_values["resting_heart_rate"] = fitbit_data["heart_rate"]
             heart_rate_zones = heart_rate_response.json()['activities-heart'][0].get('value', {}).get('heartRateZones', [])
             for zone in heart_rate_zones:
                 zone_name = zone['name'].lower().replace(" ", "_")
@@ -280,52 +364,19 @@ class FitbitClient:
                     "minutes": zone.get('minutes', "N/A")
                 }
         else:
-            if heart_rate_response.status_code == 401:
-                logger.error(f"Heart Rate API error for {today}: {heart_rate_response.status_code} {heart_rate_response.reason} for url: {heart_rate_response.url}")
-                if self.refresh_access_token():
-                    headers["Authorization"] = f"Bearer {self.access_token}"
-                    heart_rate_response = requests.get(
-                        f"https://api.fitbit.com/1/user/-/activities/heart/date/{today}/1d/1m.json",
-                        headers=headers
-                    )
-                    logger.debug(f"Heart Rate retry response for {today}: {heart_rate_response.status_code} {heart_rate_response.text}")
-                    if heart_rate_response.status_code == 200 and heart_rate_response.json().get('activities-heart'):
-                        fitbit_data["heart_rate"] = heart_rate_response.json()['activities-heart'][0].get('value', {}).get('restingHeartRate', "N/A")
-                        heart_rate_zones = heart_rate_response.json()['activities-heart'][0].get('value', {}).get('heartRateZones', [])
-                        for zone in heart_rate_zones:
-                            zone_name = zone['name'].lower().replace(" ", "_")
-                            fitbit_data["heart_rate_zones"][zone_name] = {
-                                "caloriesOut": zone.get('caloriesOut', "N/A"),
-                                "minutes": zone.get('minutes', "N/A")
-                            }
-            if heart_rate_response.status_code != 200 or not heart_rate_response.json().get('activities-heart'):
-                heart_rate_range_response = requests.get(
-                    f"https://api.fitbit.com/1/user/-/activities/heart/date/{one_week_ago}/{today}.json",
-                    headers=headers
-                )
-                logger.debug(f"Heart Rate range response ({one_week_ago} to {today}): {heart_rate_range_response.status_code} {heart_rate_range_response.text}")
-                if heart_rate_range_response.status_code == 429:
-                    logger.error("Fitbit API rate limit exceeded for Heart Rate range")
-                    return {key: "Rate Limit Exceeded" for key in fitbit_data}
-                if heart_rate_range_response.status_code == 200 and heart_rate_range_response.json():
-                    for entry in reversed(heart_rate_range_response.json()['activities-heart']):
-                        if 'value' in entry and entry['value'].get('restingHeartRate'):
-                            fitbit_data["heart_rate"] = entry['value']['restingHeartRate']
-                            heart_rate_zones = entry['value'].get('heartRateZones', [])
-                            for zone in heart_rate_zones:
-                                zone_name = zone['name'].lower().replace(" ", "_")
-                                fitbit_data["heart_rate_zones"][zone_name] = {
-                                    "caloriesOut": zone.get('caloriesOut', "N/A"),
-                                    "minutes": zone.get('minutes', "N/A")
-                                }
-                            break
+            if self.sync_history(credentials, ["resting_heart_rate", "heart_rate_zones"])["rate_limited"]:
+                logger.error("Fitbit API rate limit exceeded for Heart Rate range")
+                return {key: "Rate Limit Exceeded" for key in fitbit_data}
+            fitbit_data["heart_rate"] = self._latest(credentials.user_id, "resting_heart_rate")
+            for zone_name in fitbit_data["heart_rate_zones"]:
+                fitbit_data["heart_rate_zones"][zone_name] = {
+                    "caloriesOut": self._latest(credentials.user_id, f"heart_rate_zones.{zone_name}.caloriesOut"),
+                    "minutes": self._latest(credentials.user_id, f"heart_rate_zones.{zone_name}.minutes")
+                }
 
         # Fetch Activity data (steps, distance, calories, active minutes, floors)
-        activity_response = requests.get(
-            f"https://api.fitbit.com/1/user/-/activities/date/{today}.json",
-            headers=headers
-        )
-        logger.debug(f"Activity response for {today}: {activity_response.status_code} {activity_response.text}")
+        activity_response = self._get(f"https://api.fitbit.com/1/user/-/activities/date/{today}.json", credentials)
+        log_payload(logger, "Activity response for %s: %s", today, activity_response.status_code, payload=lambda: activity_response.text)
         if activity_response.status_code == 429:
             logger.error("Fitbit API rate limit exceeded for Activity")
             return {key: "Rate Limit Exceeded" for key in fitbit_data}
@@ -336,13 +387,11 @@ class FitbitClient:
             fitbit_data["calories"] = summary.get('caloriesOut', "N/A")
             fitbit_data["active_minutes"] = summary.get('fairlyActiveMinutes', 0) + summary.get('veryActiveMinutes', 0)
             fitbit_data["floors"] = summary.get('floors', "N/A")
+            today_values.update({key: fitbit_data[key] for key in ("steps", "distance", "calories", "active_minutes", "floors")})
 
         # Fetch Sleep data
-        sleep_response = requests.get(
-            f"https://api.fitbit.com/1.2/user/-/sleep/date/{today}.json",
-            headers=headers
-        )
-        logger.debug(f"Sleep response for {today}: {sleep_response.status_code} {sleep_response.text}")
+        sleep_response = self._get(f"https://api.fitbit.com/1.2/user/-/sleep/date/{today}.json", credentials)
+        log_payload(logger, "Sleep response for %s: %s", today, sleep_response.status_code, payload=lambda: sleep_response.text)
         if sleep_response.status_code == 429:
             logger.error("Fitbit API rate limit exceeded for Sleep")
             return {key: "Rate Limit Exceeded" for key in fitbit_data}
@@ -357,33 +406,17 @@ class FitbitClient:
                     "rem": levels.get('rem', {}).get('minutes', "N/A"),
                     "wake": levels.get('wake', {}).get('minutes', "N/A")
                 }
+            self.history_store.ingest(credentials.user_id, self._sleep_history(sleep_response.json()))
         else:
-            sleep_range_response = requests.get(
-                f"https://api.fitbit.com/1.2/user/-/sleep/date/{one_week_ago}/{today}.json",
-                headers=headers
-            )
-            logger.debug(f"Sleep range response ({one_week_ago} to {today}): {sleep_range_response.status_code} {sleep_range_response.text}")
-            if sleep_range_response.status_code == 429:
+            if self.sync_history(credentials, ["sleep_duration", "sleep_stages"])["rate_limited"]:
                 logger.error("Fitbit API rate limit exceeded for Sleep range")
                 return {key: "Rate Limit Exceeded" for key in fitbit_data}
-            if sleep_range_response.status_code == 200 and sleep_range_response.json().get('sleep'):
-                sleep_data = sleep_range_response.json()['sleep'][0] if sleep_range_response.json()['sleep'] else {}
-                fitbit_data["sleep_duration"] = sleep_data.get('duration', "N/A") / 60000 if sleep_data.get('duration') else "N/A"
-                if 'levels' in sleep_data and 'summary' in sleep_data['levels']:
-                    levels = sleep_data['levels']['summary']
-                    fitbit_data["sleep_stages"] = {
-                        "light": levels.get('light', {}).get('minutes', "N/A"),
-                        "deep": levels.get('deep', {}).get('minutes', "N/A"),
-                        "rem": levels.get('rem', {}).get('minutes', "N/A"),
-                        "wake": levels.get('wake', {}).get('minutes', "N/A")
-                    }
+            fitbit_data["sleep_duration"] = self._latest(credentials.user_id, "sleep_duration")
+            fitbit_data["sleep_stages"] = {stage: self._latest(credentials.user_id, f"sleep_stages.{stage}") for stage in fitbit_data["sleep_stages"]}
 
         # Fetch Weight data
-        weight_response = requests.get(
-            f"https://api.fitbit.com/1/user/-/body/log/weight/date/{today}.json",
-            headers=headers
-        )
-        logger.debug(f"Weight response for {today}: {weight_response.status_code} {weight_response.text}")
+        weight_response = self._get(f"https://api.fitbit.com/1/user/-/body/log/weight/date/{today}.json", credentials)
+        log_payload(logger, "Weight response for %s: %s", today, weight_response.status_code, payload=lambda: weight_response.text)
         if weight_response.status_code == 429:
             logger.error("Fitbit API rate limit exceeded for Weight")
             return {key: "Rate Limit Exceeded" for key in fitbit_data}
@@ -392,45 +425,36 @@ class FitbitClient:
             fitbit_data["weight"] = weight_data.get('weight', "N/A")
             fitbit_data["bmi"] = weight_data.get('bmi', "N/A")
             fitbit_data["body_fat"] = weight_data.get('fat', "N/A")
+            today_values.update({key: fitbit_data[key] for key in ("weight", "bmi", "body_fat")})
         else:
-            weight_range_response = requests.get(
-                f"https://api.fitbit.com/1/user/-/body/log/weight/date/{one_week_ago}/{today}.json",
-                headers=headers
-            )
-            logger.debug(f"Weight range response ({one_week_ago} to {today}): {weight_range_response.status_code} {weight_range_response.text}")
-            if weight_range_response.status_code == 429:
+            if self.sync_history(credentials, ["weight", "bmi", "body_fat"])["rate_limited"]:
                 logger.error("Fitbit API rate limit exceeded for Weight range")
                 return {key: "Rate Limit Exceeded" for key in fitbit_data}
-            if weight_range_response.status_code == 200 and weight_range_response.json().get('weight'):
-                weight_data = weight_range_response.json()['weight'][0] if weight_range_response.json()['weight'] else {}
-                fitbit_data["weight"] = weight_data.get('weight', "N/A")
-                fitbit_data["bmi"] = weight_data.get('bmi', "N/A")
-                fitbit_data["body_fat"] = weight_data.get('fat', "N/A")
+            fitbit_data["weight"] = self._latest(credentials.user_id, "weight")
+            fitbit_data["bmi"] = self._latest(credentials.user_id, "bmi")
+            fitbit_data["body_fat"] = self._latest(credentials.user_id, "body_fat")
 
         # Fetch Nutrition data (food and water)
-        food_response = requests.get(
-            f"https://api.fitbit.com/1/user/-/foods/log/date/{today}.json",
-            headers=headers
-        )
-        logger.debug(f"Food response for {today}: {food_response.status_code} {food_response.text}")
+        food_response = self._get(f"https://api.fitbit.com/1/user/-/foods/log/date/{today}.json", credentials)
+        log_payload(logger, "Food response for %s: %s", today, food_response.status_code, payload=lambda: food_response.text)
         if food_response.status_code == 429:
             logger.error("Fitbit API rate limit exceeded for Food")
             return {key: "Rate Limit Exceeded" for key in fitbit_data}
         if food_response.status_code == 200 and food_response.json().get('summary'):
             fitbit_data["calories_in"] = food_response.json()['summary'].get('calories', "N/A")
+            today_values["calories_in"] = fitbit_data["calories_in"]
 
-        water_response = requests.get(
-            f"https://api.fitbit.com/1/user/-/foods/log/water/date/{today}.json",
-            headers=headers
-        )
-        logger.debug(f"Water response for {today}: {water_response.status_code} {water_response.text}")
+        water_response = self._get(f"https://api.fitbit.com/1/user/-/foods/log/water/date/{today}.json", credentials)
+        log_payload(logger, "Water response for %s: %s", today, water_response.status_code, payload=lambda: water_response.text)
         if water_response.status_code == 429:
             logger.error("Fitbit API rate limit exceeded for Water")
             return {key: "Rate Limit Exceeded" for key in fitbit_data}
         if water_response.status_code == 200 and water_response.json().get('summary'):
             fitbit_data["water"] = water_response.json()['summary'].get('water', "N/A")  # In milliliters
+            today_values["water"] = fitbit_data["water"]
 
         # Cache the data
+        self._record_today(credentials.user_id, today_values)
         session['fitbit_all_data'] = fitbit_data
         session['fitbit_all_timestamp'] = datetime.now().isoformat()
         return fitbit_data
\ No newline at end of file
@@ -0,0 +1,113 @@
+import logging
+import sqlite3
+from contextlib import contextmanager
+from chatbot.config import ChatConfig
+
+logger = logging.getLogger(__name__)
+
+
+class FitbitHistoryStore:
+    """Per-user daily Fitbit metrics in SQLite, indexed by (user, metric, date)."""
+
+    def __init__(self, db_file=ChatConfig.FITBIT_HISTORY_DB):
+        self.db_file = db_file
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS samples ("
+                " user_id TEXT NOT NULL, metric TEXT NOT NULL, date TEXT NOT NULL, value REAL,"
+                " PRIMARY KEY (user_id, metric, date)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                " user_id TEXT NOT NULL, metric TEXT NOT NULL, synced_through TEXT NOT NULL,"
+                " PRIMARY KEY (user_id, metric)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_stats ("
+                " user_id TEXT PRIMARY KEY, syncs INTEGER NOT NULL, calls_made INTEGER NOT NULL, calls_saved INTEGER NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps the store safe to share across threads
+        conn = sqlite3.connect(self.db_file, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _number(value):
+        return int(value) if value is not None and float(value).is_integer() else value
+
+    def ingest(self, user_id, history):
+        """Upserts {metric: [(date, value), ...]} rows for a user."""
+        rows = [(user_id, metric, day, value) for metric, points in history.items() for day, value in points if value is not None]
+        if not rows:
+            return 0
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO samples (user_id, metric, date, value) VALUES (?, ?, ?, ?)", rows)
+        logger.debug("Stored %s Fitbit samples for user_id: %s", len(rows), user_id)
+        return len(rows)
+
+    def high_water_marks(self, user_id, metrics):
+        """Returns {metric: last fully synced date} for the metrics that have been synced."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT metric, synced_through FROM sync_state WHERE user_id = ? AND metric IN ({','.join('?' * len(metrics))})",
+                [user_id, *metrics]
+            )
+            return dict(rows.fetchall())
+
+    def set_high_water_mark(self, user_id, metrics, synced_through):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sync_state (user_id, metric, synced_through) VALUES (?, ?, ?)",
+                [(user_id, metric, synced_through) for metric in metrics]
+            )
+
+    def record_sync(self, user_id, calls_made, calls_saved):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sync_stats (user_id, syncs, calls_made, calls_saved) VALUES (?, 1, ?, ?)"
+                " ON CONFLICT(user_id) DO UPDATE SET syncs = syncs + 1,"
+                " calls_made = calls_made + excluded.calls_made, calls_saved = calls_saved + excluded.calls_saved",
+                (user_id, calls_made, calls_saved)
+            )
+
+    def sync_stats(self, user_id):
+        """Returns cumulative sync counters for a user."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT syncs, calls_made, calls_saved FROM sync_stats WHERE user_id = ?", (user_id,)).fetchone()
+        return dict(zip(("syncs", "calls_made", "calls_saved"), row or (0, 0, 0)))
+
+    def series(self, user_id, metric, start=None, end=None):
+        """Returns [(date, value), ...] for a metric, oldest first."""
+        query = "SELECT date, value FROM samples WHERE user_id = ? AND metric = ?"
+        params = [user_id, metric]
+        if start:
+            query += " AND date >= ?"
+            params.append(start)
+        if end:
+            query += " AND date <= ?"
+            params.append(end)
+        with self._connect() as conn:
+            return [(day, self._number(value)) for day, value in conn.execute(query + " ORDER BY date", params)]
+
+    def daily_mean(self, metric, start=None):
+        """Returns [(date, mean value across users), ...] for a metric, oldest first."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT date, AVG(value) FROM samples WHERE metric = ? AND date >= ? GROUP BY date ORDER BY date",
+                (metric, start or "")
+            ).fetchall()
+
+    def latest(self, user_id, metric, since=None):
+        """Returns the most recent (date, value) for a metric on or after `since`, or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT date, value FROM samples WHERE user_id = ? AND metric = ? AND date >= ? ORDER BY date DESC LIMIT 1",
+                (user_id, metric, since or "")
+            ).fetchone()
+        return (row[0], self._number(row[1])) if row else None
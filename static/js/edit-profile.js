@@ -0,0 +1,27 @@
+function checkAge() {
+    const age = parseInt(document.getElementById('ageSelect').value);
+    const ageError = document.getElementById('ageError');
+    if (age < 18) {
+        ageError.style.display = 'block';
+    } else {
+        ageError.style.display = 'none';
+    }
+}
+
+document.getElementById('editProfileForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+    const formData = new FormData(this);
+    const data = {};
+    formData.forEach((value, key) => data[key] = value);
+    fetch('/edit_profile', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(data)
+    }).then(response => response.json()).then(data => {
+        alert(data.message);
+        window.location.href = '/chat';
+    }).catch(error => {
+        console.error('Error:', error);
+        alert('Failed to update profile. Please try again.');
+    });
+});
@@ -0,0 +1,71 @@
+function validateHealthData() {
+    const temperature = document.getElementById('temperature').value;
+    const systolic = document.getElementById('blood_pressure_systolic').value;
+    const diastolic = document.getElementById('blood_pressure_diastolic').value;
+    const errorDiv = document.getElementById('formError');
+    errorDiv.style.display = 'none';
+    errorDiv.textContent = '';
+
+    // Validate temperature
+    if (temperature && (temperature < 35 || temperature > 42)) {
+        errorDiv.textContent = 'Temperature must be between 35°C and 42°C.';
+        errorDiv.style.display = 'block';
+        return false;
+    }
+
+    // Validate blood pressure
+    if (systolic || diastolic) {
+        if (!systolic || !diastolic) {
+            errorDiv.textContent = 'Please enter both systolic and diastolic blood pressure values.';
+            errorDiv.style.display = 'block';
+            return false;
+        }
+        if (systolic < 50 || systolic > 250) {
+            errorDiv.textContent = 'Systolic blood pressure must be between 50 and 250 mmHg.';
+            errorDiv.style.display = 'block';
+            return false;
+        }
+        if (diastolic < 30 || diastolic > 150) {
+            errorDiv.textContent = 'Diastolic blood pressure must be between 30 and 150 mmHg.';
+            errorDiv.style.display = 'block';
+            return false;
+        }
+        if (parseInt(systolic) <= parseInt(diastolic)) {
+            errorDiv.textContent = 'Systolic blood pressure must be greater than diastolic blood pressure.';
+            errorDiv.style.display = 'block';
+            return false;
+        }
+    }
+
+    // If validation passes, submit the form via AJAX
+    const formData = {
+        user_id: document.querySelector('input[name="user_id"]').value,
+        temperature: temperature || null,
+        blood_pressure_systolic: systolic || null,
+        blood_pressure_diastolic: diastolic || null
+    };
+
+    fetch('/health_data', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify(formData)
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.message) {
+            alert(data.message);
+            window.location.href = '/chat'; // Redirect to chat page on success
+        } else {
+            errorDiv.textContent = 'An error occurred while submitting the data.';
+            errorDiv.style.display = 'block';
+        }
+    })
+    .catch(error => {
+        errorDiv.textContent = 'An error occurred while submitting the data.';
+        errorDiv.style.display = 'block';
+    });
+
+    return false; // Prevent default form submission
+}
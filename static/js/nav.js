@@ -0,0 +1,4 @@
+function toggleNavMenu() {
+    const dropdown = document.getElementById('navDropdown');
+    dropdown.style.display = dropdown.style.display === 'block' ? 'none' : 'block';
+}
@@ -0,0 +1,5 @@
+function changePassword(event) {
+    event.preventDefault();
+    const newPassword = document.getElementById('newPassword').value;
+    alert('Password change functionality is not implemented in this demo. Please integrate with Auth0 Management API to update the password.');
+}
@@ -0,0 +1,102 @@
+import pytest
+from chatbot import admission as admission_module
+from chatbot.admission import AdmissionController
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    current = {"now": NOW}
+    monkeypatch.setattr(admission_module.time, "time", lambda: current["now"])
+    return current
+
+
+def controller(tmp_path, **limits):
+    settings = dict(user_rate=1.0, user_burst=2, global_rate=10.0, global_burst=100, max_concurrent=100,
+                    max_wait=0.0, lease_timeout=60)
+    settings.update(limits)
+    return AdmissionController(db_file=str(tmp_path / "admission.db"), **settings)
+
+
+def test_user_bucket_limits_each_client_separately(clock, tmp_path):
+    admission = controller(tmp_path)
+    assert admission.admit("alice").allowed
+    assert admission.admit("alice").allowed
+
+    rejected = admission.admit("alice")
+    assert not rejected.allowed
+    assert rejected.reason == "user_rate"
+    assert rejected.retry_after == pytest.approx(1.0)
+    assert rejected.retry_after_header == "1"
+    assert admission.admit("bob").allowed
+
+    clock["now"] += 1.0
+    assert admission.admit("alice").allowed
+
+
+def test_global_bucket_limits_all_clients(clock, tmp_path):
+    admission = controller(tmp_path, global_rate=0.5, global_burst=3)
+    for user_id in ("a", "b", "c"):
+        assert admission.admit(user_id).allowed
+
+    rejected = admission.admit("d")
+    assert rejected.reason == "global_rate"
+    assert rejected.retry_after == pytest.approx(2.0)
+    assert rejected.retry_after_header == "2"
+
+
+def test_rejected_check_spends_no_tokens(clock, tmp_path):
+    admission = controller(tmp_path, global_rate=0.5, global_burst=1)
+    assert admission.admit("alice").allowed
+    assert admission.admit("bob").reason == "global_rate"
+
+    clock["now"] += 2.0
+    # Bob's rejection did not drain his own bucket
+    assert admission.admit("bob").allowed
+
+
+def test_concurrent_slots_are_freed_on_release(clock, tmp_path):
+    admission = controller(tmp_path, max_concurrent=2)
+    first, second = admission.admit("a"), admission.admit("b")
+    assert first.allowed and second.allowed
+
+    rejected = admission.admit("c")
+    assert rejected.reason == "capacity"
+    assert rejected.retry_after_header == "1"
+
+    admission.release(first)
+    assert admission.admit("c").allowed
+
+
+def test_expired_leases_free_their_slots(clock, tmp_path):
+    admission = controller(tmp_path, max_concurrent=1, lease_timeout=30)
+    assert admission.admit("a").allowed
+    assert admission.admit("b").reason == "capacity"
+
+    clock["now"] += 31
+    assert admission.admit("b").allowed
+
+
+def test_chat_admission_is_keyed_on_the_signed_in_user(tmp_path):
+    from types import SimpleNamespace
+    from app import create_app
+    from chatbot.session_manager import SessionManager
+    from chatbot.vitals import VitalsLog
+    from utils.components import Components
+
+    components = Components()
+    components.__dict__.update(admission_controller=controller(tmp_path, user_rate=0.001, user_burst=1),
+                               session_manager=SessionManager(db_file=str(tmp_path / "sessions.db")),
+                               vitals_log=VitalsLog(str(tmp_path / "vitals.db")),
+                               openai_client=SimpleNamespace(), symptom_map=[])
+    client = create_app(components).test_client()
+    assert client.post("/chat", json={"user_id": "alice"}).status_code == 403
+
+    with client.session_transaction() as flask_session:
+        flask_session['user_id'] = "alice"
+    # Naming another user is refused before admission, so it spends none of alice's tokens
+    assert client.post("/chat", json={"user_id": "bob"}).status_code == 403
+    first, second = (client.post("/chat", json={"user_id": "alice"}).status_code for _ in range(2))
+    assert first != 429
+    assert second == 429
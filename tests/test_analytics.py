@@ -0,0 +1,17 @@
+from analytics.analytics import AnalyticsEngine
+
+
+def test_corrupt_log_lines_are_skipped(tmp_path):
+    log_file = tmp_path / "interviews.jsonl"
+    log_file.write_text(
+        '{"interview_id": "a", "evidence": [{"id": "s_1", "choice_id": "present"}], "triage_level": "self_care"}\n'
+        '{"interview_id": "b", "evidence": [{"id": "s_1", "cho\n'
+        '["not", "a", "record"]\n'
+        '{"interview_id": "c", "evidence": [{"choice_id": "present"}], "triage_level": "self_care"}\n'
+        '{"interview_id": "d", "evidence": [{"id": "s_1", "choice_id": "present"}], "triage_level": "emergency"}\n'
+    )
+
+    engine = AnalyticsEngine(log_file=str(log_file))
+    assert engine.interview_count == 2
+    triage = engine.triage_distribution()
+    assert (triage["emergency"], triage["self_care"], triage.sum()) == (1, 1, 2)
@@ -0,0 +1,33 @@
+from chatbot.answers import understand_answer
+
+NOSEBLEED = {"id": "s_1", "name": "Nosebleed"}
+RED_EYES = {"id": "s_2", "name": "Red eyes"}
+HEADACHE = {"id": "s_3", "name": "Headache"}
+
+
+def test_no_is_not_read_as_nosebleed():
+    assert understand_answer("no", [NOSEBLEED]) == [{"id": "s_1", "choice_id": "absent"}]
+    assert understand_answer("no", [NOSEBLEED, HEADACHE]) == [
+        {"id": "s_1", "choice_id": "absent"}, {"id": "s_3", "choice_id": "absent"},
+    ]
+
+
+def test_yes_is_not_read_as_red_eyes():
+    # A bare yes cannot say which of several options applies
+    assert understand_answer("yes", [RED_EYES, HEADACHE]) == []
+    assert understand_answer("yes", [RED_EYES]) == [{"id": "s_2", "choice_id": "present"}]
+
+
+def test_not_really_sure_is_unknown_not_absent():
+    assert understand_answer("not really sure", [HEADACHE]) == [{"id": "s_3", "choice_id": "unknown"}]
+    assert understand_answer("not really sure", [HEADACHE, NOSEBLEED]) == []
+
+
+def test_items_match_on_whole_words():
+    assert understand_answer("my eyes are red and i have a headache", [RED_EYES, HEADACHE]) == [
+        {"id": "s_3", "choice_id": "present"},
+    ]
+    assert understand_answer("red eyes but no headahce", [RED_EYES, HEADACHE]) == [
+        {"id": "s_2", "choice_id": "present"}, {"id": "s_3", "choice_id": "absent"},
+    ]
+    assert understand_answer("I had a nosebleed", [NOSEBLEED]) == [{"id": "s_1", "choice_id": "present"}]
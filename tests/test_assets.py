@@ -0,0 +1,21 @@
+from utils.assets import minify_css, minify_js
+
+
+def test_template_literal_survives_unchanged():
+    literal = "`\n    indented line\n    // not a comment\n\n  ${name ? `hi ${name}` : ''}   \n  end`"
+    source = f"  // dropped\n  const greeting = {literal};\n\n    // also dropped\n  render(greeting);\n"
+    assert minify_js(source) == f"const greeting = {literal};\nrender(greeting);\n"
+
+
+def test_comment_markers_inside_strings_and_regexes_are_kept():
+    source = "  const url = 'http://example.com';\n  const re = /`[/]/g;\n  const ratio = 4 / 2 / 1;\n"
+    assert minify_js(source) == "const url = 'http://example.com';\nconst re = /`[/]/g;\nconst ratio = 4 / 2 / 1;\n"
+
+
+def test_string_line_continuation_keeps_its_indentation():
+    source = "  const s = 'a\\\n    b';\n"
+    assert minify_js(source) == "const s = 'a\\\n    b';\n"
+
+
+def test_minify_css():
+    assert minify_css("/* c */ a , b {\n  color: red ;\n}\n") == "a,b{color: red}"
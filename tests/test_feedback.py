@@ -0,0 +1,146 @@
+import threading
+from types import SimpleNamespace
+import pytest
+from chatbot.feedback import FeedbackPipeline, FeedbackStore
+from chatbot.session_manager import SessionManager
+from utils import ops_access
+
+
+class BlockedStore(FeedbackStore):
+    """Holds the writer thread inside write_batch until released, so the queue fills up."""
+
+    def __init__(self, db_file):
+        super().__init__(db_file)
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def write_batch(self, events):
+        self.entered.set()
+        self.release.wait(5)
+        super().write_batch(events)
+
+
+@pytest.fixture
+def blocked_pipeline(tmp_path):
+    store = BlockedStore(str(tmp_path / "feedback.db"))
+    pipeline = FeedbackPipeline(store, maxsize=2, batch_size=1, flush_interval=0.01, put_timeout=0.01)
+    # The first event is taken by the writer, which then blocks; two more fill the queue
+    assert pipeline.submit("u", None, comment="first")
+    assert store.entered.wait(5)
+    assert pipeline.submit("u", None, comment="second")
+    assert pipeline.submit("u", None, comment="third")
+    yield pipeline
+    store.release.set()
+    pipeline.close()
+
+
+def test_full_queue_rejects_feedback_and_drops_outcomes(blocked_pipeline):
+    assert not blocked_pipeline.submit("u", None, comment="overflow")
+    blocked_pipeline.record_outcome("i-1", "u", [], "self_care")
+
+    snapshot = blocked_pipeline.snapshot()
+    assert snapshot["rejected"] == 1
+    assert snapshot["dropped"] == 1
+    assert snapshot["enqueued"] == 3
+    assert snapshot["queue_depth"] == snapshot["capacity"] == 2
+    # A dropped outcome still links the user's next feedback to the interview
+    assert blocked_pipeline.last_completed("u") == "i-1"
+
+
+def test_queued_events_are_written_once_the_writer_catches_up(blocked_pipeline):
+    blocked_pipeline.store.release.set()
+    blocked_pipeline.close()
+
+    snapshot = blocked_pipeline.snapshot()
+    assert snapshot["written"] == 3
+    assert snapshot["queue_depth"] == 0
+    assert blocked_pipeline.store.stats(days=1)["feedback"] == 3
+
+
+@pytest.fixture
+def client_for(tmp_path):
+    from app import create_app
+    from utils.components import Components
+
+    def build(pipeline):
+        components = Components()
+        components.__dict__.update(feedback_pipeline=pipeline, openai_client=SimpleNamespace(), symptom_map=[],
+                                   session_manager=SessionManager(db_file=str(tmp_path / "sessions.db")))
+        client = create_app(components).test_client()
+        with client.session_transaction() as flask_session:
+            flask_session['user_id'] = "u"
+        return client, components
+    return build
+
+
+def test_feedback_route_returns_503_when_queue_is_full(blocked_pipeline, client_for):
+    client, _ = client_for(blocked_pipeline)
+    response = client.post("/feedback", json={"user_id": "u", "feedback": "Helpful", "rating": 5})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_feedback_only_accepts_the_users_own_interviews(tmp_path, client_for):
+    pipeline = FeedbackPipeline(FeedbackStore(str(tmp_path / "feedback.db")), flush_interval=0.01)
+    client, components = client_for(pipeline)
+    pipeline.record_outcome("finished", "u", [], "self_care")
+    current = components.session_manager.get_session("u").interview_id
+
+    for interview_id in ("finished", current):
+        response = client.post("/feedback", json={"user_id": "u", "feedback": "ok", "interview_id": interview_id})
+        assert response.status_code == 200
+        assert response.get_json()["interview_id"] == interview_id
+
+    response = client.post("/feedback", json={"user_id": "u", "feedback": "ok", "interview_id": "someone-elses"})
+    assert response.status_code == 400
+    pipeline.close()
+
+
+def test_ops_endpoints_need_a_local_address_or_signed_token(tmp_path, client_for, monkeypatch):
+    pipeline = FeedbackPipeline(FeedbackStore(str(tmp_path / "feedback.db")), flush_interval=0.01)
+    client, _ = client_for(pipeline)
+    remote = {"REMOTE_ADDR": "203.0.113.9"}
+
+    for path in ("/metrics", "/feedback/stats"):
+        assert client.get(path).status_code == 200
+        assert client.get(path, environ_base=remote).status_code == 404
+
+    monkeypatch.setattr(ops_access, "OPS_SECRET", "ops-secret")
+    token = ops_access.make_token("ops-secret")
+    for path in ("/metrics", "/feedback/stats"):
+        assert client.get(path).status_code == 404
+        assert client.get(path, environ_base=remote, headers={ops_access.OPS_HEADER: token}).status_code == 200
+        assert client.get(path, headers={ops_access.OPS_HEADER: ops_access.make_token("wrong")}).status_code == 404
+    pipeline.close()
+
+
+def test_bad_event_does_not_lose_the_rest_of_its_batch(tmp_path):
+    store = BlockedStore(str(tmp_path / "feedback.db"))
+    pipeline = FeedbackPipeline(store, maxsize=10, batch_size=10, flush_interval=0.01)
+    assert pipeline.submit("u1", None, comment="first")
+    assert store.entered.wait(5)
+    # Queued while the writer is blocked, so the next three events are written as one batch
+    pipeline.record_outcome("i-1", "u1", [], "self_care")
+    assert pipeline.submit("u2", None, comment={"x": 1})
+    assert pipeline.submit("u3", "i-1", comment="helpful", rating=5)
+    store.release.set()
+    pipeline.close()
+
+    snapshot = pipeline.snapshot()
+    assert snapshot["written"] == 3
+    assert snapshot["failed"] == 1
+    assert store.stats(days=1)["by_triage_level"]["self_care"] == {
+        "interviews": 1, "feedback": 1, "feedback_rate": 1.0, "avg_rating": 5.0,
+    }
+
+
+def test_feedback_route_rejects_non_text_and_overlong_feedback(tmp_path, client_for):
+    from chatbot.config import ChatConfig
+
+    pipeline = FeedbackPipeline(FeedbackStore(str(tmp_path / "feedback.db")), flush_interval=0.01)
+    client, _ = client_for(pipeline)
+    for body in ({"user_id": "u", "feedback": {"x": 1}}, {"user_id": "u", "feedback": "x" * (ChatConfig.FEEDBACK_MAX_LENGTH + 1)}):
+        assert client.post("/feedback", json=body).status_code == 400
+    assert client.post("/feedback", json={"user_id": ["u"], "feedback": "ok"}).status_code == 403
+    assert pipeline.snapshot()["enqueued"] == 0
+    pipeline.close()
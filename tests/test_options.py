@@ -0,0 +1,24 @@
+from chatbot.options import NONE_OF_THESE, build_option_index, match_options
+
+ITEMS = [{"id": "s_1", "name": "Headache"}, {"id": "s_2", "name": "Nausea"}, {"id": "s_3", "name": "Dizziness"}]
+
+
+def test_group_multiple_reports_only_selected_options():
+    index = build_option_index("group_multiple", ITEMS)
+    assert match_options(index, ["Headache", "dizzines"]) == [
+        {"id": "s_1", "choice_id": "present"}, {"id": "s_3", "choice_id": "present"},
+    ]
+
+
+def test_none_of_these_denies_every_option():
+    index = build_option_index("group_multiple", ITEMS)
+    assert match_options(index, [NONE_OF_THESE]) == [{"id": item["id"], "choice_id": "absent"} for item in ITEMS]
+    # Contradicts itself, so it is not understood rather than guessed at
+    assert match_options(index, [NONE_OF_THESE, "Nausea"]) is None
+
+
+def test_unmatched_answer_is_rejected():
+    index = build_option_index("group_single", ITEMS)
+    assert match_options(index, ["Nausea"]) == [{"id": "s_2", "choice_id": "present"}]
+    assert match_options(index, ["Fever"]) is None
+    assert match_options(index, [NONE_OF_THESE]) is None
@@ -0,0 +1,78 @@
+import json
+import threading
+from chatbot.session_manager import SessionManager
+
+
+def present(symptom_id):
+    return {"id": symptom_id, "choice_id": "present"}
+
+
+def test_concurrent_turns_lose_no_evidence(tmp_path):
+    db_file = str(tmp_path / "sessions.db")
+    manager = SessionManager(db_file=db_file)
+    threads, turns, users = 16, 50, 4
+    barrier = threading.Barrier(threads)
+
+    def worker(worker_id):
+        barrier.wait()
+        for turn in range(turns):
+            user_id = f"user-{(worker_id + turn) % users}"
+            with manager.lock(user_id):
+                user_session = manager.get_session(user_id)
+                user_session.evidence.append(present(f"s_{worker_id}_{turn}"))
+                user_session.question_count += 1
+                manager.save_session(user_id)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    for reader in (manager, SessionManager(db_file=db_file)):
+        sessions = [reader.get_session(f"user-{u}") for u in range(users)]
+        assert sum(len(s.evidence) for s in sessions) == threads * turns
+        assert all(s.question_count == len(s.evidence) for s in sessions)
+
+
+def test_save_and_reset_persist_one_user(tmp_path):
+    db_file = str(tmp_path / "sessions.db")
+    manager = SessionManager(db_file=db_file)
+    manager.get_session("a").evidence.append(present("s_1"))
+    manager.save_session("a")
+    manager.get_session("b").evidence.append(present("s_2"))
+    manager.save_session("b")
+    manager.reset_session("b")
+
+    reloaded = SessionManager(db_file=db_file)
+    assert reloaded.get_session("a").evidence.as_list() == [present("s_1")]
+    assert len(reloaded.get_session("b").evidence) == 0
+
+
+def test_legacy_sessions_json_is_imported_once(tmp_path):
+    legacy_file = tmp_path / "sessions.json"
+    legacy_file.write_text(json.dumps({"old": {"evidence": [present("s_21")], "question_count": 2, "age": 40, "sex": "female"}}))
+    db_file = str(tmp_path / "sessions.db")
+
+    manager = SessionManager(db_file=db_file, legacy_file=str(legacy_file))
+    assert manager.get_session("old").evidence.as_list() == [present("s_21")]
+    assert manager.get_session("old").question_count == 2
+
+    manager.reset_session("old")
+    # The table is no longer empty, so the legacy file is not imported again
+    assert len(SessionManager(db_file=db_file, legacy_file=str(legacy_file)).get_session("old").evidence) == 0
+
+
+def test_unreadable_row_only_loses_that_session(tmp_path):
+    db_file = str(tmp_path / "sessions.db")
+    manager = SessionManager(db_file=db_file)
+    for user_id in ("alice", "bob"):
+        with manager.lock(user_id):
+            manager.get_session(user_id).evidence.append(present(f"s_{user_id}"))
+            manager.save_session(user_id)
+    with manager._connect() as conn:
+        conn.execute("INSERT INTO sessions (user_id, record) VALUES ('broken', '{not json')")
+
+    reloaded = SessionManager(db_file=db_file)
+    assert set(reloaded.sessions) == {"alice", "bob"}
+    assert reloaded.get_session("bob").evidence.as_list() == [present("s_bob")]
@@ -0,0 +1,99 @@
+import pytest
+from chatbot import vitals
+from chatbot.vitals import DAY, VitalsLog, vitals_evidence
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    current = {"now": NOW}
+    monkeypatch.setattr(vitals.time, "time", lambda: current["now"])
+    return current
+
+
+@pytest.fixture
+def log(tmp_path):
+    return VitalsLog(str(tmp_path / "vitals.db"))
+
+
+def test_max_24h_covers_only_the_last_day(clock, log):
+    log.record("u", {"temperature": 39.0}, ts=NOW - DAY - 60)
+    log.record("u", {"temperature": 37.2}, ts=NOW - 3600)
+    log.record("u", {"temperature": 37.8}, ts=NOW - 60)
+
+    rollup = log.summary("u")["temperature"]
+    assert rollup["max_24h"] == 37.8
+    assert rollup["latest_value"] == 37.8
+    assert rollup["readings_7d"] == 3
+
+
+def test_trend_7d_is_slope_per_day(clock, log):
+    for day in range(5):
+        log.record("u", {"systolic": 120 + 2 * day}, ts=NOW - (4 - day) * DAY)
+    log.record("u", {"systolic": 180}, ts=NOW - 8 * DAY)
+
+    rollup = log.summary("u")["systolic"]
+    assert rollup["trend_7d"] == 2.0
+    assert rollup["readings_7d"] == 5
+    assert rollup["latest_value"] == 128
+
+
+def test_rollup_refreshes_when_valid_until_passes(clock, log):
+    log.record("u", {"temperature": 38.5}, ts=NOW - 60)
+    rollup = log.summary("u")["temperature"]
+    assert rollup["max_24h"] == 38.5
+    assert rollup["valid_until"] == NOW - 60 + DAY
+
+    clock["now"] = NOW + DAY
+    rollup = log.summary("u")["temperature"]
+    assert rollup["max_24h"] is None
+    assert rollup["readings_7d"] == 1
+
+    clock["now"] = NOW + 7 * DAY
+    rollup = log.summary("u")["temperature"]
+    assert rollup["readings_7d"] == 0
+    assert rollup["trend_7d"] is None
+    assert rollup["valid_until"] is None
+    assert rollup["latest_value"] == 38.5
+
+
+def test_future_reading_enters_window_when_due(clock, log):
+    log.record("u", {"temperature": 38.2}, ts=NOW + 3600)
+    assert log.summary("u")["temperature"]["max_24h"] is None
+
+    clock["now"] = NOW + 3600
+    assert log.summary("u")["temperature"]["max_24h"] == 38.2
+
+
+def test_out_of_range_reading_is_rejected(clock, log):
+    with pytest.raises(ValueError):
+        log.record("u", {"temperature": 98.6})
+    assert log.summary("u") == {}
+
+
+def test_vitals_evidence(clock, log):
+    log.record("u", {"temperature": 38.4, "systolic": 150, "diastolic": 85}, ts=NOW - 60)
+    ids = [item["id"] for item in vitals_evidence(log.summary("u"), now=NOW)]
+    assert ids == ["s_98", "s_99"]
+
+    clock["now"] = NOW + 8 * DAY
+    assert vitals_evidence(log.summary("u"), now=clock["now"]) == []
+
+
+def test_vitals_are_written_for_the_signed_in_user_only(tmp_path):
+    from types import SimpleNamespace
+    from app import create_app
+    from utils.components import Components
+
+    components = Components()
+    components.__dict__.update(vitals_log=VitalsLog(str(tmp_path / "vitals.db")), openai_client=SimpleNamespace(), symptom_map=[])
+    client = create_app(components).test_client()
+    assert client.post("/health_data", json={"user_id": "alice", "temperature": "39"}).status_code == 403
+
+    with client.session_transaction() as flask_session:
+        flask_session['user_id'] = "alice"
+    assert client.post("/health_data", json={"user_id": "bob", "temperature": "39"}).status_code == 403
+    assert client.post("/health_data", json={"temperature": "38.5"}).status_code == 200
+    assert components.vitals_log.summary("bob") == {}
+    assert components.vitals_log.summary("alice")["temperature"]["latest_value"] == 38.5
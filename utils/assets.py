@@ -0,0 +1,244 @@
+"""Static asset pipeline: minify, fingerprint and precompress `static/` into `static/dist/`.
+
+Run at deploy time, before starting the app:
+
+    python -m utils.assets
+
+With SERVE_BUILT_ASSETS=true, `url_for('static', ...)` resolves to the hashed copies,
+which are served with immutable cache headers and a precompressed body when the
+client accepts one.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import shutil
+from flask import request, send_from_directory
+from chatbot.config import ChatConfig
+
+try:
+    import brotli
+except ImportError:  # gzip-only build; brotli is optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ASSET_EXTENSIONS = (".css", ".js", ".png", ".svg", ".ico")
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg")
+# Content-Encoding -> file suffix, in server preference order
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+IMMUTABLE_MAX_AGE = 31536000
+
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+CSS_PUNCTUATION = re.compile(r"\s*([{};,])\s*")
+# A "/" after one of these (or at the start) opens a regex literal rather than dividing
+JS_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+
+
+def minify_css(text):
+    """Drops comments and the whitespace around braces, semicolons and commas."""
+    text = CSS_COMMENT.sub("", text)
+    text = CSS_PUNCTUATION.sub(r"\1", re.sub(r"\s+", " ", text))
+    return text.replace(";}", "}").strip()
+
+
+def _literal_boundaries(text):
+    """For each newline in JavaScript source, whether it falls inside a string or template literal.
+
+    A small scanner over code, comments, strings, template literals (with nested `${...}`)
+    and regex literals; enough to know which lines must be kept byte for byte.
+    """
+    boundaries = []
+    state, quote, in_class = "code", None, False
+    depth, stack = 0, []  # brace depth in the current code, and the depths of enclosing ${...}
+    previous = ""
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        following = text[i + 1] if i + 1 < n else ""
+        if c == "\n":
+            if state in ("line_comment", "regex") or (state == "string" and quote != "`"):
+                state = "code"
+            boundaries.append(state == "string")
+        elif state == "code":
+            if c == "/" and following == "/":
+                state = "line_comment"
+            elif c == "/" and following == "*":
+                state, i = "block_comment", i + 1
+            elif c == "/" and (not previous or previous in JS_REGEX_PRECEDERS):
+                state, in_class = "regex", False
+            elif c in "'\"`":
+                state, quote = "string", c
+            elif c == "{":
+                depth += 1
+            elif c == "}":
+                if depth == 0 and stack:
+                    depth = stack.pop()
+                    state, quote = "string", "`"
+                else:
+                    depth -= 1
+            if not c.isspace():
+                previous = c
+        elif state == "block_comment":
+            if c == "*" and following == "/":
+                state, i = "code", i + 1
+        elif state == "regex":
+            if c == "\\":
+                i += 1
+            elif c == "[":
+                in_class = True
+            elif c == "]":
+                in_class = False
+            elif c == "/" and not in_class:
+                # Treat the closed regex like an operand: a "/" after it divides
+                state, previous = "code", "a"
+        elif state == "string":
+            if c == "\\":
+                if following == "\n":
+                    boundaries.append(True)
+                i += 1
+            elif c == quote:
+                state, previous = "code", c
+            elif quote == "`" and c == "$" and following == "{":
+                stack.append(depth)
+                state, depth, previous, i = "code", 0, "{", i + 1
+        i += 1
+    return boundaries
+
+
+def minify_js(text):
+    """Drops full-line comments, indentation and blank lines outside string and template literals.
+
+    Lines that start or end inside a literal keep their leading or trailing whitespace, and
+    lines inside one are kept as they are, so the built script behaves like the source. Line
+    breaks are kept for automatic semicolon insertion; compression removes most of what a full
+    minifier would.
+    """
+    lines = text.split("\n")
+    inside = [False, *_literal_boundaries(text)]
+    kept = []
+    for k, line in enumerate(lines):
+        starts_inside, ends_inside = inside[k], k + 1 < len(inside) and inside[k + 1]
+        if not starts_inside:
+            line = line.lstrip()
+        if not ends_inside:
+            line = line.rstrip()
+        if not starts_inside and not ends_inside and (not line or line.startswith("//")):
+            continue
+        kept.append(line)
+    return "\n".join(kept) + "\n"
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+def fingerprint(relative_path, content):
+    root, ext = os.path.splitext(relative_path)
+    return f"{root}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+
+def precompress(path, content):
+    """Writes .gz (and .br when brotli is installed) next to `path` when they are smaller."""
+    variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(content, quality=11)
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(content):
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+
+
+def build(static_dir="static", dist_dir=ChatConfig.ASSET_DIST_DIR):
+    """Builds `dist_dir` from scratch and returns the manifest {source path: hashed path}."""
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist_dir)
+        for name in sorted(files):
+            ext = os.path.splitext(name)[1].lower()
+            if ext not in ASSET_EXTENSIONS:
+                continue
+            source = os.path.join(root, name)
+            relative_path = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                content = f.read()
+            if ext in MINIFIERS:
+                content = MINIFIERS[ext](content.decode("utf-8")).encode("utf-8")
+
+            hashed = fingerprint(relative_path, content)
+            target = os.path.join(dist_dir, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(content)
+            if ext in COMPRESSIBLE_EXTENSIONS:
+                precompress(target, content)
+            manifest[relative_path] = hashed
+
+    with open(os.path.join(dist_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    logger.info("Built %s assets into %s (brotli: %s)", len(manifest), dist_dir, brotli is not None)
+    return manifest
+
+
+def load_manifest(dist_dir=ChatConfig.ASSET_DIST_DIR):
+    try:
+        with open(os.path.join(dist_dir, "manifest.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("No usable asset manifest in %s, serving unbuilt assets: %s", dist_dir, e)
+        return None
+
+
+def init_assets(app, dist_dir=ChatConfig.ASSET_DIST_DIR):
+    """Points `url_for('static', ...)` at the built assets and serves them as immutable.
+
+    Paths missing from the manifest (and everything, if the build has not run) fall
+    back to Flask's default static handler.
+    """
+    manifest = load_manifest(dist_dir)
+    if not manifest:
+        return
+    dist_dir = os.path.abspath(dist_dir)
+    hashed_paths = set(manifest.values())
+    default_static = app.view_functions["static"]
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        if endpoint == "static" and values.get("filename") in manifest:
+            values["filename"] = manifest[values["filename"]]
+
+    def static(filename):
+        if filename not in hashed_paths:
+            return default_static(filename=filename)
+
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        path, encoding = filename, None
+        for candidate, suffix in ENCODINGS:
+            if candidate in request.accept_encodings and os.path.exists(os.path.join(dist_dir, filename + suffix)):
+                path, encoding = filename + suffix, candidate
+                break
+
+        response = send_from_directory(dist_dir, path, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add("Accept-Encoding")
+        if encoding:
+            response.content_encoding = encoding
+        return response
+
+    app.view_functions["static"] = static
+    logger.debug("Serving %s fingerprinted assets from %s", len(manifest), dist_dir)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--static-dir", default="static")
+    parser.add_argument("--dist-dir", default=ChatConfig.ASSET_DIST_DIR)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    for source, hashed in build(args.static_dir, args.dist_dir).items():
+        print(f"{source} -> {hashed}")
@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from collections import deque
+from chatbot.config import ChatConfig
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} circuit open, retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Trips when too many recent calls to one upstream fail or run slow.
+
+    Outcomes are kept in a sliding window of the last `window` calls. Once open, calls fail
+    fast for `open_seconds`; then a single trial call decides whether to close again.
+    """
+
+    def __init__(self, name, window=ChatConfig.BREAKER_WINDOW, min_calls=ChatConfig.BREAKER_MIN_CALLS,
+                 failure_rate=ChatConfig.BREAKER_FAILURE_RATE, slow_call_seconds=ChatConfig.BREAKER_SLOW_CALL_SECONDS,
+                 open_seconds=ChatConfig.BREAKER_OPEN_SECONDS):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.counters = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "trips": 0}
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self._opened_at + self.open_seconds - time.monotonic()
+                if remaining > 0:
+                    self.counters["rejected"] += 1
+                    raise CircuitOpenError(self.name, remaining)
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self._trial_in_flight:
+                    self.counters["rejected"] += 1
+                    raise CircuitOpenError(self.name, self.open_seconds)
+                self._trial_in_flight = True
+
+    def _after_call(self, failed, latency):
+        slow = latency > self.slow_call_seconds
+        with self._lock:
+            self.counters["calls"] += 1
+            self.counters["failures"] += failed
+            self.counters["slow_calls"] += slow
+            bad = failed or slow
+            if self.state == HALF_OPEN:
+                self._trial_in_flight = False
+                if bad:
+                    self._trip()
+                else:
+                    logger.info("Circuit %s closed after successful trial call", self.name)
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                return
+            self._outcomes.append(bad)
+            if len(self._outcomes) >= self.min_calls and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                self._trip()
+
+    def _trip(self):
+        logger.warning("Circuit %s opened: %s of the last %s calls failed or were slow", self.name, sum(self._outcomes), len(self._outcomes))
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.counters["trips"] += 1
+
+    @property
+    def is_open(self):
+        """True while calls would be rejected without reaching the upstream."""
+        with self._lock:
+            return self.state == OPEN and time.monotonic() < self._opened_at + self.open_seconds
+
+    def call(self, fn, *args, failed=None, **kwargs):
+        """Calls `fn` through the breaker; `failed(result)` marks returned values (e.g. 5xx responses) as failures."""
+        self._before_call()
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            self._after_call(True, time.monotonic() - started)
+            raise
+        self._after_call(bool(failed and failed(result)), time.monotonic() - started)
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            return {"state": self.state, **self.counters}
+
+
+def get_breaker(name):
+    """Returns the process-wide breaker for an upstream, creating it on first use."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_metrics():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+
+def server_error(response):
+    """`failed` predicate for requests responses: 5xx and 429 count against the upstream."""
+    return response.status_code >= 500 or response.status_code == 429
@@ -0,0 +1,110 @@
+import logging
+import threading
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+
+class lazy_component:
+    """Builds a shared component on first access, once per process, then caches it on the instance."""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.name = factory.__name__
+        self.lock = threading.Lock()
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        with self.lock:
+            if self.name not in instance.__dict__:
+                logger.debug("Initializing component: %s", self.name)
+                instance.__dict__[self.name] = self.factory(instance)
+        return instance.__dict__[self.name]
+
+
+class Components:
+    """Process-wide services shared by all requests.
+
+    Nothing is constructed at import time; heavy modules (OpenAI, NumPy/pandas) are
+    imported the first time a request needs the component that uses them.
+    """
+
+    @lazy_component
+    def symptom_map(self):
+        from utils.helpers import fetch_symptoms, load_cached_symptoms
+        symptoms = load_cached_symptoms()
+        if symptoms is None:
+            # Expired or missing: refresh from Infermedica, else keep matching against the stale copy
+            client = self.infermedica_client
+            symptoms = fetch_symptoms(client.api_url, client.headers) or load_cached_symptoms(expiry=float("inf"))
+        return symptoms
+
+    @lazy_component
+    def openai_http(self):
+        import httpx
+        # Kept separately so warm-up can open connections in the pool the OpenAI client uses
+        return httpx.Client()
+
+    @lazy_component
+    def openai_client(self):
+        from openai import OpenAI
+        from chatbot.config import ChatConfig
+        # The SDK default is a 10-minute timeout with 2 retries, long enough to hang a worker
+        return OpenAI(api_key=config("OPENAI_API_KEY"), http_client=self.openai_http, timeout=ChatConfig.OPENAI_TIMEOUT, max_retries=1)
+
+    @lazy_component
+    def session_manager(self):
+        from chatbot.config import ChatConfig
+        from chatbot.session_manager import SessionManager
+        return SessionManager(legacy_file=ChatConfig.SESSIONS_LEGACY_FILE)
+
+    @lazy_component
+    def vitals_log(self):
+        from chatbot.vitals import VitalsLog
+        return VitalsLog()
+
+    @lazy_component
+    def feedback_pipeline(self):
+        from chatbot.feedback import FeedbackPipeline
+        return FeedbackPipeline()
+
+    @lazy_component
+    def admission_controller(self):
+        from chatbot.admission import AdmissionController
+        return AdmissionController()
+
+    @lazy_component
+    def infermedica_client(self):
+        from chatbot.infermedica import InfermedicaClient
+        return InfermedicaClient(self.openai_client)
+
+    @lazy_component
+    def speculator(self):
+        # Off unless enabled: every speculative call is a billed Infermedica request
+        if not config("SPECULATIVE_DIAGNOSIS", default=False, cast=bool):
+            return None
+        from chatbot.speculation import DiagnosisSpeculator
+        return DiagnosisSpeculator(self.infermedica_client)
+
+    @lazy_component
+    def nlp_processor(self):
+        from chatbot.nlp import NLPProcessor
+        nlp_processor = NLPProcessor(self.openai_client)
+        nlp_processor.load_symptom_map(self.symptom_map)
+        return nlp_processor
+
+    @lazy_component
+    def local_triage(self):
+        from chatbot.triage_rules import LocalTriage
+        return LocalTriage(self.symptom_map)
+
+    @lazy_component
+    def fitbit_client(self):
+        from fitbit.fitbit import FitbitClient
+        return FitbitClient()
+
+    @lazy_component
+    def analytics_engine(self):
+        from analytics.analytics import AnalyticsEngine
+        return AnalyticsEngine(self.symptom_map, history_store=self.fitbit_client.history_store)
@@ -0,0 +1,62 @@
+"""Negotiated gzip/brotli compression for dynamic responses above a size threshold."""
+import gzip
+import logging
+from flask import request
+from chatbot.config import ChatConfig
+
+try:
+    import brotli
+except ImportError:  # gzip-only; brotli is optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/html", "text/css", "text/javascript", "application/javascript", "text/plain")
+
+# Content-Encoding -> compressor, in server preference order. Levels favour CPU over
+# the last few percent of size since every response is compressed on the request thread.
+COMPRESSORS = {"gzip": lambda data: gzip.compress(data, compresslevel=6, mtime=0)}
+if brotli is not None:
+    COMPRESSORS = {"br": lambda data: brotli.compress(data, quality=5), **COMPRESSORS}
+
+
+def negotiate(accept_encodings):
+    """Returns the preferred encoding the client accepts, or None."""
+    for encoding in COMPRESSORS:
+        if accept_encodings[encoding]:
+            return encoding
+    return None
+
+
+def compress_response(response, min_size=ChatConfig.COMPRESS_MIN_SIZE):
+    """Compresses `response` in place when the client, content type and size allow it."""
+    if (
+        response.direct_passthrough  # streamed files, incl. precompressed static assets
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or not 200 <= response.status_code < 300
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    response.set_data(COMPRESSORS[encoding](data))
+    response.content_encoding = encoding
+    if response.headers.get("ETag"):
+        # The compressed body is a different representation of the same resource
+        response.headers["ETag"] = response.headers["ETag"].rstrip('"') + f'-{encoding}"'
+    return response
+
+
+def init_compression(app, min_size=ChatConfig.COMPRESS_MIN_SIZE):
+    @app.after_request
+    def compress(response):
+        return compress_response(response, min_size)
+
+    logger.debug("Response compression: %s above %s bytes", ", ".join(COMPRESSORS), min_size)
@@ -1,45 +1,39 @@
 import logging
 import os
-import json
 import time
-import requests
 from chatbot.config import ChatConfig
+from utils import serialization
+from utils.http_pool import get_http_session
 
 logger = logging.getLogger(__name__)
 
-def setup_logging():
-    """Sets up logging configuration."""
-    logging.basicConfig(level=logging.DEBUG)
-    logger = logging.getLogger(__name__)
-    return logger
-
 def load_cached_symptoms(cache_file=ChatConfig.CACHE_FILE, expiry=ChatConfig.CACHE_EXPIRY):
     """Loads cached symptom list if fresh."""
     if os.path.exists(cache_file):
         try:
             last_modified = os.path.getmtime(cache_file)
             if (time.time() - last_modified) < expiry:
-                with open(cache_file, "r") as f:
-                    cached_symptoms = json.load(f)
-                    logger.debug(f"Loaded {len(cached_symptoms)} symptoms from {cache_file}")
+                with open(cache_file, "rb") as f:
+                    cached_symptoms = serialization.load(f)
+                    logger.debug("Loaded %s symptoms from %s", len(cached_symptoms), cache_file)
                     return cached_symptoms
         except Exception as e:
-            logger.error(f"Error loading cached symptoms: {str(e)}")
+            logger.error("Error loading cached symptoms: %s", e)
     return None
 
 def fetch_symptoms(api_url, headers, params={"age.value": 30}):
-    """Fetches and caches symptom list."""
+    """Fetches and caches the symptom list; returns [name, id] pairs like the cache, or None on failure."""
     try:
-        response = requests.get(f"{api_url}/symptoms", headers=headers, params=params)
+        response = get_http_session("infermedica").get(f"{api_url}/symptoms", headers=headers, params=params, timeout=30)
         if response.status_code == 200:
-            symptoms = {s["name"].lower(): s["id"] for s in response.json()}
-            with open(ChatConfig.CACHE_FILE, "w") as f:
-                json.dump(list(symptoms.items()), f)
-            logger.debug(f"Fetched and cached {len(symptoms)} symptoms")
+            symptoms = list({s["name"].lower(): s["id"] for s in response.json()}.items())
+            with open(ChatConfig.CACHE_FILE, "wb") as f:
+                f.write(serialization.dumpb(symptoms))
+            logger.debug("Fetched and cached %s symptoms", len(symptoms))
             return symptoms
         else:
-            logger.error(f"Failed to fetch symptoms: {response.status_code}, {response.text}")
-            return {}
+            logger.error("Failed to fetch symptoms: %s, %s", response.status_code, response.text)
+            return None
     except Exception as e:
-        logger.error(f"Error fetching symptoms: {str(e)}")
-        return {}
\ No newline at end of file
+        logger.error("Error fetching symptoms: %s", e)
+        return None
\ No newline at end of file
@@ -0,0 +1,45 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from chatbot.config import ChatConfig
+
+logger = logging.getLogger(__name__)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_http_session(name):
+    """Returns the process-wide requests session for an upstream, creating it on first use.
+
+    Module-level `requests.get`/`post` open a new TLS connection per call; a session keeps
+    up to `HTTP_POOL_SIZE` connections alive for reuse by every thread in the worker.
+    """
+    with _sessions_lock:
+        if name not in _sessions:
+            http = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=ChatConfig.HTTP_POOL_SIZE)
+            http.mount("https://", adapter)
+            http.mount("http://", adapter)
+            _sessions[name] = http
+        return _sessions[name]
+
+
+def preconnect(head, url, connections=ChatConfig.WARMUP_CONNECTIONS, timeout=ChatConfig.WARMUP_CONNECT_TIMEOUT):
+    """Opens `connections` keep-alive connections to `url`'s host by sending concurrent HEAD requests.
+
+    `head` is a pooled client's head method (requests.Session or httpx.Client); the connections
+    go back to its pool. Any HTTP status counts, since only the handshake matters. Returns the number opened.
+    """
+    def attempt(_):
+        try:
+            head(url, timeout=timeout)
+            return True
+        except Exception as e:
+            logger.warning("Could not preconnect to %s: %s", url, e)
+            return False
+
+    with ThreadPoolExecutor(max_workers=connections) as pool:
+        return sum(pool.map(attempt, range(connections)))
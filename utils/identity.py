@@ -0,0 +1,27 @@
+"""Which user a request may act for.
+
+Pages echo the signed-in user's ID back in request bodies as `user_id`. Anyone can edit a
+body, so writes are keyed on the Flask session's `user_id`. A body `user_id` may only
+repeat it.
+"""
+import logging
+from flask import jsonify, request, session
+
+logger = logging.getLogger(__name__)
+
+
+def signed_in_user_id(data):
+    """The signed-in user's ID, or None when nobody is signed in or the body names someone else."""
+    user_id = session.get('user_id')
+    if not user_id:
+        return None
+    claimed = data.get('user_id') if isinstance(data, dict) else None
+    if claimed is not None and claimed != user_id:
+        logger.warning("Rejected %s %s: body user_id does not match the signed-in user", request.method, request.path)
+        return None
+    return user_id
+
+
+def forbidden(**fields):
+    """The 403 response for a request `signed_in_user_id` refused; `fields` are extra JSON keys the page expects."""
+    return jsonify({"message": "Please sign in as the user this request is for.", **fields}), 403
@@ -0,0 +1,125 @@
+import atexit
+import logging
+import queue
+import random
+import re
+from logging.handlers import QueueHandler, QueueListener
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# Fraction of debug payload logs (request bodies, upstream responses) that include the payload
+PAYLOAD_SAMPLE_RATE = config("LOG_PAYLOAD_SAMPLE_RATE", default=0.01, cast=float)
+
+# Client libraries log full request headers at DEBUG, bearer tokens included
+NOISY_LOGGERS = ("urllib3", "httpx", "httpcore", "openai")
+# Log arguments of these types cannot change before the listener formats the record
+IMMUTABLE_ARGS = (str, bytes, int, float, bool, type(None))
+
+_listener = None
+
+
+class RedactingFilter(logging.Filter):
+    """Masks credentials and health details in log messages before they reach a handler."""
+
+    SECRET_KEYS = ("access_token", "refresh_token", "id_token", "auth0_user", "code_verifier", "App-Key", "api_key", "Authorization")
+    PHI_KEYS = ("age", "sex", "temperature", "systolic", "diastolic", "weight", "bmi", "body_fat", "email", "free_text", "input")
+
+    KEY_VALUE = re.compile(
+        r"""(['"](?:%s)['"]\s*:\s*)('[^']*'|"[^"]*"|[^,}\s]+)""" % "|".join(map(re.escape, SECRET_KEYS + PHI_KEYS))
+    )
+    BEARER = re.compile(r"Bearer\s+[\w\-.~+/]+=*")
+    JWT = re.compile(r"eyJ[\w-]+\.[\w-]+\.[\w-]*")
+
+    def redact(self, message):
+        # Cheap substring checks skip the regexes for the common message with nothing to mask
+        if "'" in message or '"' in message:
+            message = self.KEY_VALUE.sub(r"\1'[REDACTED]'", message)
+        if "Bearer" in message:
+            message = self.BEARER.sub("Bearer [REDACTED]", message)
+        if "eyJ" in message:
+            message = self.JWT.sub("[REDACTED]", message)
+        return message
+
+    def filter(self, record):
+        record.msg = self.redact(record.getMessage())
+        record.args = None
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Queues records without formatting them, so the listener thread does that work.
+
+    QueueHandler.prepare would interpolate and format every record on the request thread.
+    Here a record is queued as it is, unless an argument is mutable (a dict, list or
+    session object that may change before the listener runs). Those messages are
+    interpolated first, so the log shows the values at the time of the call.
+    """
+
+    def prepare(self, record):
+        args = record.args
+        if args and not (isinstance(args, tuple) and all(isinstance(arg, IMMUTABLE_ARGS) for arg in args)):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+def _log_level(name):
+    """Returns (numeric level, None) for a level name or number, or (INFO, the bad value)."""
+    if name.isdigit():
+        return int(name), None
+    level = logging.getLevelName(name)
+    # getLevelName returns a "Level X" string for names it does not know
+    return (level, None) if isinstance(level, int) else (logging.INFO, name)
+
+
+def log_payload(log, msg, *args, payload=None):
+    """Debug-logs `msg`, attaching `payload` for a sampled fraction of calls.
+
+    `payload` may be a zero-argument callable so costly bodies (e.g. `response.text`)
+    are only built when the record is actually sampled.
+    """
+    if not log.isEnabledFor(logging.DEBUG):
+        return
+    if payload is not None and random.random() < PAYLOAD_SAMPLE_RATE:
+        log.debug(msg + " payload=%s", *args, payload() if callable(payload) else payload)
+    else:
+        log.debug(msg, *args)
+
+
+def setup_logging():
+    """Configures root logging from the environment with redaction and an off-thread writer.
+
+    LOG_LEVEL defaults to DEBUG in development and INFO elsewhere; an unknown value falls back
+    to INFO with a warning. Records are queued by the request thread. Interpolation (except for
+    mutable arguments, see DeferredQueueHandler), redaction and formatting happen on the
+    QueueListener thread.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    environment = config("ENVIRONMENT", default="development")
+    level, invalid_level = _log_level(config("LOG_LEVEL", default="DEBUG" if environment == "development" else "INFO").strip().upper())
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    stream_handler.addFilter(RedactingFilter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level)
+    for name in NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(max(level, logging.WARNING))
+
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+    if invalid_level:
+        logger.warning("Unknown LOG_LEVEL %s; using INFO", invalid_level)
+    logger.debug("Logging configured: level=%s, payload sample rate=%s", logging.getLevelName(level), PAYLOAD_SAMPLE_RATE)
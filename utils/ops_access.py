@@ -0,0 +1,55 @@
+"""Access control for operator endpoints such as /metrics and /feedback/stats.
+
+With OPS_SECRET set, a request needs an `X-Ops-Token` header signed with it (valid for
+ChatConfig.OPS_TOKEN_MAX_AGE seconds). Without it, only local requests are served. Other
+clients get a 404, as for /profiles. Generate a header value with:
+
+    python -m utils.ops_access token
+"""
+import argparse
+import functools
+from decouple import config
+from flask import abort, request
+from itsdangerous import BadSignature, TimestampSigner
+from chatbot.config import ChatConfig
+
+OPS_HEADER = "X-Ops-Token"
+SIGNER_SALT = "ops-endpoint"
+LOCAL_ADDRS = ("127.0.0.1", "::1")
+
+OPS_SECRET = config("OPS_SECRET", default="")
+
+
+def make_token(secret):
+    return TimestampSigner(secret, salt=SIGNER_SALT).sign(b"ops").decode("ascii")
+
+
+def authorized():
+    """True when the current request may read operator endpoints."""
+    if not OPS_SECRET:
+        return request.remote_addr in LOCAL_ADDRS
+    token = request.headers.get(OPS_HEADER)
+    if not token:
+        return False
+    try:
+        TimestampSigner(OPS_SECRET, salt=SIGNER_SALT).unsign(token, max_age=ChatConfig.OPS_TOKEN_MAX_AGE)
+        return True
+    except BadSignature:
+        return False
+
+
+def ops_only(view):
+    """Serves `view` only to authorized requests; everyone else gets a 404."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not authorized():
+            abort(404)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Operator endpoint helpers")
+    parser.add_argument("command", choices=["token"], help="print a signed X-Ops-Token header value")
+    parser.parse_args()
+    print(make_token(config("OPS_SECRET")))
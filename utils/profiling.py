@@ -0,0 +1,230 @@
+"""Opt-in request profiling that writes flamegraph files to ChatConfig.PROFILE_DIR.
+
+A request is profiled when it is picked by PROFILE_SAMPLE_RATE, or when it carries an
+`X-Profile` header signed with PROFILE_SECRET. Generate a header value (valid for
+ChatConfig.PROFILE_TOKEN_MAX_AGE seconds) with:
+
+    python -m utils.profiling token
+
+With neither setting, no hooks are registered and requests pay nothing.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from decouple import config
+from flask import abort, g, jsonify, request, send_from_directory
+from itsdangerous import BadSignature, TimestampSigner
+from chatbot.config import ChatConfig
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+SIGNER_SALT = "request-profile"
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+LOCAL_ADDRS = ("127.0.0.1", "::1")
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a timer; wall-clock, so time blocked on I/O shows up."""
+
+    def __init__(self, thread_id, interval=ChatConfig.PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self.started = self.duration = None
+
+    @staticmethod
+    def _label(code):
+        path = code.co_filename
+        path = os.path.relpath(path) if path.startswith(os.getcwd()) else path.rpartition("site-packages" + os.sep)[2]
+        return code.co_name, path, code.co_firstlineno
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def collapsed(self):
+        """Brendan Gregg's folded format, one `frame;frame;frame count` line per stack."""
+        return "".join(
+            ";".join(f"{name} ({path}:{line})" for name, path, line in stack) + f" {count}\n"
+            for stack, count in self.stacks.most_common()
+        )
+
+    def speedscope(self, name):
+        frames, index, samples, weights = [], {}, [], []
+        # Samples land late when the request thread holds the GIL, so spread the measured wall time over them
+        per_sample = self.duration / max(sum(self.stacks.values()), 1)
+        for stack, count in self.stacks.most_common():
+            for label in stack:
+                if label not in index:
+                    index[label] = len(frames)
+                    frames.append({"name": label[0], "file": label[1], "line": label[2]})
+            samples.append([index[label] for label in stack])
+            weights.append(count * per_sample)
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "healthsync",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled", "name": name, "unit": "seconds",
+                "startValue": 0, "endValue": self.duration, "samples": samples, "weights": weights,
+            }],
+        }
+
+
+class ProfileStore:
+    """Profile files on local disk, newest first, pruned to the most recent `keep`."""
+
+    def __init__(self, profile_dir=ChatConfig.PROFILE_DIR, keep=ChatConfig.PROFILE_KEEP):
+        self.profile_dir = profile_dir
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def save(self, sampler, endpoint, method, status):
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{int(sampler.duration * 1000)}ms-{endpoint}-{os.urandom(3).hex()}"
+        meta = {
+            "id": profile_id, "endpoint": endpoint, "method": method, "status": status,
+            "duration_ms": round(sampler.duration * 1000, 1), "samples": sum(sampler.stacks.values()),
+            "created": time.time(),
+        }
+        os.makedirs(self.profile_dir, exist_ok=True)
+        base = os.path.join(self.profile_dir, profile_id)
+        with open(base + ".collapsed", "w") as f:
+            f.write(sampler.collapsed())
+        with open(base + ".speedscope.json", "w") as f:
+            json.dump(sampler.speedscope(f"{method} {endpoint}"), f)
+        with open(base + ".json", "w") as f:
+            json.dump(meta, f)
+        self._prune()
+        return profile_id
+
+    def _prune(self):
+        with self._lock:
+            profiles = self.list(limit=None)
+            for meta in profiles[self.keep:]:
+                for suffix in (".json", ".collapsed", ".speedscope.json"):
+                    try:
+                        os.remove(os.path.join(self.profile_dir, meta["id"] + suffix))
+                    except FileNotFoundError:
+                        pass
+
+    def list(self, limit=50):
+        """Returns profile metadata, newest first."""
+        profiles = []
+        try:
+            names = os.listdir(self.profile_dir)
+        except FileNotFoundError:
+            return profiles
+        for name in names:
+            if name.endswith(".json") and not name.endswith(".speedscope.json"):
+                try:
+                    with open(os.path.join(self.profile_dir, name)) as f:
+                        profiles.append(json.load(f))
+                except (OSError, ValueError) as e:
+                    logger.warning("Skipping unreadable profile %s: %s", name, e)
+        profiles.sort(key=lambda meta: meta["created"], reverse=True)
+        return profiles[:limit]
+
+
+def _signer(secret):
+    return TimestampSigner(secret, salt=SIGNER_SALT)
+
+
+def make_token(secret):
+    return _signer(secret).sign(b"profile").decode("ascii")
+
+
+def valid_token(secret, token, max_age=ChatConfig.PROFILE_TOKEN_MAX_AGE):
+    if not secret or not token:
+        return False
+    try:
+        _signer(secret).unsign(token, max_age=max_age)
+        return True
+    except BadSignature:
+        return False
+
+
+def init_profiling(app, sample_rate=None, secret=None, store=None):
+    """Registers the profiling hooks and the `/profiles` index when profiling is configured."""
+    sample_rate = config("PROFILE_SAMPLE_RATE", default=0.0, cast=float) if sample_rate is None else sample_rate
+    secret = config("PROFILE_SECRET", default="") if secret is None else secret
+    if sample_rate <= 0 and not secret:
+        return
+    store = store or ProfileStore()
+
+    def authorized():
+        # Without a secret, the index and files are only served to local requests
+        if secret:
+            return valid_token(secret, request.headers.get(PROFILE_HEADER))
+        return request.remote_addr in LOCAL_ADDRS
+
+    @app.before_request
+    def start_profile():
+        if request.endpoint in (None, "static", "profiles", "profile_file"):
+            return
+        if random.random() < sample_rate or (PROFILE_HEADER in request.headers and authorized()):
+            g.profiler = StackSampler(threading.get_ident()).start()
+
+    @app.after_request
+    def save_profile(response):
+        sampler = g.pop("profiler", None)
+        if sampler is not None:
+            sampler.stop()
+            try:
+                response.headers["X-Profile-Id"] = store.save(sampler, request.endpoint, request.method, response.status_code)
+            except OSError as e:
+                logger.error("Could not write profile for %s: %s", request.endpoint, e)
+        return response
+
+    @app.teardown_request
+    def stop_profile(exc):
+        # Requests that never reach after_request must not leave a sampler running
+        sampler = g.pop("profiler", None)
+        if sampler is not None:
+            sampler.stop()
+
+    @app.route('/profiles')
+    def profiles():
+        if not authorized():
+            abort(404)
+        return jsonify({"profiles": store.list(request.args.get("limit", 50, type=int))})
+
+    @app.route('/profiles/<path:filename>')
+    def profile_file(filename):
+        if not authorized():
+            abort(404)
+        return send_from_directory(os.path.abspath(store.profile_dir), filename)
+
+    logger.info("Request profiling enabled: sample rate=%s, signed header=%s, dir=%s", sample_rate, bool(secret), store.profile_dir)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Request profiling helpers")
+    parser.add_argument("command", choices=["token"], help="print a signed X-Profile header value")
+    parser.parse_args()
+    print(make_token(config("PROFILE_SECRET")))
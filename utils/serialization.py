@@ -0,0 +1,71 @@
+"""JSON encoding for responses, session files and caches, backed by orjson when installed.
+
+JSON_BACKEND=json forces the standard library (e.g. to compare output or rule out orjson).
+"""
+import json
+import logging
+from decouple import config
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback; orjson is optional
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+BACKEND = "orjson" if orjson is not None and config("JSON_BACKEND", default="orjson") == "orjson" else "json"
+
+if BACKEND == "orjson":
+    # Session data keyed by ints (e.g. heart-rate zones) must still encode
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumpb(obj, default=None):
+        """Encodes `obj` to UTF-8 JSON bytes."""
+        return orjson.dumps(obj, default=default, option=_OPTIONS)
+
+    def dumps(obj, default=None):
+        """Encodes `obj` to a JSON string."""
+        return orjson.dumps(obj, default=default, option=_OPTIONS).decode("utf-8")
+
+    loads = orjson.loads
+else:
+    def dumpb(obj, default=None):
+        return json.dumps(obj, default=default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def dumps(obj, default=None):
+        return json.dumps(obj, default=default, separators=(",", ":"), ensure_ascii=False)
+
+    loads = json.loads
+
+
+def load(f):
+    """Decodes JSON from an open file."""
+    return loads(f.read())
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes `jsonify` bodies with the configured backend.
+
+    Debug-mode pretty printing and `sort_keys` are left to the stdlib provider, so
+    those responses look the same as before.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs or BACKEND != "orjson":
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, default=self.default)
+
+    def loads(self, s, **kwargs):
+        return super().loads(s, **kwargs) if kwargs else loads(s)
+
+    def response(self, *args, **kwargs):
+        if BACKEND != "orjson" or self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumpb(obj, default=self.default), mimetype=self.mimetype)
+
+
+def init_json(app):
+    app.json = FastJSONProvider(app)
+    logger.debug("JSON backend: %s", BACKEND)
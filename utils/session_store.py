@@ -0,0 +1,78 @@
+import logging
+import os
+import struct
+import threading
+import time
+from datetime import timedelta
+from flask_session.sessions import FileSystemSessionInterface
+from chatbot.config import ChatConfig
+
+logger = logging.getLogger(__name__)
+
+_cleanup_thread = None
+
+
+class FileSystemSessionStore(FileSystemSessionInterface):
+    """Flask-Session's filesystem backend, minus the file rewrite and Set-Cookie on unmodified requests."""
+
+    def save_session(self, app, session, response):
+        if session and not self.should_set_cookie(app, session):
+            return
+        super().save_session(app, session, response)
+
+
+def init_session_store(app, session_dir=ChatConfig.SESSION_DIR):
+    """Stores Flask sessions server-side so the cookie only carries a signed session ID."""
+    app.config.update(
+        SESSION_TYPE='filesystem',
+        SESSION_FILE_DIR=session_dir,
+        SESSION_USE_SIGNER=True,
+        # Sessions are only written when modified, so they expire SESSION_LIFETIME after the last change
+        SESSION_REFRESH_EACH_REQUEST=False,
+        PERMANENT_SESSION_LIFETIME=timedelta(seconds=ChatConfig.SESSION_LIFETIME),
+    )
+    # threshold=0 turns off cachelib's own pruning: it evicts live sessions past N files and
+    # rewrites a count file on every save. Expired files are removed by the cleanup thread instead.
+    app.session_interface = FileSystemSessionStore(session_dir, threshold=0, mode=0o600, key_prefix='session:', use_signer=True)
+    start_cleanup(session_dir)
+
+
+def cleanup_expired_sessions(session_dir=ChatConfig.SESSION_DIR, now=None):
+    """Deletes session files whose expiry has passed; returns how many were removed.
+
+    Session files start with cachelib's 4-byte expiry timestamp, so only the header is read.
+    """
+    now = now or time.time()
+    removed = 0
+    try:
+        names = os.listdir(session_dir)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        path = os.path.join(session_dir, name)
+        try:
+            with open(path, 'rb') as f:
+                expires = struct.unpack('I', f.read(4))[0]
+            if expires != 0 and expires < now:
+                os.remove(path)
+                removed += 1
+        except (OSError, struct.error) as e:
+            logger.warning("Skipping session file %s during cleanup: %s", path, e)
+    if removed:
+        logger.info("Removed %s expired session files from %s", removed, session_dir)
+    return removed
+
+
+def start_cleanup(session_dir=ChatConfig.SESSION_DIR, interval=ChatConfig.SESSION_CLEANUP_INTERVAL):
+    """Starts one background thread per process that sweeps expired session files every `interval` seconds."""
+    global _cleanup_thread
+    if _cleanup_thread is not None:
+        return
+
+    def sweep():
+        while True:
+            cleanup_expired_sessions(session_dir)
+            time.sleep(interval)
+
+    _cleanup_thread = threading.Thread(target=sweep, name="session-cleanup", daemon=True)
+    _cleanup_thread.start()
@@ -0,0 +1,78 @@
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent identical calls into one: the first caller runs it, the rest share its outcome.
+
+    Only calls that overlap in time are merged; nothing is cached once the leader returns.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.counters = {"upstream_calls": 0, "coalesced": 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.counters["upstream_calls"] += 1
+            else:
+                self.counters["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counters, in_flight=len(self._calls))
+
+
+def request_key(*parts):
+    """Stable key for JSON-like request parts (payload dicts, message lists)."""
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+def get_single_flight(name):
+    """Returns the process-wide single-flight group for an upstream, creating it on first use."""
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight(name)
+        return _groups[name]
+
+
+def single_flight_metrics():
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {group.name: group.snapshot() for group in groups}
@@ -0,0 +1,87 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.http_pool import get_http_session, preconnect
+
+logger = logging.getLogger(__name__)
+
+# Built in this order; later components reuse the earlier ones
+COMPONENTS = ("session_manager", "vitals_log", "admission_controller", "feedback_pipeline", "openai_client",
+              "infermedica_client", "symptom_map", "nlp_processor", "local_triage", "speculator", "fitbit_client",
+              "analytics_engine")
+# Served once in-process so per-route caches (e.g. the /symptoms name list) are filled
+PATHS = ("/", "/symptoms")
+
+
+class Warmup:
+    """Gets a worker ready before it takes traffic.
+
+    Compiles templates, builds components (symptom indexes included), serves a few routes
+    once and opens keep-alive connections to the upstreams. Runs once in a background thread,
+    so the worker answers /healthz at once and /readyz only when the steps have finished.
+    A failed step is logged and reported but does not keep the worker out of rotation; an
+    unreachable upstream is handled per request by its breaker.
+    """
+
+    def __init__(self, app, components):
+        self.app = app
+        self.components = components
+        self.steps = {}
+        self.seconds = None
+        self._done = threading.Event()
+
+    @property
+    def ready(self):
+        return self._done.is_set()
+
+    def start(self):
+        threading.Thread(target=self.run, name="warmup", daemon=True).start()
+
+    def skip(self):
+        self._done.set()
+
+    def run(self):
+        started = time.perf_counter()
+        for name, step in (("templates", self._templates), ("components", self._components), ("requests", self._requests),
+                           ("connections", self._connections)):
+            step_started = time.perf_counter()
+            try:
+                result = step()
+            except Exception as e:
+                logger.error("Warm-up step %s failed: %s", name, e, exc_info=True)
+                result = {"error": str(e)}
+            self.steps[name] = {"seconds": round(time.perf_counter() - step_started, 3), **result}
+        self.seconds = round(time.perf_counter() - started, 3)
+        self._done.set()
+        logger.info("Warm-up finished in %.2fs: %s", self.seconds, self.steps)
+
+    def _templates(self):
+        # get_template compiles and caches, so the first render only executes
+        env = self.app.jinja_env
+        names = [name for name in env.list_templates() if name.endswith(".html")]
+        for name in names:
+            env.get_template(name)
+        return {"compiled": len(names)}
+
+    def _components(self):
+        for name in COMPONENTS:
+            getattr(self.components, name)
+        return {"built": len(COMPONENTS), "symptoms": len(self.components.symptom_map or [])}
+
+    def _requests(self):
+        client = self.app.test_client()
+        return {"statuses": {path: client.get(path).status_code for path in PATHS}}
+
+    def _connections(self):
+        targets = {
+            "infermedica": (get_http_session("infermedica").head, self.components.infermedica_client.api_url),
+            "fitbit": (get_http_session("fitbit").head, self.components.fitbit_client.token_url),
+            "openai": (self.components.openai_http.head, str(self.components.openai_client.base_url)),
+        }
+        with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+            opened = {name: pool.submit(preconnect, head, url) for name, (head, url) in targets.items()}
+            return {"opened": {name: future.result() for name, future in opened.items()}}
+
+    def snapshot(self):
+        return {"ready": self.ready, "seconds": self.seconds, "steps": dict(self.steps)}